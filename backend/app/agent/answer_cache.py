@@ -0,0 +1,190 @@
+"""
+Cache de respostas do chat
+
+Uma resposta fica indexada pela intenção resolvida: a forma da pergunta
+(pergunta normalizada sem entidades, anos e palavras de ligação), as chamadas
+da primeira rodada de ferramentas (entidades normalizadas) e a versão dos
+dados (hash do conteúdo, estável entre reinícios). Assim "desmatamento no
+Pará em 2024" e "desmatamento em PA 2024" compartilham a resposta, enquanto
+"variação do Pará 2023-2024" x "compare o Pará 2023-2024 e explique as
+causas" (mesmo plano, formas diferentes) não compartilham o texto.
+
+Consultas:
+- pergunta normalizada (ex.: Quick Actions): antes de chamar o modelo
+- intenção: após a primeira rodada, pulando as ferramentas e a completion final
+
+Camadas:
+- memória: TTLCache (LRU com TTL)
+- SQLite (opcional): sobrevive a reinícios; lida quando a memória não tem e
+  gravada fora do event loop (asyncio.to_thread)
+"""
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+
+from app.agent.intent_router import MAX_NGRAM, PREPOSITIONS, STOPWORDS
+from app.services.cache import TTLCache
+from app.services.entity_resolver import fold
+from app.services.mock_data_brazil import RESOLVER
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_question(question: str) -> str:
+    """Pergunta sem acentos, caixa, pontuação e espaços extras"""
+    return " ".join(re.sub(r"[^\w\s]", " ", fold(question)).split())
+
+
+def question_shape(question: str) -> str:
+    """
+    Pergunta normalizada sem as menções a entidades (n-gramas resolvidos),
+    anos e palavras de ligação; as entidades e anos ficam no plano
+    """
+    words = normalize_question(question).split()
+    shape = []
+    i = 0
+    while i < len(words):
+        if words[i] in STOPWORDS or words[i] in PREPOSITIONS or words[i].isdigit():
+            i += 1
+            continue
+        for size in range(min(MAX_NGRAM, len(words) - i), 0, -1):
+            if RESOLVER.lookup(" ".join(words[i:i + size]), fuzzy=False):
+                i += size
+                break
+        else:
+            shape.append(words[i])
+            i += 1
+    return " ".join(shape)
+
+
+def _canonical_value(value):
+    if isinstance(value, str):
+        entity = RESOLVER.find(value)
+        return f"{entity.kind}:{entity.name}" if entity else fold(value)
+    return value
+
+
+def _canonical_round(calls: List[Dict]) -> List:
+    plan = []
+    for call in calls:
+        try:
+            arguments = json.loads(call["arguments"] or "{}")
+        except json.JSONDecodeError:
+            arguments = {"_raw": call["arguments"]}
+        plan.append([call["name"], {key: _canonical_value(v) for key, v in sorted(arguments.items())}])
+    return sorted(plan, key=lambda item: json.dumps(item, sort_keys=True))
+
+
+def canonical_plan(rounds: List[List[Dict]]) -> str:
+    """
+    Plano de ferramentas (uma lista de chamadas por rodada) em forma canônica:
+    independe da ordem das chamadas dentro da rodada e da grafia das entidades
+    """
+    return json.dumps([_canonical_round(calls) for calls in rounds], sort_keys=True, ensure_ascii=False)
+
+
+class AnswerCache:
+    """Cache de respostas em memória com camada SQLite opcional"""
+
+    def __init__(self, max_size: int = 512, ttl: float = 3600, sqlite_path: str = ""):
+        self.ttl = ttl
+        self.memory = TTLCache(max_size=max_size, ttl=ttl)
+        self.sqlite_path = sqlite_path
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.counters = {
+            "question_hits": 0, "question_misses": 0, "intent_hits": 0, "intent_misses": 0,
+            "sqlite_hits": 0, "stores": 0
+        }
+
+        if sqlite_path:
+            self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.commit()
+            logger.info(f"Cache de respostas do chat persistido em {sqlite_path}")
+
+    def _get(self, namespace: str, key: str) -> Optional[str]:
+        hit, value = self.memory.get((namespace, key))
+        if hit:
+            return value
+        if self._db is None:
+            return None
+
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, created_at FROM entries WHERE key = ?", (f"{namespace}|{key}",)
+            ).fetchone()
+        if row is None or row[1] + self.ttl < time.time():
+            return None
+
+        self.counters["sqlite_hits"] += 1
+        self.memory.set((namespace, key), row[0])
+        return row[0]
+
+    def _persist(self, rows: List[Tuple[str, str]]) -> None:
+        """Grava as entradas no SQLite em uma única transação (roda em thread)"""
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO entries (key, value, created_at) VALUES (?, ?, ?)",
+                [(key, value, now) for key, value in rows]
+            )
+            self._db.commit()
+
+    @staticmethod
+    def question_key(question: str, dataset_version: str) -> str:
+        return f"{dataset_version}|{normalize_question(question)}"
+
+    @staticmethod
+    def intent_key(question: str, dataset_version: str, calls: List[Dict]) -> str:
+        """Chave da intenção resolvida: forma da pergunta + primeira rodada de ferramentas"""
+        return f"{dataset_version}|{question_shape(question)}|{canonical_plan([calls])}"
+
+    def by_question(self, question_key: str) -> Optional[str]:
+        """Resposta para uma pergunta já vista (sem chamar o modelo)"""
+        intent_key = self._get("question", question_key)
+        answer = self._get("answer", intent_key) if intent_key is not None else None
+        self.counters["question_hits" if answer is not None else "question_misses"] += 1
+        return answer
+
+    def by_intent(self, question_key: str, intent_key: str) -> Optional[str]:
+        """
+        Resposta para a mesma intenção com outra redação (após a primeira
+        rodada); num acerto a pergunta passa a apontar para ela (em memória)
+        """
+        answer = self._get("answer", intent_key)
+        if answer is None:
+            self.counters["intent_misses"] += 1
+            return None
+        self.counters["intent_hits"] += 1
+        self.memory.set(("question", question_key), intent_key)
+        return answer
+
+    async def store(self, question_key: str, intent_key: str, answer: str) -> None:
+        entries = {("answer", intent_key): answer, ("question", question_key): intent_key}
+        for key, value in entries.items():
+            self.memory.set(key, value)
+        self.counters["stores"] += 1
+        if self._db is not None:
+            await asyncio.to_thread(
+                self._persist, [(f"{namespace}|{key}", value) for (namespace, key), value in entries.items()]
+            )
+
+    def stats(self) -> Dict:
+        hits = self.counters["question_hits"] + self.counters["intent_hits"]
+        lookups = self.counters["question_hits"] + self.counters["question_misses"]
+        return {
+            **self.counters,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_size": len(self.memory),
+            "max_size": self.memory.max_size,
+            "ttl": self.ttl,
+            "sqlite": self.sqlite_path or None
+        }
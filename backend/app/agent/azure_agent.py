@@ -2,33 +2,157 @@
 Azure AI Agent Implementation
 Integração real com Azure OpenAI
 """
-from typing import Dict, Optional
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
 import logging
 import json
-from openai import AzureOpenAI
+import time
 
+import httpx
+from openai import AsyncAzureOpenAI
+from openai.types import CompletionUsage
+
+from app.agent.answer_cache import AnswerCache
+from app.agent.metrics import AgentMetrics
 from app.config import settings
+from app.models.requests import MAX_RANKING_LIMIT
+from app.services.anomalies import DEFAULT_THRESHOLD
+from app.services.direct_service import load_store
 
 logger = logging.getLogger(__name__)
 
 
+def _chunk_usage(chunk) -> Optional[CompletionUsage]:
+    """
+    Uso de tokens do chunk final do stream (stream_options.include_usage);
+    o SDK mantém o campo como dict, convertido aqui para CompletionUsage
+    """
+    usage = getattr(chunk, "usage", None)
+    if isinstance(usage, dict):
+        return CompletionUsage(**usage)
+    return usage
+
+
+class QueryBudget:
+    """Orçamento por pergunta: rodadas de ferramentas, tokens e tempo total"""
+    
+    def __init__(
+        self,
+        max_rounds: Optional[int] = None,
+        max_tokens: Optional[int] = None,
+        max_seconds: Optional[float] = None
+    ):
+        self.max_rounds = settings.AGENT_MAX_ROUNDS if max_rounds is None else max_rounds
+        self.max_tokens = settings.AGENT_MAX_TOKENS if max_tokens is None else max_tokens
+        self.max_seconds = settings.AGENT_MAX_SECONDS if max_seconds is None else max_seconds
+        self.started = time.perf_counter()
+        self.tokens = 0
+    
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+    
+    def add_tokens(self, tokens: int) -> None:
+        self.tokens += tokens or 0
+    
+    def exhausted(self, rounds_done: int) -> Optional[str]:
+        """Motivo do esgotamento ("rounds", "tokens" ou "time"), ou None"""
+        if rounds_done >= self.max_rounds:
+            return "rounds"
+        if self.tokens >= self.max_tokens:
+            return "tokens"
+        if self.elapsed >= self.max_seconds:
+            return "time"
+        return None
+    
+    def completion_timeout(self, timeout: httpx.Timeout) -> httpx.Timeout:
+        """Timeout da próxima completion, limitado ao tempo restante (mínimo de 5s para a resposta final)"""
+        remaining = max(self.max_seconds - self.elapsed, 5.0)
+        return httpx.Timeout(min(timeout.read, remaining), connect=timeout.connect)
+
+
 class AzureAgent:
     """
     Agente que usa Azure OpenAI para processar queries
     """
     
     def __init__(self):
-        """Inicializa cliente Azure OpenAI"""
+        """Inicializa cliente Azure OpenAI (assíncrono, com pool de conexões)"""
         logger.info("Inicializando Azure Agent...")
         
-        self.client = AzureOpenAI(
+        self.timeout = httpx.Timeout(
+            settings.AZURE_OPENAI_TIMEOUT,
+            connect=settings.AZURE_OPENAI_CONNECT_TIMEOUT
+        )
+        # Um único pool HTTP compartilhado por todas as conversas do worker
+        self.http_client = httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=settings.AZURE_OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.AZURE_OPENAI_MAX_CONNECTIONS
+            )
+        )
+        self.client = AsyncAzureOpenAI(
             api_key=settings.AZURE_OPENAI_API_KEY,
             api_version=settings.AZURE_OPENAI_API_VERSION,
-            azure_endpoint=settings.AZURE_OPENAI_ENDPOINT
+            azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
+            max_retries=settings.AZURE_OPENAI_MAX_RETRIES,
+            http_client=self.http_client
         )
+        # Limita completions simultâneas (protege a cota do deployment)
+        self._completion_slots = asyncio.Semaphore(settings.AZURE_OPENAI_MAX_CONCURRENCY)
         
         self.deployment = settings.AZURE_OPENAI_DEPLOYMENT_NAME
-        logger.info(f"Azure Agent inicializado: {self.deployment}")
+        
+        self.store = load_store()
+        # Schemas das ferramentas gerados uma vez, com os anos do dataset
+        self.tools = self._build_tools()
+        
+        self.answer_cache: Optional[AnswerCache] = None
+        if settings.AGENT_CACHE_ENABLED:
+            self.answer_cache = AnswerCache(
+                max_size=settings.AGENT_CACHE_MAX_SIZE,
+                ttl=settings.AGENT_CACHE_TTL,
+                sqlite_path=settings.AGENT_CACHE_SQLITE_PATH
+            )
+        self.metrics = AgentMetrics()
+        logger.info(
+            f"Azure Agent inicializado: {self.deployment} "
+            f"(concorrência={settings.AZURE_OPENAI_MAX_CONCURRENCY}, timeout={settings.AZURE_OPENAI_TIMEOUT}s)"
+        )
+    
+    @property
+    def dataset_version(self) -> str:
+        return self.store.dataset_version
+    
+    async def aclose(self) -> None:
+        """Fecha o pool de conexões HTTP"""
+        await self.client.close()
+    
+    async def _complete(self, **kwargs):
+        """Chamada de completion sem bloquear o event loop, limitada pelo semáforo"""
+        kwargs.setdefault("timeout", self.timeout)
+        async with self._completion_slots:
+            return await self.client.chat.completions.create(model=self.deployment, **kwargs)
+    
+    async def _stream_completion(self, **kwargs) -> AsyncIterator:
+        """
+        Completion em streaming; o slot do semáforo fica ocupado até o fim do stream
+        
+        include_usage faz a API enviar um último chunk (sem choices) com o uso
+        de tokens da rodada. O SDK fixado ainda não tem o parâmetro, por isso
+        ele vai em extra_body.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        async with self._completion_slots:
+            stream = await self.client.chat.completions.create(
+                model=self.deployment,
+                stream=True,
+                extra_body={"stream_options": {"include_usage": True}},
+                **kwargs
+            )
+            async for chunk in stream:
+                yield chunk
     
     def _build_system_prompt(self) -> str:
         """Constrói prompt do sistema"""
@@ -44,21 +168,53 @@ IMPORTANTE:
 - Formate respostas de forma clara
 
 BIOMAS BRASILEIROS:
-1. Amazônia
-2. Cerrado
-3. Mata Atlântica
-4. Caatinga
-5. Pampa
-6. Pantanal
+{biomes}
 
 AÇÕES DISPONÍVEIS:
 1. get_state_deforestation: Consultar dados de um estado
 2. compare_deforestation: Comparar períodos temporais
 3. get_states_ranking: Ranking de estados
-"""
+""".format(biomes="\n".join(f"{position}. {biome}" for position, biome in enumerate(self.store.biomes, 1)))
     
     def _build_tools(self) -> list:
-        """Define as ferramentas (tools) disponíveis"""
+        """
+        Define as ferramentas (tools) disponíveis com o domínio do store: faixa
+        de anos, biomas e limite do ranking (o nível municipal só com hierarquia)
+        """
+        first, last = int(self.store.years[0]), int(self.store.years[-1])
+        hierarchy = self.store.hierarchy
+        rows = len(self.store.states) if hierarchy is None else max(len(self.store.states), len(hierarchy.names))
+        ranking_properties = {
+            "year": {
+                "type": "integer",
+                "description": "Ano da consulta",
+                "minimum": first,
+                "maximum": last
+            },
+            "order": {
+                "type": "string",
+                "enum": ["desc", "asc"],
+                "description": "Ordem: desc (maior para menor) ou asc (menor para maior)"
+            },
+            "limit": {
+                "type": "integer",
+                "description": "Número de posições no ranking",
+                "minimum": 1,
+                "maximum": min(rows, MAX_RANKING_LIMIT),
+                "default": 10
+            },
+            "biome": {
+                "type": "string",
+                "description": "Filtrar por bioma (opcional)",
+                "enum": list(self.store.biomes)
+            }
+        }
+        if hierarchy is not None:
+            ranking_properties["level"] = {
+                "type": "string",
+                "enum": ["state", "municipality"],
+                "description": "Nível do ranking: state (estados, padrão) ou municipality (municípios)"
+            }
         return [
             {
                 "type": "function",
@@ -74,9 +230,9 @@ AÇÕES DISPONÍVEIS:
                             },
                             "year": {
                                 "type": "integer",
-                                "description": "Ano da consulta (2020-2024). Se não especificado, usa 2024",
-                                "minimum": 2020,
-                                "maximum": 2024
+                                "description": f"Ano da consulta ({first}-{last}). Se não especificado, usa {last}",
+                                "minimum": first,
+                                "maximum": last
                             }
                         },
                         "required": ["state"]
@@ -98,14 +254,14 @@ AÇÕES DISPONÍVEIS:
                             "year_start": {
                                 "type": "integer",
                                 "description": "Ano inicial",
-                                "minimum": 2020,
-                                "maximum": 2024
+                                "minimum": first,
+                                "maximum": last
                             },
                             "year_end": {
                                 "type": "integer",
                                 "description": "Ano final",
-                                "minimum": 2020,
-                                "maximum": 2024
+                                "minimum": first,
+                                "maximum": last
                             }
                         },
                         "required": ["state_or_biome", "year_start", "year_end"]
@@ -116,34 +272,10 @@ AÇÕES DISPONÍVEIS:
                 "type": "function",
                 "function": {
                     "name": "get_states_ranking",
-                    "description": "Retorna ranking de estados por degradação ambiental",
+                    "description": "Retorna ranking de estados (ou municípios) por degradação ambiental",
                     "parameters": {
                         "type": "object",
-                        "properties": {
-                            "year": {
-                                "type": "integer",
-                                "description": "Ano da consulta",
-                                "minimum": 2020,
-                                "maximum": 2024
-                            },
-                            "order": {
-                                "type": "string",
-                                "enum": ["desc", "asc"],
-                                "description": "Ordem: desc (maior para menor) ou asc (menor para maior)"
-                            },
-                            "limit": {
-                                "type": "integer",
-                                "description": "Número de estados no ranking",
-                                "minimum": 1,
-                                "maximum": 27,
-                                "default": 10
-                            },
-                            "biome": {
-                                "type": "string",
-                                "description": "Filtrar por bioma (opcional)",
-                                "enum": ["Amazônia", "Cerrado", "Mata Atlântica", "Caatinga", "Pampa", "Pantanal"]
-                            }
-                        },
+                        "properties": ranking_properties,
                         "required": ["year"]
                     }
                 }
@@ -151,6 +283,14 @@ AÇÕES DISPONÍVEIS:
         ]
     
     async def _execute_tool(self, tool_name: str, arguments: dict) -> dict:
+        """
+        Executa uma ferramenta em uma thread do pool padrão: as funções de
+        dados são síncronas, e assim as tool calls de uma rodada rodam de fato
+        em paralelo sem bloquear o event loop
+        """
+        return await asyncio.to_thread(self._call_tool, tool_name, arguments)
+    
+    def _call_tool(self, tool_name: str, arguments: dict) -> dict:
         """Executa uma ferramenta e retorna resultado"""
         from app.services import mock_data_brazil as mock_data
         
@@ -159,21 +299,22 @@ AÇÕES DISPONÍVEIS:
         try:
             if tool_name == "get_state_deforestation":
                 state = arguments.get("state")
-                year = arguments.get("year", 2024)
-                result = mock_data.get_state_data(state, year)
+                year = arguments.get("year", int(self.store.years[-1]))
+                result = mock_data.get_state_data(state, year, store=self.store)
                 
             elif tool_name == "compare_deforestation":
                 entity = arguments.get("state_or_biome")
                 year_start = arguments.get("year_start")
                 year_end = arguments.get("year_end")
-                result = mock_data.get_comparison_data(entity, year_start, year_end)
+                result = mock_data.get_comparison_data(entity, year_start, year_end, store=self.store)
                 
             elif tool_name == "get_states_ranking":
                 year = arguments.get("year")
                 order = arguments.get("order", "desc")
                 limit = arguments.get("limit", 10)
                 biome = arguments.get("biome")
-                result = mock_data.get_ranking_data(year, order, limit, biome)
+                level = arguments.get("level", "state")
+                result = mock_data.get_ranking_data(year, order, limit, biome, level, store=self.store)
             
             else:
                 raise ValueError(f"Tool desconhecida: {tool_name}")
@@ -185,112 +326,366 @@ AÇÕES DISPONÍVEIS:
             logger.error(f"Erro ao executar tool {tool_name}: {e}")
             return {"error": str(e)}
     
-    async def process_query(self, user_message: str) -> str:
+    def _initial_messages(self, user_message: str) -> List[Dict]:
+        return [
+            {"role": "system", "content": self._build_system_prompt()},
+            {"role": "user", "content": user_message}
+        ]
+    
+    def _round_options(self, budget: "QueryBudget", final: bool) -> Dict:
+        """Parâmetros da rodada: com ferramentas, ou final (só resposta em texto)"""
+        options = {
+            "temperature": 0.7,
+            "timeout": budget.completion_timeout(self.timeout),
+            "max_tokens": 1500 if final else 1000
+        }
+        if not final:
+            options.update(tools=self.tools, tool_choice="auto")
+        return options
+    
+    async def _run_tools(self, messages: List[Dict], calls: List[Dict], round_info: Dict) -> List[Dict]:
+        """
+        Executa as tool calls de uma rodada em paralelo e anexa as mensagens
+        (assistant + uma por ferramenta, na ordem original) ao histórico
+        
+        Registra em round_info as ferramentas, o tempo total e os bytes de
+        payload enviados ao modelo; tempo e bytes por ferramenta vão para as métricas.
+        """
+        messages.append({
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [
+                {
+                    "id": call["id"],
+                    "type": "function",
+                    "function": {"name": call["name"], "arguments": call["arguments"]}
+                }
+                for call in calls
+            ]
+        })
+        
+        async def run(call: Dict) -> Tuple[Dict, float]:
+            started = time.perf_counter()
+            arguments = self._parse_arguments(call["arguments"])
+            if arguments is None:
+                result = {"error": f"Argumentos inválidos para {call['name']}"}
+            else:
+                result = await self._execute_tool(call["name"], arguments)
+            return result, (time.perf_counter() - started) * 1000
+        
+        tools_started = time.perf_counter()
+        timed = await asyncio.gather(*(run(call) for call in calls))
+        round_info["tools_ms"] = round((time.perf_counter() - tools_started) * 1000, 1)
+        round_info["tool_calls"] = [call["name"] for call in calls]
+        
+        for call, (result, ms) in zip(calls, timed):
+            message = self._tool_message(call["id"], call["name"], result)
+            payload_bytes = len(message["content"].encode("utf-8"))
+            round_info["payload_bytes"] += payload_bytes
+            self.metrics.record_tool(call["name"], ms, payload_bytes, ok="error" not in result)
+            messages.append(message)
+        return [result for result, _ in timed]
+    
+    async def run_query(self, user_message: str) -> Dict:
         """
         Processa uma query do usuário usando Azure OpenAI
         
-        Args:
-            user_message: Pergunta do usuário
-            
+        Rodadas de ferramentas se repetem enquanto o modelo pedir tool calls e
+        houver orçamento (rodadas, tokens e tempo); esgotado o orçamento, a
+        rodada seguinte é forçada a responder sem ferramentas.
+        
         Returns:
-            Resposta formatada
+            {"answer", "rounds" (tempos por rodada), "tokens", "elapsed_ms", "stopped_by"}
         """
         logger.info(f"Processando query: {user_message}")
         
-        messages = [
-            {"role": "system", "content": self._build_system_prompt()},
-            {"role": "user", "content": user_message}
-        ]
+        budget = QueryBudget()
+        cache = self.answer_cache
+        question_key = cache.question_key(user_message, self.dataset_version) if cache else None
         
-        tools = self._build_tools()
+        cached = cache.by_question(question_key) if cache else None
+        if cached is not None:
+            logger.info("Resposta do cache (pergunta já vista, sem chamar o modelo)")
+            return self._cached_result(cached, [], budget, "question")
         
-        try:
-            response = self.client.chat.completions.create(
-                model=self.deployment,
-                messages=messages,
-                tools=tools,
-                tool_choice="auto",
-                temperature=0.7,
-                max_tokens=1000
-            )
+        messages = self._initial_messages(user_message)
+        rounds: List[Dict] = []
+        answer, stopped_by = None, None
+        intent_key: Optional[str] = None
+        
+        while answer is None:
+            stopped_by = stopped_by or budget.exhausted(len(rounds))
+            final = stopped_by is not None
+            
+            round_started = time.perf_counter()
+            response = await self._complete(messages=messages, **self._round_options(budget, final))
+            completion_ms = (time.perf_counter() - round_started) * 1000
             
-            response_message = response.choices[0].message
+            usage = response.usage
+            round_info = {
+                "round": len(rounds) + 1,
+                "completion_ms": round(completion_ms, 1),
+                "prompt_tokens": usage.prompt_tokens if usage else 0,
+                "completion_tokens": usage.completion_tokens if usage else 0,
+                "tool_calls": [],
+                "tools_ms": 0.0,
+                "payload_bytes": 0
+            }
+            budget.add_tokens(usage.total_tokens if usage else 0)
+            rounds.append(round_info)
+            
+            message = response.choices[0].message
+            if final or not message.tool_calls:
+                answer = message.content or ""
+                break
             
-            if response_message.tool_calls:
-                messages.append(response_message)
+            calls = [
+                {"id": call.id, "name": call.function.name, "arguments": call.function.arguments}
+                for call in message.tool_calls
+            ]
+            if intent_key is None and cache:
+                intent_key = cache.intent_key(user_message, self.dataset_version, calls)
+                cached = cache.by_intent(question_key, intent_key)
+                if cached is not None:
+                    logger.info("Resposta do cache (mesma intenção, sem ferramentas nem completion final)")
+                    return self._cached_result(cached, rounds, budget, "intent")
+            await self._run_tools(messages, calls, round_info)
+        
+        await self._remember(question_key, intent_key, answer, stopped_by)
+        result = {
+            "answer": answer,
+            "rounds": rounds,
+            "tokens": budget.tokens,
+            "elapsed_ms": round(budget.elapsed * 1000, 1),
+            "stopped_by": stopped_by,
+            "cache": None
+        }
+        self.metrics.record_query(rounds, result["elapsed_ms"], stopped_by)
+        return result
+    
+    def _cached_result(self, answer: str, rounds: List[Dict], budget: "QueryBudget", source: str) -> Dict:
+        self.metrics.record_query(rounds, budget.elapsed * 1000, cache=source)
+        return {
+            "answer": answer,
+            "rounds": rounds,
+            "tokens": budget.tokens,
+            "elapsed_ms": round(budget.elapsed * 1000, 1),
+            "stopped_by": None,
+            "cache": source
+        }
+    
+    async def _remember(
+        self,
+        question_key: Optional[str],
+        intent_key: Optional[str],
+        answer: str,
+        stopped_by: Optional[str]
+    ) -> None:
+        """
+        Guarda respostas completas baseadas em ferramentas (intent_key vem da
+        primeira rodada; não guarda as interrompidas pelo orçamento, e respostas
+        sem ferramentas não dependem dos dados)
+        """
+        if self.answer_cache is not None and intent_key and stopped_by is None and answer:
+            await self.answer_cache.store(question_key, intent_key, answer)
+    
+    async def process_query(self, user_message: str) -> str:
+        """Processa uma query e retorna apenas o texto da resposta"""
+        try:
+            return (await self.run_query(user_message))["answer"]
+        except Exception as e:
+            logger.error(f"Erro ao processar query: {e}")
+            self.metrics.record_error()
+            return f"Desculpe, ocorreu um erro ao processar sua pergunta: {str(e)}"
+    
+    async def stream_query(self, user_message: str) -> AsyncIterator[Dict]:
+        """
+        Processa a query em streaming, emitindo eventos:
+        
+        - tool_call / tool_result: ferramentas executadas (em paralelo) ao fim de cada rodada
+        - token: trecho de texto da resposta, assim que chega do modelo
+        - done: tempos (primeiro token, total e por rodada)
+        - error: falha (encerra o stream)
+        
+        Segue o mesmo orçamento de rodadas e tempo de run_query.
+        """
+        logger.info(f"Processando query (stream): {user_message}")
+        budget = QueryBudget()
+        rounds: List[Dict] = []
+        first_token_ms, stopped_by, cache_source = None, None, None
+        intent_key: Optional[str] = None
+        answer_parts: List[str] = []
+        cache = self.answer_cache
+        
+        try:
+            question_key = cache.question_key(user_message, self.dataset_version) if cache else None
+            cached = cache.by_question(question_key) if cache else None
+            if cached is not None:
+                cache_source = "question"
+            
+            messages = self._initial_messages(user_message)
+            while cached is None:
+                stopped_by = stopped_by or budget.exhausted(len(rounds))
+                final = stopped_by is not None
+                tool_calls: Dict[int, Dict] = {}
+                round_usage = None
                 
-                for tool_call in response_message.tool_calls:
-                    function_name = tool_call.function.name
-                    function_args = json.loads(tool_call.function.arguments)
+                round_started = time.perf_counter()
+                options = self._round_options(budget, final)
+                async for chunk in self._stream_completion(messages=messages, **options):
+                    usage = _chunk_usage(chunk)
+                    if usage:
+                        round_usage = usage
+                        budget.add_tokens(usage.total_tokens)
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta
                     
-                    function_response = await self._execute_tool(
-                        function_name,
-                        function_args
-                    )
+                    if delta.content:
+                        if first_token_ms is None:
+                            first_token_ms = budget.elapsed * 1000
+                        answer_parts.append(delta.content)
+                        yield {"event": "token", "data": {"content": delta.content}}
                     
-                    messages.append({
-                        "tool_call_id": tool_call.id,
-                        "role": "tool",
-                        "name": function_name,
-                        "content": json.dumps(function_response, ensure_ascii=False)
-                    })
+                    for call in delta.tool_calls or []:
+                        entry = tool_calls.setdefault(call.index, {"id": "", "name": "", "arguments": ""})
+                        entry["id"] = call.id or entry["id"]
+                        if call.function is not None:
+                            entry["name"] += call.function.name or ""
+                            entry["arguments"] += call.function.arguments or ""
                 
-                second_response = self.client.chat.completions.create(
-                    model=self.deployment,
-                    messages=messages,
-                    temperature=0.7,
-                    max_tokens=1500
-                )
+                round_info = {
+                    "round": len(rounds) + 1,
+                    "completion_ms": round((time.perf_counter() - round_started) * 1000, 1),
+                    "prompt_tokens": round_usage.prompt_tokens if round_usage else 0,
+                    "completion_tokens": round_usage.completion_tokens if round_usage else 0,
+                    "tool_calls": [],
+                    "tools_ms": 0.0,
+                    "payload_bytes": 0
+                }
+                rounds.append(round_info)
+                if final or not tool_calls:
+                    break
                 
-                final_message = second_response.choices[0].message.content
+                calls = [tool_calls[index] for index in sorted(tool_calls)]
+                if intent_key is None and cache:
+                    intent_key = cache.intent_key(user_message, self.dataset_version, calls)
+                    cached = cache.by_intent(question_key, intent_key)
+                    if cached is not None:
+                        cache_source = "intent"
+                        break
+                for call in calls:
+                    arguments = self._parse_arguments(call["arguments"])
+                    yield {"event": "tool_call", "data": {"name": call["name"], "arguments": arguments}}
                 
-            else:
-                final_message = response_message.content
+                results = await self._run_tools(messages, calls, round_info)
+                
+                for call, result in zip(calls, results):
+                    yield {"event": "tool_result", "data": {"name": call["name"], "ok": "error" not in result}}
             
-            logger.info("Query processada com sucesso")
-            return final_message
+            if cached is not None:
+                first_token_ms = budget.elapsed * 1000
+                yield {"event": "token", "data": {"content": cached}}
+            else:
+                await self._remember(question_key, intent_key, "".join(answer_parts), stopped_by)
             
+            elapsed_ms = budget.elapsed * 1000
+            self.metrics.record_query(rounds, elapsed_ms, stopped_by, cache_source)
+            logger.info(
+                f"Query (stream) processada: {len(rounds)} rodada(s), primeiro token em "
+                f"{first_token_ms} ms, total {elapsed_ms:.0f} ms" + (f" (cache: {cache_source})" if cache_source else "")
+            )
+            yield {
+                "event": "done",
+                "data": {
+                    "first_token_ms": round(first_token_ms, 1) if first_token_ms is not None else None,
+                    "elapsed_ms": round(elapsed_ms, 1),
+                    "rounds": rounds,
+                    "stopped_by": stopped_by,
+                    "cache": cache_source
+                }
+            }
+        
         except Exception as e:
-            logger.error(f"Erro ao processar query: {e}")
-            return f"Desculpe, ocorreu um erro ao processar sua pergunta: {str(e)}"
+            logger.error(f"Erro ao processar query (stream): {e}")
+            self.metrics.record_error()
+            yield {
+                "event": "error",
+                "data": {"detail": f"Desculpe, ocorreu um erro ao processar sua pergunta: {str(e)}"}
+            }
+    
+    @staticmethod
+    def _parse_arguments(raw: str) -> Optional[Dict]:
+        try:
+            return json.loads(raw or "{}")
+        except json.JSONDecodeError:
+            return None
+    
+    @staticmethod
+    def _tool_message(tool_call_id: str, name: str, result: Dict) -> Dict:
+        return {
+            "tool_call_id": tool_call_id,
+            "role": "tool",
+            "name": name,
+            "content": json.dumps(result, ensure_ascii=False)
+        }
     
-    async def get_state_deforestation(self, state: str, year: Optional[int] = None):
+    async def get_state_deforestation(self, state: str, year: Optional[int] = None, level: str = "state"):
         """Wrapper para compatibilidade"""
         from app.services import mock_data_brazil as mock_data
-        return mock_data.get_state_data(state, year or 2024)
+        return mock_data.get_state_data(state, year or int(self.store.years[-1]), level, store=self.store)
     
     async def compare_deforestation(self, state_or_biome: str, year_start: int, year_end: int):
         """Wrapper para compatibilidade"""
         from app.services import mock_data_brazil as mock_data
-        return mock_data.get_comparison_data(state_or_biome, year_start, year_end)
+        return mock_data.get_comparison_data(state_or_biome, year_start, year_end, store=self.store)
     
-    async def get_states_ranking(self, year: int, order: str = "desc", limit: int = 10, biome: Optional[str] = None):
+    async def get_states_ranking(self, year: int, order: str = "desc", limit: int = 10, biome: Optional[str] = None, level: str = "state"):
         """Wrapper para compatibilidade"""
         from app.services import mock_data_brazil as mock_data
-        return mock_data.get_ranking_data(year, order, limit, biome)
+        return mock_data.get_ranking_data(year, order, limit, biome, level, store=self.store)
     
     async def get_biome_comparison(self, year: int):
         """Wrapper para compatibilidade"""
         from app.services import mock_data_brazil as mock_data
-        return mock_data.get_biome_comparison(year)
+        return mock_data.get_biome_comparison(year, store=self.store)
+    
+    async def get_overview(self, year: Optional[int] = None, biome: Optional[str] = None, limit: int = 10):
+        """Wrapper para compatibilidade"""
+        from app.services import mock_data_brazil as mock_data
+        return mock_data.get_overview_data(year, biome, limit, store=self.store)
+    
+    async def get_forecast(self, entity: str, horizon: int = 3):
+        """Wrapper para compatibilidade"""
+        from app.services import mock_data_brazil as mock_data
+        return mock_data.get_forecast_data(entity, horizon, store=self.store)
+    
+    async def get_forecast_table(self, horizon: int = 3, method: str = "linear", biome: Optional[str] = None):
+        """Wrapper para compatibilidade"""
+        from app.services import mock_data_brazil as mock_data
+        return mock_data.get_forecast_table(horizon, method, biome, store=self.store)
+    
+    async def get_anomalies(self, year: Optional[int] = None, biome: Optional[str] = None, threshold: float = DEFAULT_THRESHOLD, limit: int = 50):
+        """Wrapper para compatibilidade"""
+        from app.services import mock_data_brazil as mock_data
+        return mock_data.get_anomalies_data(year, biome, threshold, limit, store=self.store)
     
     async def get_available_states(self, biome: Optional[str] = None):
         """Wrapper para compatibilidade"""
         from app.services import mock_data_brazil as mock_data
-        return mock_data.get_available_states(biome)
+        return mock_data.get_available_states(biome, store=self.store)
     
     async def get_available_years(self):
         """Wrapper para compatibilidade"""
         from app.services import mock_data_brazil as mock_data
-        return mock_data.get_available_years()
+        return mock_data.get_available_years(store=self.store)
     
     async def get_available_biomes(self):
         """Wrapper para compatibilidade"""
         from app.services import mock_data_brazil as mock_data
-        biomes = mock_data.get_available_biomes()
-        from datetime import datetime
+        biomes = mock_data.get_available_biomes(store=self.store)
         return {
             "biomes": biomes,
             "total": len(biomes),
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": self.store.timestamp
         }
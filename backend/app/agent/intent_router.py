@@ -0,0 +1,311 @@
+"""
+Intent Router - respostas determinísticas para perguntas estruturadas
+
+Reconhece as formas mais comuns de pergunta (dados de um estado em um ano,
+comparação entre anos, ranking, comparação de biomas) com o EntityResolver e
+a extração de anos, sem chamar o modelo. Perguntas abertas, ambíguas ou com
+confiança abaixo de INTENT_MIN_CONFIDENCE seguem para o Azure Agent.
+
+Exemplos:
+    "Qual o desmatamento no Pará em 2024?"            -> state
+    "Compare MT entre 2020 e 2023"                     -> compare
+    "Desmatamento no Pantanal em 2024"                 -> compare (2023-2024)
+    "Quais os 5 estados que mais desmataram em 2023?"  -> ranking
+    "Compare os biomas em 2024"                        -> biomes
+"""
+from typing import Dict, List, NamedTuple, Optional
+import logging
+import re
+import time
+
+from app.services.degradation_store import DegradationStore
+from app.services.entity_resolver import Entity, fold
+from app.services.mock_data_brazil import RESOLVER
+
+logger = logging.getLogger(__name__)
+
+# Método do DeforestationService que atende cada intenção
+INTENT_METHODS = {
+    "state": "get_state_deforestation",
+    "compare": "compare_deforestation",
+    "ranking": "get_states_ranking",
+    "biomes": "get_biome_comparison",
+}
+
+# Perguntas que pedem explicação ou opinião ficam com o agente
+OPEN_ENDED = {"por que", "porque", "causa", "causas", "motivo", "motivos", "explique", "explica", "previsao", "devo", "opiniao"}
+
+DOMAIN_PREFIXES = ("desmat", "degrad", "area", "km", "perda", "ranking", "top", "bioma", "compar", "evolu", "tendenc", "dados")
+COMPARE_PREFIXES = ("compar", "evolu", "tendenc", "variac", "entre", "desde")
+RANKING_WORDS = {"ranking", "top", "maiores", "menores", "lideram", "lidera"}
+LEAST_WORDS = {"menos", "menor", "menores"}
+PREPOSITIONS = {"em", "no", "na", "do", "da", "de", "o", "a"}
+
+# Palavras comuns que coincidem com siglas ou nomes (ignoradas fora de contexto).
+# "para" só vale como estado com acento ("Pará") ou pela sigla "PA"
+STOPWORDS = {
+    "se", "o", "a", "e", "em", "no", "na", "de", "do", "da", "os", "as", "qual", "quais", "quanto",
+    "para", "pra", "por"
+}
+
+MAX_NGRAM = 4
+FUZZY_MIN_LENGTH = 5
+FUZZY_PENALTY = 0.85
+
+LIMIT_PATTERN = re.compile(r"\b(?:top\s+(\d{1,4})|(\d{1,4})\s+(?:estados|maiores|menores|primeiros))\b")
+
+
+class Intent(NamedTuple):
+    """Intenção reconhecida: ação, parâmetros do service e confiança (0-1)"""
+    action: str
+    params: Dict
+    confidence: float
+
+
+class _Match(NamedTuple):
+    entity: Entity
+    fuzzy: bool
+
+
+def _tokens(question: str) -> List[str]:
+    return re.sub(r"[^\w\s]", " ", question).split()
+
+
+def _entities(raw: List[str]) -> List[_Match]:
+    """Estados, biomas e Brasil citados (n-gramas mais longos primeiro)"""
+    words = [fold(token) for token in raw]
+    found: List[_Match] = []
+    i = 0
+    while i < len(words):
+        for size in range(min(MAX_NGRAM, len(words) - i), 0, -1):
+            phrase = " ".join(words[i:i + size])
+            if size == 1 and not (raw[i].isupper() and len(raw[i]) == 2):
+                # Sem acento a palavra é a preposição, não o nome ("para" x "Pará")
+                if phrase in STOPWORDS and raw[i].lower() == phrase:
+                    continue
+                # Siglas em minúsculas só contam após preposição ("no pa", "em ro")
+                if len(phrase) == 2 and not (i and words[i - 1] in PREPOSITIONS):
+                    continue
+            matches = RESOLVER.lookup(phrase, fuzzy=False)
+            fuzzy = False
+            if not matches and size == 1 and len(phrase) >= FUZZY_MIN_LENGTH and not phrase.startswith(DOMAIN_PREFIXES):
+                matches, fuzzy = RESOLVER.lookup(phrase), True
+            if len(matches) == 1:
+                if all(m.entity != matches[0] for m in found):
+                    found.append(_Match(matches[0], fuzzy))
+                i += size
+                break
+        else:
+            i += 1
+    return found
+
+
+def _limit(text: str, default: int = 10) -> int:
+    match = LIMIT_PATTERN.search(text)
+    if not match:
+        return default
+    return max(1, int(match.group(1) or match.group(2)))
+
+
+def parse_intent(question: str, store: DegradationStore) -> Optional[Intent]:
+    """Intenção da pergunta, ou None quando não há forma estruturada reconhecível"""
+    raw = _tokens(question)
+    words = [fold(token) for token in raw]
+    text = " ".join(words)
+    if any(word in OPEN_ENDED for word in words) or "por que" in text:
+        return None
+
+    years = sorted({int(w) for w in words if len(w) == 4 and w.isdigit()})
+    if any(year not in store.year_index for year in years):
+        return None
+    latest, first = int(store.years[-1]), int(store.years[0])
+
+    found = _entities(raw)
+    states = [m for m in found if m.entity.kind == "state"]
+    biomes = [m for m in found if m.entity.kind == "biome"]
+    confidence = FUZZY_PENALTY if any(m.fuzzy for m in found) else 1.0
+    if not any(w.startswith(DOMAIN_PREFIXES) for w in words):
+        confidence *= 0.7
+
+    comparing = any(w.startswith(COMPARE_PREFIXES) for w in words)
+    ranking = bool(RANKING_WORDS.intersection(words)) or (
+        {"qual", "quais"}.intersection(words)
+        and {"estado", "estados"}.intersection(words)
+        and {"mais", "menos"}.intersection(words)
+    )
+
+    if "biomas" in words or ("bioma" in words and {"todos", "cada"}.intersection(words)):
+        if states or biomes or len(years) > 1:
+            return None
+        return Intent("biomes", {"year": years[0] if years else latest}, confidence)
+
+    if ranking and not states and len(biomes) <= 1 and len(years) <= 1:
+        return Intent("ranking", {
+            "year": years[0] if years else latest,
+            "order": "asc" if LEAST_WORDS.intersection(words) else "desc",
+            "limit": _limit(text),
+            "biome": biomes[0].entity.name if biomes else None
+        }, confidence * (1.0 if years else 0.95))
+
+    # Ranking com estado, vários biomas ou vários anos fica com o agente
+    if ranking or len(found) != 1:
+        return None
+    entity = found[0].entity
+
+    if len(years) == 2 or (comparing and len(years) <= 1):
+        if len(years) == 2:
+            year_start, year_end = years
+        elif years and years[0] < latest:
+            year_start, year_end = years[0], latest
+        elif not years:
+            year_start, year_end = first, latest
+        else:
+            return None
+        return Intent("compare", {
+            "state_or_biome": entity.name,
+            "year_start": year_start,
+            "year_end": year_end
+        }, confidence * (1.0 if len(years) == 2 else 0.9))
+
+    if entity.kind == "state" and len(years) <= 1:
+        return Intent("state", {
+            "state": entity.code,
+            "year": years[0] if years else latest
+        }, confidence * (1.0 if years else 0.9))
+
+    if len(years) > 1:
+        return None
+    # Bioma ou Brasil em um ano: comparação com o ano anterior do dataset
+    col = store.year_index[years[0]] if years else len(store.years) - 1
+    if col == 0:
+        return None
+    return Intent("compare", {
+        "state_or_biome": entity.name,
+        "year_start": int(store.years[col - 1]),
+        "year_end": int(store.years[col])
+    }, confidence * (1.0 if years else 0.9))
+
+
+def _br(value: float) -> str:
+    """Número no formato brasileiro (1.234,5)"""
+    return f"{value:,.1f}".replace(",", "_").replace(".", ",").replace("_", ".")
+
+
+def _signed(value: float, suffix: str) -> str:
+    return f"{'+' if value > 0 else ''}{_br(value)}{suffix}"
+
+
+TREND_LABELS = {"increasing": "📈 AUMENTO", "decreasing": "📉 REDUÇÃO", "stable": "➡️ ESTÁVEL"}
+
+
+def render_answer(action: str, data: Dict) -> str:
+    """Resposta em texto para o resultado do service"""
+    if action == "state":
+        previous = data["comparison_previous_year"]
+        lines = [
+            f"📊 Desmatamento em {data['state']} ({data['year']})",
+            "",
+            f"🌳 Área desmatada: {_br(data['area_km2'])} km²",
+            f"📈 Percentual do total: {_br(data['percentage_of_total'])}%",
+            f"🏞️ Bioma: {data['biome']}",
+        ]
+        if previous.get("area_km2") is not None:
+            lines += [
+                "",
+                f"Comparação com {previous['year']}: "
+                f"{_signed(previous['change_percentage'], '%')} ({_signed(previous['change_km2'], ' km²')})"
+            ]
+        return "\n".join(lines)
+
+    if action == "compare":
+        return "\n".join([
+            f"📊 Comparação: {data['state']} ({data['year_start']}-{data['year_end']})",
+            "",
+            f"Tendência: {TREND_LABELS.get(data['trend'], data['trend'])}",
+            f"Mudança total: {_signed(data['total_change_km2'], ' km²')}",
+            f"Variação percentual: {_signed(data['percentage_change'], '%')}",
+            "",
+            "Dados por ano:",
+            *(f"{item['year']}: {_br(item['area_km2'])} km²" for item in data["data"]),
+        ])
+
+    if action == "ranking":
+        title = f"🏆 Ranking de Desmatamento ({data['year']})"
+        if data.get("biome_filter"):
+            title += f" - {data['biome_filter']}"
+        heading = "Estados que MENOS desmataram:" if data["order"] == "asc" else "Estados que MAIS desmataram:"
+        return "\n".join([
+            title,
+            "",
+            f"📊 Total Brasil: {_br(data['total_brazil_km2'])} km²",
+            "",
+            heading,
+            *(
+                f"{item['position']}º {item['state']} ({item['state_code']}): "
+                f"{_br(item['area_km2'])} km² ({_br(item['percentage_of_total'])}%)"
+                for item in data["ranking"]
+            ),
+        ])
+
+    return "\n".join([
+        f"🌍 Comparação de Biomas ({data['year']})",
+        "",
+        f"📊 Total Brasil: {_br(data['total_brazil_km2'])} km²",
+        "",
+        *(
+            f"{position}º {item['biome']}: {_br(item['area_km2'])} km² "
+            f"({_br(item['percentage_of_total'])}%, {item['num_states']} estado(s))"
+            for position, item in enumerate(data["biomes"], 1)
+        ),
+    ])
+
+
+class IntentRouter:
+    """Roteia perguntas estruturadas direto para o service e conta o uso"""
+
+    def __init__(self, store: DegradationStore, min_confidence: float = 0.8):
+        self.store = store
+        self.min_confidence = min_confidence
+        self.counters: Dict[str, int] = {"routed": 0, "fallback": 0}
+        self.by_action: Dict[str, int] = {action: 0 for action in INTENT_METHODS}
+        self._parse_us_total = 0.0
+        self._parse_us_max = 0.0
+
+    def route(self, question: str) -> Optional[Intent]:
+        """Intenção com confiança suficiente, ou None (segue para o agente)"""
+        started = time.perf_counter()
+        intent = parse_intent(question, self.store)
+        elapsed_us = (time.perf_counter() - started) * 1e6
+        self._parse_us_total += elapsed_us
+        self._parse_us_max = max(self._parse_us_max, elapsed_us)
+
+        if intent is None or intent.confidence < self.min_confidence:
+            self.counters["fallback"] += 1
+            logger.info(f"Intent router: sem intenção confiável ({elapsed_us:.0f} µs)")
+            return None
+
+        self.counters["routed"] += 1
+        self.by_action[intent.action] += 1
+        logger.info(
+            f"Intent router: {intent.action} {intent.params} "
+            f"(confiança {intent.confidence:.2f}, {elapsed_us:.0f} µs)"
+        )
+        return intent
+
+    def fallback(self, intent: Intent) -> None:
+        """Intenção reconhecida mas não atendida (ex.: erro de validação)"""
+        self.counters["routed"] -= 1
+        self.counters["fallback"] += 1
+        self.by_action[intent.action] -= 1
+
+    def stats(self) -> Dict:
+        total = self.counters["routed"] + self.counters["fallback"]
+        return {
+            **self.counters,
+            "total": total,
+            "llm_free_rate": round(self.counters["routed"] / total, 4) if total else 0.0,
+            "by_action": dict(self.by_action),
+            "parse_us_avg": round(self._parse_us_total / total, 1) if total else 0.0,
+            "parse_us_max": round(self._parse_us_max, 1),
+            "min_confidence": self.min_confidence
+        }
@@ -0,0 +1,170 @@
+"""
+Métricas do Azure Agent
+
+Agrega, por worker, tokens e latência de cada rodada de completion, tempo e
+tamanho do payload (JSON enviado ao modelo) de cada ferramenta, e o custo por
+"forma" de pergunta (conjunto de ferramentas usadas), para encontrar perguntas
+caras e regressões.
+"""
+from typing import Dict, List, Optional
+import json
+import logging
+
+from app.services.metrics import (
+    BYTES_BUCKETS,
+    COUNT_BUCKETS,
+    LATENCY_MS_BUCKETS,
+    TOKEN_BUCKETS,
+    Histogram
+)
+
+logger = logging.getLogger(__name__)
+
+NO_TOOLS = "(sem ferramentas)"
+
+
+def query_shape(rounds: List[Dict]) -> str:
+    """Forma da pergunta: ferramentas usadas, sem repetição, em ordem alfabética"""
+    names = sorted({name for info in rounds for name in info.get("tool_calls", [])})
+    return "+".join(names) or NO_TOOLS
+
+
+class _ToolMetrics:
+    def __init__(self):
+        self.ms = Histogram(LATENCY_MS_BUCKETS)
+        self.payload_bytes = Histogram(BYTES_BUCKETS)
+        self.errors = 0
+
+
+class _ShapeMetrics:
+    def __init__(self):
+        self.tokens = Histogram(TOKEN_BUCKETS)
+        self.ms = Histogram(LATENCY_MS_BUCKETS)
+
+
+class AgentMetrics:
+    """Histogramas por rodada, por ferramenta e por forma de pergunta"""
+
+    def __init__(self):
+        self.queries = 0
+        self.errors = 0
+        self.cached: Dict[str, int] = {}
+        self.stopped_by: Dict[str, int] = {}
+
+        self.round_prompt_tokens = Histogram(TOKEN_BUCKETS)
+        self.round_completion_tokens = Histogram(TOKEN_BUCKETS)
+        self.round_total_tokens = Histogram(TOKEN_BUCKETS)
+        self.round_ms = Histogram(LATENCY_MS_BUCKETS)
+        self.round_tools_ms = Histogram(LATENCY_MS_BUCKETS)
+
+        self.query_tokens = Histogram(TOKEN_BUCKETS)
+        self.query_ms = Histogram(LATENCY_MS_BUCKETS)
+        self.query_rounds = Histogram(COUNT_BUCKETS)
+        self.query_payload_bytes = Histogram(BYTES_BUCKETS)
+
+        self.tools: Dict[str, _ToolMetrics] = {}
+        self.shapes: Dict[str, _ShapeMetrics] = {}
+
+    def record_tool(self, name: str, ms: float, payload_bytes: int, ok: bool = True) -> None:
+        tool = self.tools.get(name)
+        if tool is None:
+            tool = self.tools[name] = _ToolMetrics()
+        tool.ms.observe(ms)
+        tool.payload_bytes.observe(payload_bytes)
+        if not ok:
+            tool.errors += 1
+
+    def record_query(
+        self,
+        rounds: List[Dict],
+        elapsed_ms: float,
+        stopped_by: Optional[str] = None,
+        cache: Optional[str] = None
+    ) -> Dict:
+        """Registra uma pergunta concluída e retorna o resumo (também logado)"""
+        self.queries += 1
+        if cache:
+            self.cached[cache] = self.cached.get(cache, 0) + 1
+        if stopped_by:
+            self.stopped_by[stopped_by] = self.stopped_by.get(stopped_by, 0) + 1
+
+        tokens = payload_bytes = 0
+        for info in rounds:
+            prompt, completion = info.get("prompt_tokens", 0), info.get("completion_tokens", 0)
+            self.round_prompt_tokens.observe(prompt)
+            self.round_completion_tokens.observe(completion)
+            self.round_total_tokens.observe(prompt + completion)
+            self.round_ms.observe(info["completion_ms"])
+            if info.get("tool_calls"):
+                self.round_tools_ms.observe(info["tools_ms"])
+            tokens += prompt + completion
+            payload_bytes += info.get("payload_bytes", 0)
+
+        shape_name = query_shape(rounds)
+        self.query_tokens.observe(tokens)
+        self.query_ms.observe(elapsed_ms)
+        self.query_rounds.observe(len(rounds))
+        self.query_payload_bytes.observe(payload_bytes)
+        if not cache:
+            shape = self.shapes.get(shape_name)
+            if shape is None:
+                shape = self.shapes[shape_name] = _ShapeMetrics()
+            shape.tokens.observe(tokens)
+            shape.ms.observe(elapsed_ms)
+
+        summary = {
+            "shape": shape_name,
+            "rounds": len(rounds),
+            "prompt_tokens": sum(info.get("prompt_tokens", 0) for info in rounds),
+            "completion_tokens": sum(info.get("completion_tokens", 0) for info in rounds),
+            "total_tokens": tokens,
+            "elapsed_ms": round(elapsed_ms, 1),
+            "completion_ms": [info["completion_ms"] for info in rounds],
+            "tools_ms": [info["tools_ms"] for info in rounds if info.get("tool_calls")],
+            "payload_bytes": payload_bytes,
+            "stopped_by": stopped_by,
+            "cache": cache
+        }
+        logger.info(f"Métricas da query: {json.dumps(summary, ensure_ascii=False)}")
+        return summary
+
+    def record_error(self) -> None:
+        self.errors += 1
+
+    def snapshot(self) -> Dict:
+        return {
+            "queries": self.queries,
+            "errors": self.errors,
+            "cached": dict(self.cached),
+            "stopped_by": dict(self.stopped_by),
+            "round": {
+                "prompt_tokens": self.round_prompt_tokens.snapshot(),
+                "completion_tokens": self.round_completion_tokens.snapshot(),
+                "total_tokens": self.round_total_tokens.snapshot(),
+                "completion_ms": self.round_ms.snapshot(),
+                "tools_ms": self.round_tools_ms.snapshot()
+            },
+            "query": {
+                "total_tokens": self.query_tokens.snapshot(),
+                "elapsed_ms": self.query_ms.snapshot(),
+                "rounds": self.query_rounds.snapshot(),
+                "payload_bytes": self.query_payload_bytes.snapshot()
+            },
+            "tools": {
+                name: {
+                    "ms": tool.ms.snapshot(),
+                    "payload_bytes": tool.payload_bytes.snapshot(),
+                    "errors": tool.errors
+                }
+                for name, tool in self.tools.items()
+            },
+            # Formas mais caras primeiro (tokens médios por pergunta)
+            "shapes": dict(sorted(
+                (
+                    (name, {"tokens": shape.tokens.snapshot(), "elapsed_ms": shape.ms.snapshot()})
+                    for name, shape in self.shapes.items()
+                ),
+                key=lambda item: item[1]["tokens"]["avg"],
+                reverse=True
+            ))
+        }
@@ -15,8 +15,33 @@ class Settings(BaseSettings):
     AZURE_OPENAI_ENDPOINT: str = ""
     AZURE_OPENAI_API_KEY: str = ""
     AZURE_OPENAI_DEPLOYMENT_NAME: str = "gpt-4"
-    AZURE_OPENAI_API_VERSION: str = "2024-02-15-preview"
+    AZURE_OPENAI_API_VERSION: str = "2024-10-21"
     AZURE_AI_PROJECT_NAME: str = "observa-floresta"
+    AZURE_OPENAI_TIMEOUT: float = 30.0
+    AZURE_OPENAI_CONNECT_TIMEOUT: float = 5.0
+    AZURE_OPENAI_MAX_RETRIES: int = 2
+    AZURE_OPENAI_MAX_CONCURRENCY: int = 16
+    AZURE_OPENAI_MAX_CONNECTIONS: int = 32
+    
+    # Orçamento por pergunta no chat (rodadas de ferramentas, tokens, segundos)
+    AGENT_MAX_ROUNDS: int = 4
+    AGENT_MAX_TOKENS: int = 12000
+    AGENT_MAX_SECONDS: float = 45.0
+    
+    # Cache de respostas do chat (memória + SQLite opcional)
+    AGENT_CACHE_ENABLED: bool = True
+    AGENT_CACHE_MAX_SIZE: int = 512
+    AGENT_CACHE_TTL: int = 3600
+    AGENT_CACHE_SQLITE_PATH: str = ""
+    
+    # Perguntas estruturadas respondidas sem o modelo (intent router)
+    INTENT_ROUTER_ENABLED: bool = True
+    INTENT_MIN_CONFIDENCE: float = 0.8
+    
+    # Dados reais (MOCK_DATA=false)
+    DATA_SOURCE_PATH: str = ""
+    DATA_CHUNK_SIZE: int = 200_000
+    DATA_SNAPSHOT_PATH: str = ""
   
     # Server
     HOST: str = "0.0.0.0"
@@ -26,10 +51,27 @@ class Settings(BaseSettings):
     
     CACHE_TTL: int = 3600
     ENABLE_CACHE: bool = True
+    CACHE_MAX_SIZE: int = 1024
+    HTTP_CACHE_MAX_AGE: int = 60
+    
+    # Serialização rápida: valida uma vez ao montar os dados e responde com orjson
+    FAST_SERIALIZATION: bool = True
     
     LOG_LEVEL: str = "INFO"
     LOG_FORMAT: str = "json"
     
+    # Rate limiting por cliente (token bucket): rotas de dados e de chat
+    RATE_LIMIT_ENABLED: bool = False
+    RATE_LIMIT_PER_MINUTE: int = 60
+    RATE_LIMIT_BURST: int = 0
+    RATE_LIMIT_CHAT_PER_MINUTE: int = 10
+    RATE_LIMIT_CHAT_BURST: int = 0
+    RATE_LIMIT_MAX_CLIENTS: int = 10_000
+    RATE_LIMIT_TRUST_PROXY: bool = False
+    
+    # Métricas HTTP (middleware + /api/metrics no formato Prometheus)
+    METRICS_ENABLED: bool = True
+    
     @property
     def cors_origins_list(self) -> List[str]:
         """Retorna lista de origens permitidas para CORS"""
@@ -8,7 +8,10 @@ from fastapi.responses import JSONResponse
 import logging
 
 from app.config import settings
-from app.routers import deforestation, health
+from app.routers import chat, deforestation, health
+from app.services.deforestation_service import close_deforestation_service, get_deforestation_service
+from app.services.metrics import MetricsMiddleware
+from app.services.rate_limit import LIMITERS, RateLimitMiddleware
 
 logging.basicConfig(
     level=getattr(logging, settings.LOG_LEVEL),
@@ -24,16 +27,25 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
+# Dentro do CORS, para que as respostas 429 também levem os headers de CORS
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware, limiters=LIMITERS, trust_proxy=settings.RATE_LIMIT_TRUST_PROXY)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins_list,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified", "X-Response-Timestamp", "Retry-After"],
 )
 
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 app.include_router(health.router, prefix="/api", tags=["Health"])
 app.include_router(deforestation.router, prefix="/api", tags=["Desmatamento"])
+app.include_router(chat.router, prefix="/api", tags=["Chat"])
 
 
 @app.on_event("startup")
@@ -43,12 +55,16 @@ async def startup_event():
     logger.info(f"Modo: {'Azure Agent' if settings.USE_AZURE_AGENT else 'Direct Logic'}")
     logger.info(f"Mock Data: {settings.MOCK_DATA}")
     logger.info(f"Ambiente: {settings.ENVIRONMENT}")
+    # Carrega os dados na subida: a faixa de anos dos validadores e do
+    # OpenAPI vem do dataset
+    get_deforestation_service()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Evento executado ao desligar a aplicação"""
     logger.info("🌳 Observa Floresta API encerrando...")
+    await close_deforestation_service()
 
 
 @app.get("/")
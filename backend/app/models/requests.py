@@ -2,7 +2,18 @@
 Modelos de Request (Pydantic)
 """
 from pydantic import BaseModel, Field, validator
-from typing import Optional, Literal
+from typing import Any, Dict, List, Optional, Literal
+
+from app.models.years import YEARS
+
+# Limite do ranking: cobre todos os ~5.570 municípios do IBGE
+MAX_RANKING_LIMIT = 6000
+
+# Itens por requisição em /deforestation/batch
+MAX_BATCH_SIZE = 500
+
+# Tamanho máximo de uma pergunta no chat
+MAX_CHAT_MESSAGE_LENGTH = 2000
 
 
 class StateDeforestationRequest(BaseModel):
@@ -14,10 +25,12 @@ class StateDeforestationRequest(BaseModel):
     )
     year: Optional[int] = Field(
         None,
-        description="Ano da consulta (se None, usa ano atual)",
-        ge=2020,
-        le=2024,
-        example=2024
+        description="Ano da consulta (se None, usa o último ano disponível)",
+        json_schema_extra=YEARS.json_schema
+    )
+    level: Literal["state", "municipality"] = Field(
+        "state",
+        description="Nível geográfico (state = estado, municipality = município IBGE)"
     )
     
     @validator('state')
@@ -25,6 +38,10 @@ class StateDeforestationRequest(BaseModel):
         if not v or not v.strip():
             raise ValueError("Estado não pode ser vazio")
         return v.strip()
+    
+    @validator('year')
+    def validate_year(cls, v):
+        return YEARS.check(v)
 
 
 class ComparisonRequest(BaseModel):
@@ -37,18 +54,18 @@ class ComparisonRequest(BaseModel):
     year_start: int = Field(
         ...,
         description="Ano inicial",
-        ge=2020,
-        le=2024,
-        example=2020
+        json_schema_extra=YEARS.json_schema
     )
     year_end: int = Field(
         ...,
         description="Ano final",
-        ge=2020,
-        le=2024,
-        example=2024
+        json_schema_extra=YEARS.json_schema
     )
     
+    @validator('year_start', 'year_end')
+    def validate_year(cls, v):
+        return YEARS.check(v)
+    
     @validator('year_end')
     def validate_years(cls, v, values):
         if 'year_start' in values and v <= values['year_start']:
@@ -67,9 +84,7 @@ class RankingRequest(BaseModel):
     year: int = Field(
         ...,
         description="Ano da consulta",
-        ge=2020,
-        le=2024,
-        example=2024
+        json_schema_extra=YEARS.json_schema
     )
     order: Literal["desc", "asc"] = Field(
         "desc",
@@ -77,15 +92,23 @@ class RankingRequest(BaseModel):
     )
     limit: int = Field(
         10,
-        description="Número de estados no ranking",
+        description="Número de estados (ou municípios) no ranking",
         ge=1,
-        le=30
+        le=MAX_RANKING_LIMIT
     )
     biome: Optional[str] = Field(
         None,
         description="Filtrar por bioma (opcional)",
         example="Amazônia"
     )
+    level: Literal["state", "municipality"] = Field(
+        "state",
+        description="Nível geográfico (state = estado, municipality = município IBGE)"
+    )
+    
+    @validator('year')
+    def validate_year(cls, v):
+        return YEARS.check(v)
 
 
 class BiomeComparisonRequest(BaseModel):
@@ -93,7 +116,49 @@ class BiomeComparisonRequest(BaseModel):
     year: int = Field(
         ...,
         description="Ano da comparação",
-        ge=2020,
-        le=2024,
-        example=2024
-    )
\ No newline at end of file
+        json_schema_extra=YEARS.json_schema
+    )
+    
+    @validator('year')
+    def validate_year(cls, v):
+        return YEARS.check(v)
+
+
+class BatchQuery(BaseModel):
+    """Item de uma consulta em lote"""
+    type: str = Field(
+        ...,
+        description="Tipo da consulta: state, compare, ranking ou biomes (mesmos parâmetros do endpoint individual)",
+        example="state"
+    )
+    params: Dict[str, Any] = Field(
+        default_factory=dict,
+        description="Parâmetros da consulta",
+        example={"state": "PA", "year": 2024}
+    )
+
+
+class BatchRequest(BaseModel):
+    """Request para consultas em lote"""
+    queries: List[BatchQuery] = Field(
+        ...,
+        description="Consultas, respondidas na mesma ordem",
+        min_length=1,
+        max_length=MAX_BATCH_SIZE
+    )
+
+
+class ChatRequest(BaseModel):
+    """Request para o chat com o agente"""
+    message: str = Field(
+        ...,
+        description="Pergunta do usuário",
+        max_length=MAX_CHAT_MESSAGE_LENGTH,
+        example="Qual o desmatamento no Pará em 2024?"
+    )
+    
+    @validator('message')
+    def validate_message(cls, v):
+        if not v or not v.strip():
+            raise ValueError("Mensagem não pode ser vazia")
+        return v.strip()
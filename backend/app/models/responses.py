@@ -2,7 +2,7 @@
 Modelos de Response (Pydantic)
 """
 from pydantic import BaseModel, Field
-from typing import List, Optional, Literal
+from typing import Any, Dict, List, Optional, Literal
 
 
 class ComparisonPreviousYear(BaseModel):
@@ -14,9 +14,11 @@ class ComparisonPreviousYear(BaseModel):
 
 
 class StateDeforestationResponse(BaseModel):
-    """Response de consulta por estado"""
+    """Response de consulta por estado (ou município)"""
     state: str
     state_code: str
+    level: str = "state"
+    uf: Optional[str] = None
     year: int
     area_km2: float
     percentage_of_total: float
@@ -52,6 +54,7 @@ class RankingItem(BaseModel):
     position: int
     state: str
     state_code: str
+    uf: Optional[str] = None
     area_km2: float
     percentage_of_total: float
     biome: str
@@ -62,6 +65,8 @@ class RankingResponse(BaseModel):
     year: int
     total_brazil_km2: float
     order: str
+    level: str = "state"
+    biome_filter: Optional[str] = None
     ranking: List[RankingItem]
     data_source: str
     timestamp: str
@@ -78,6 +83,7 @@ class StatesListResponse(BaseModel):
     """Response de lista de estados"""
     states: List[StateInfo]
     total: int
+    biome_filter: Optional[str] = None
     timestamp: str
 
 
@@ -112,8 +118,143 @@ class BiomeComparisonResponse(BaseModel):
     timestamp: str
 
 
+class OverviewResponse(BaseModel):
+    """Response da visão geral (dashboard/analytics)"""
+    year: int
+    total_brazil_km2: float
+    biome_filter: Optional[str] = None
+    comparison: Optional[ComparisonResponse] = None
+    ranking: RankingResponse
+    biomes: BiomeComparisonResponse
+    data_source: str
+    timestamp: str
+
+
 class BiomesListResponse(BaseModel):
     """NOVA: Response de lista de biomas"""
     biomes: List[str]
     total: int
     timestamp: str
+
+
+class BatchItemResult(BaseModel):
+    """Resultado de um item do lote"""
+    index: int
+    type: str
+    status: Literal["ok", "error"]
+    data: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+class BatchResponse(BaseModel):
+    """Response de consultas em lote"""
+    results: List[BatchItemResult]
+    total: int
+    succeeded: int
+    failed: int
+    data_source: str
+    timestamp: str
+
+
+class ForecastPoint(BaseModel):
+    """Ano previsto com intervalo de previsão"""
+    year: int
+    area_km2: Optional[float]
+    lower_km2: Optional[float]
+    upper_km2: Optional[float]
+
+
+class LinearForecast(BaseModel):
+    """Regressão linear (km²/ano)"""
+    slope_km2_per_year: Optional[float]
+    r2: Optional[float]
+    residual_std_km2: Optional[float]
+    projections: List[ForecastPoint]
+
+
+class GrowthForecast(BaseModel):
+    """Regressão log-linear ou CAGR (taxa % ao ano)"""
+    growth_rate_pct: Optional[float]
+    r2: Optional[float] = None
+    residual_std_log: Optional[float]
+    projections: List[ForecastPoint]
+
+
+class ForecastModels(BaseModel):
+    linear: LinearForecast
+    log_linear: GrowthForecast
+    cagr: GrowthForecast
+
+
+class ForecastResponse(BaseModel):
+    """Response de previsão de um estado, bioma ou Brasil"""
+    state: str
+    state_code: str
+    biome: str
+    base_year: int
+    horizon: int
+    confidence: float
+    observations: int
+    data: List[DataPoint]
+    trend: Literal["increasing", "decreasing", "stable"]
+    models: ForecastModels
+    data_source: str
+    timestamp: str
+
+
+class ForecastTableItem(BaseModel):
+    """Previsão de um estado no ano final do horizonte"""
+    state: str
+    state_code: str
+    biome: str
+    last_area_km2: Optional[float]
+    area_km2: Optional[float]
+    lower_km2: Optional[float]
+    upper_km2: Optional[float]
+    change_percentage: Optional[float]
+    slope_km2_per_year: Optional[float]
+    r2: Optional[float]
+    trend: Literal["increasing", "decreasing", "stable"]
+
+
+class ForecastTableResponse(BaseModel):
+    """Response da previsão de todos os estados"""
+    base_year: int
+    target_year: int
+    horizon: int
+    method: str
+    confidence: float
+    biome_filter: Optional[str] = None
+    forecasts: List[ForecastTableItem]
+    total: int
+    data_source: str
+    timestamp: str
+
+
+class AnomalyItem(BaseModel):
+    """Célula (entidade × ano) fora do padrão"""
+    position: int
+    state: str
+    state_code: str
+    entity_type: Literal["state", "biome", "brasil"]
+    biome: str
+    year: int
+    area_km2: float
+    previous_area_km2: Optional[float]
+    change_km2: Optional[float]
+    change_percentage: Optional[float]
+    z_score: Optional[float]
+    yoy_z_score: Optional[float]
+    score: float
+    direction: Literal["spike", "drop"]
+
+
+class AnomaliesResponse(BaseModel):
+    """Response de anomalias"""
+    year: Optional[int] = None
+    biome_filter: Optional[str] = None
+    threshold: float
+    anomalies: List[AnomalyItem]
+    total: int
+    data_source: str
+    timestamp: str
@@ -0,0 +1,40 @@
+"""
+Domínio de anos - faixa de anos do dataset carregado
+
+Validadores dos requests, parâmetros das rotas e schemas das ferramentas do
+agente leem a faixa daqui em vez de anos fixos. Ela é configurada quando o
+store é carregado (DeforestationService), então o mock (2020-2024) e a série
+histórica do PRODES (1988-) usam o mesmo código.
+"""
+from typing import Dict, Iterable, List, Optional
+
+
+class YearDomain:
+    """Primeiro e último ano do dataset (sem restrição até ser configurado)"""
+
+    def __init__(self, years: Iterable[int] = ()):
+        self.configure(years)
+
+    def configure(self, years: Iterable[int]) -> None:
+        self.years: List[int] = sorted(int(year) for year in years)
+        self.first: Optional[int] = self.years[0] if self.years else None
+        self.last: Optional[int] = self.years[-1] if self.years else None
+
+    @property
+    def label(self) -> str:
+        return f"{self.first}-{self.last}" if self.years else "-"
+
+    def check(self, year: Optional[int]) -> Optional[int]:
+        """Valida o ano contra a faixa (ValueError fora dela)"""
+        if year is not None and self.years and not self.first <= year <= self.last:
+            raise ValueError(f"Ano {year} fora do período disponível ({self.label})")
+        return year
+
+    def json_schema(self, schema: Dict) -> None:
+        """json_schema_extra dos campos de ano: limites e exemplo do dataset atual"""
+        if self.years:
+            schema.update(minimum=self.first, maximum=self.last, example=self.last)
+
+
+# Configurado pelo DeforestationService ao carregar o store
+YEARS = YearDomain()
@@ -0,0 +1,122 @@
+"""
+Router de Chat
+Perguntas estruturadas são respondidas pelo intent router (sem o modelo);
+as demais seguem para o Azure Agent, com resposta em streaming (Server-Sent Events)
+"""
+from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Dict
+import json
+import logging
+import time
+from datetime import datetime
+
+from app.models.requests import ChatRequest
+from app.services.deforestation_service import (
+    DeforestationService,
+    get_deforestation_service
+)
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+def _sse(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _has_agent(service: DeforestationService) -> bool:
+    """Agente de chat disponível (apenas no Agent Mode)"""
+    return hasattr(service.engine, "stream_query")
+
+
+async def _routed_events(routed: Dict, started: float) -> AsyncIterator[Dict]:
+    """Resposta do intent router no mesmo formato de eventos do agente"""
+    yield {"event": "intent", "data": {k: routed[k] for k in ("intent", "params", "confidence")}}
+    yield {"event": "token", "data": {"content": routed["answer"]}}
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+    yield {
+        "event": "done",
+        "data": {
+            "first_token_ms": elapsed_ms,
+            "elapsed_ms": elapsed_ms,
+            "rounds": [],
+            "stopped_by": None,
+            "cache": None,
+            "routed": True
+        }
+    }
+
+
+@router.post(
+    "/chat/stream",
+    summary="Chat em streaming",
+    description="Responde à pergunta com Server-Sent Events (tokens enviados conforme são gerados)",
+    response_class=StreamingResponse,
+    tags=["Chat"]
+)
+async def chat_stream(
+    request: ChatRequest,
+    service: DeforestationService = Depends(get_deforestation_service)
+):
+    """
+    **Chat em Streaming (SSE)**
+    
+    Perguntas estruturadas (estado/ano, comparação, ranking, biomas) são
+    respondidas sem o modelo, também no Direct Mode; as demais exigem o
+    Agent Mode (503 caso contrário).
+    
+    Eventos emitidos, em ordem:
+    - `start`: enviado imediatamente
+    - `intent`: pergunta respondida pelo intent router (sem o modelo)
+    - `tool_call` / `tool_result`: ferramentas consultadas pelo agente
+    - `token`: trechos da resposta (`{"content": "..."}`)
+    - `done`: tempos do primeiro token e total
+    - `error`: falha ao processar a pergunta
+    """
+    logger.info(f"POST /chat/stream: {request.message[:80]}")
+    started = time.perf_counter()
+    
+    routed = await service.answer_question(request.message)
+    if routed is None and not _has_agent(service):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Pergunta não reconhecida e chat livre indisponível: configure USE_AZURE_AGENT=true"
+        )
+    
+    async def events() -> AsyncIterator[str]:
+        yield _sse("start", {"timestamp": datetime.utcnow().isoformat()})
+        source = _routed_events(routed, started) if routed else service.engine.stream_query(request.message)
+        async for item in source:
+            yield _sse(item["event"], item["data"])
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get(
+    "/chat/stats",
+    summary="Estatísticas do chat",
+    description="Parcela das perguntas respondidas sem o modelo e tempo de análise do intent router",
+    tags=["Chat"]
+)
+async def chat_stats(
+    service: DeforestationService = Depends(get_deforestation_service)
+):
+    """
+    **Estatísticas do Chat**
+    
+    - `intent_router`: perguntas roteadas/encaminhadas ao agente, `llm_free_rate`
+      e tempo médio/máximo de análise (µs)
+    - `agent_answers`: cache de respostas do agente (apenas no Agent Mode)
+    """
+    answer_cache = getattr(service.engine, "answer_cache", None)
+    return {
+        "mode": "azure_agent" if _has_agent(service) else "direct_logic",
+        "intent_router": service.intents.stats() if service.intents else {"enabled": False},
+        "agent_answers": answer_cache.stats() if answer_cache else None
+    }
@@ -2,34 +2,123 @@
 Router de Desmatamento
 Endpoints para as ações principais do Observa Floresta
 """
-from fastapi import APIRouter, HTTPException, Depends, Query, status
-from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response, status
+from fastapi.responses import JSONResponse
+from typing import Dict, Optional, Tuple
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
 
+from app.config import settings
 from app.services.deforestation_service import (
     DeforestationService,
-    get_deforestation_service
+    get_deforestation_service,
+    state_key,
+    compare_key,
+    ranking_key,
+    biome_comparison_key,
+    overview_key,
+    forecast_key,
+    forecast_table_key,
+    anomalies_key,
+    states_list_key
 )
+from app.services.anomalies import DEFAULT_THRESHOLD
+from app.services.forecast import MAX_HORIZON
 from app.models.requests import (
     StateDeforestationRequest,
     ComparisonRequest,
-    RankingRequest
+    RankingRequest,
+    BatchRequest,
+    MAX_RANKING_LIMIT
 )
+from app.models.years import YEARS
 from app.models.responses import (
     StateDeforestationResponse,
     ComparisonResponse,
     RankingResponse,
     StatesListResponse,
     YearsListResponse,
+    BiomesListResponse,
+    BiomeComparisonResponse,
+    BatchResponse,
+    OverviewResponse,
+    ForecastResponse,
+    ForecastTableResponse,
+    AnomaliesResponse,
     ErrorResponse
 )
 
 logger = logging.getLogger(__name__)
 
+try:
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as FastJSONResponse
+except ImportError:
+    logger.warning("orjson não instalado; FAST_SERIALIZATION usará o encoder json padrão")
+    FastJSONResponse = JSONResponse
+
 router = APIRouter()
 
 
+def _respond(result: Dict, response: Optional[Response] = None):
+    """
+    Com FAST_SERIALIZATION o resultado já foi validado pelo service e vai
+    direto para o encoder (o response_model continua documentando a rota);
+    sem ela, o FastAPI valida e serializa normalmente.
+    """
+    if not settings.FAST_SERIALIZATION:
+        return result
+    headers = dict(response.headers) if response is not None else None
+    return FastJSONResponse(result, headers=headers)
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or etag in [c[2:] if c.startswith("W/") else c for c in candidates]
+
+
+def _not_modified_since(header: Optional[str], last_modified: datetime) -> bool:
+    if not header:
+        return False
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    return last_modified.replace(microsecond=0) <= since
+
+
+def _conditional(
+    request: Request,
+    response: Response,
+    service: DeforestationService,
+    key: Tuple
+) -> Optional[Response]:
+    """
+    Define ETag/Last-Modified/Cache-Control e responde 304 quando o cliente
+    já tem a versão atual (sem chamar o service)
+    """
+    etag = service.etag(key)
+    last_modified = service.last_modified.replace(tzinfo=timezone.utc)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_datetime(last_modified, usegmt=True),
+        "Cache-Control": f"public, max-age={settings.HTTP_CACHE_MAX_AGE}, must-revalidate",
+        "X-Response-Timestamp": datetime.utcnow().isoformat()
+    }
+    response.headers.update(headers)
+
+    if_none_match = request.headers.get("if-none-match")
+    if _etag_matches(if_none_match, etag) or (
+        if_none_match is None
+        and _not_modified_since(request.headers.get("if-modified-since"), last_modified)
+    ):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return None
+
+
 # ==========================================
 # Ação 1: Consultar Desmatamento por Estado
 # ==========================================
@@ -50,9 +139,10 @@ async def get_state_deforestation_post(
         logger.info(f"POST /deforestation/state: {request.state}, {request.year}")
         result = await service.get_state_deforestation(
             state=request.state,
-            year=request.year
+            year=request.year,
+            level=request.level
         )
-        return result
+        return _respond(result)
     except ValueError as e:
         logger.warning(f"Validation error: {e}")
         raise HTTPException(
@@ -75,18 +165,26 @@ async def get_state_deforestation_post(
     tags=["Ações Principais"]
 )
 async def get_state_deforestation_get(
+    request: Request,
+    response: Response,
     state: str,
-    year: Optional[int] = Query(None, ge=2020, le=2024),
+    year: Optional[int] = Query(None, json_schema_extra=YEARS.json_schema),
+    level: str = Query("state", regex="^(state|municipality)$"),
     service: DeforestationService = Depends(get_deforestation_service)
 ):
     """Ação 1: Consultar Desmatamento por Estado (GET)"""
     try:
-        logger.info(f"GET /deforestation/state/{state}?year={year}")
+        logger.info(f"GET /deforestation/state/{state}?year={year}&level={level}")
+        YEARS.check(year)
+        not_modified = _conditional(request, response, service, state_key(state, year, level))
+        if not_modified:
+            return not_modified
         result = await service.get_state_deforestation(
             state=state,
-            year=year
+            year=year,
+            level=level
         )
-        return result
+        return _respond(result, response)
     except ValueError as e:
         logger.warning(f"Validation error: {e}")
         raise HTTPException(
@@ -134,7 +232,7 @@ async def compare_deforestation_post(
             year_start=request.year_start,
             year_end=request.year_end
         )
-        return result
+        return _respond(result)
     except ValueError as e:
         logger.warning(f"Validation error: {e}")
         raise HTTPException(
@@ -157,9 +255,11 @@ async def compare_deforestation_post(
     tags=["Ações Principais"]
 )
 async def compare_deforestation_get(
+    request: Request,
+    response: Response,
     state_or_biome: str,
-    year_start: int = Query(..., ge=2020, le=2024),
-    year_end: int = Query(..., ge=2020, le=2024),
+    year_start: int = Query(..., json_schema_extra=YEARS.json_schema),
+    year_end: int = Query(..., json_schema_extra=YEARS.json_schema),
     service: DeforestationService = Depends(get_deforestation_service)
 ):
     """
@@ -171,6 +271,8 @@ async def compare_deforestation_get(
     - GET /api/deforestation/compare/Brasil?year_start=2020&year_end=2024
     """
     try:
+        YEARS.check(year_start)
+        YEARS.check(year_end)
         if year_end <= year_start:
             raise ValueError("year_end deve ser maior que year_start")
         
@@ -178,12 +280,17 @@ async def compare_deforestation_get(
             f"GET /deforestation/compare/{state_or_biome}"
             f"?year_start={year_start}&year_end={year_end}"
         )
+        not_modified = _conditional(
+            request, response, service, compare_key(state_or_biome, year_start, year_end)
+        )
+        if not_modified:
+            return not_modified
         result = await service.compare_deforestation(
             state_or_biome=state_or_biome,
             year_start=year_start,
             year_end=year_end
         )
-        return result
+        return _respond(result, response)
     except ValueError as e:
         logger.warning(f"Validation error: {e}")
         raise HTTPException(
@@ -223,15 +330,17 @@ async def get_states_ranking_post(
     try:
         logger.info(
             f"POST /deforestation/ranking: year={request.year}, "
-            f"order={request.order}, limit={request.limit}, biome={request.biome}"
+            f"order={request.order}, limit={request.limit}, biome={request.biome}, "
+            f"level={request.level}"
         )
         result = await service.get_states_ranking(
             year=request.year,
             order=request.order,
             limit=request.limit,
-            biome=request.biome
+            biome=request.biome,
+            level=request.level
         )
-        return result
+        return _respond(result)
     except ValueError as e:
         logger.warning(f"Validation error: {e}")
         raise HTTPException(
@@ -254,10 +363,13 @@ async def get_states_ranking_post(
     tags=["Ações Principais"]
 )
 async def get_states_ranking_get(
+    request: Request,
+    response: Response,
     year: int,
     order: str = Query("desc", regex="^(desc|asc)$"),
-    limit: int = Query(10, ge=1, le=30),
+    limit: int = Query(10, ge=1, le=MAX_RANKING_LIMIT),
     biome: Optional[str] = Query(None, description="Filtrar por bioma"),
+    level: str = Query("state", regex="^(state|municipality)$"),
     service: DeforestationService = Depends(get_deforestation_service)
 ):
     """
@@ -267,19 +379,26 @@ async def get_states_ranking_get(
     - GET /api/deforestation/ranking/2024 (todos os estados)
     - GET /api/deforestation/ranking/2024?biome=Cerrado (apenas Cerrado)
     - GET /api/deforestation/ranking/2024?order=asc&limit=5 (top 5 menores)
+    - GET /api/deforestation/ranking/2024?level=municipality&limit=20 (top 20 municípios)
     """
     try:
         logger.info(
             f"GET /deforestation/ranking/{year}"
-            f"?order={order}&limit={limit}&biome={biome}"
+            f"?order={order}&limit={limit}&biome={biome}&level={level}"
         )
+        not_modified = _conditional(
+            request, response, service, ranking_key(year, order, limit, biome, level)
+        )
+        if not_modified:
+            return not_modified
         result = await service.get_states_ranking(
             year=year,
             order=order,
             limit=limit,
-            biome=biome
+            biome=biome,
+            level=level
         )
-        return result
+        return _respond(result, response)
     except ValueError as e:
         logger.warning(f"Validation error: {e}")
         raise HTTPException(
@@ -300,11 +419,14 @@ async def get_states_ranking_get(
 
 @router.get(
     "/deforestation/states",
+    response_model=StatesListResponse,
     summary="Listar estados disponíveis",
     description="Retorna lista de estados (com filtro opcional de bioma)",
     tags=["Auxiliares"]
 )
 async def get_available_states(
+    request: Request,
+    response: Response,
     biome: Optional[str] = Query(None, description="Filtrar por bioma (ex: Amazônia, Cerrado)"),
     service: DeforestationService = Depends(get_deforestation_service)
 ):
@@ -320,8 +442,11 @@ async def get_available_states(
     """
     try:
         logger.info(f"GET /deforestation/states?biome={biome}")
+        not_modified = _conditional(request, response, service, states_list_key(biome))
+        if not_modified:
+            return not_modified
         result = await service.get_available_states(biome)
-        return result
+        return _respond(result, response)
     except Exception as e:
         logger.error(f"Error in get_available_states: {e}")
         raise HTTPException(
@@ -338,13 +463,18 @@ async def get_available_states(
     tags=["Auxiliares"]
 )
 async def get_available_years(
+    request: Request,
+    response: Response,
     service: DeforestationService = Depends(get_deforestation_service)
 ):
     """**Lista de Anos Disponíveis**"""
     try:
         logger.info("GET /deforestation/years")
+        not_modified = _conditional(request, response, service, ("get_available_years",))
+        if not_modified:
+            return not_modified
         result = await service.get_available_years()
-        return result
+        return _respond(result, response)
     except Exception as e:
         logger.error(f"Error in get_available_years: {e}")
         raise HTTPException(
@@ -355,11 +485,14 @@ async def get_available_years(
 
 @router.get(
     "/deforestation/biomes",
+    response_model=BiomesListResponse,
     summary="Listar biomas disponíveis",
     description="Retorna lista de todos os biomas brasileiros",
     tags=["Auxiliares"]
 )
 async def get_available_biomes(
+    request: Request,
+    response: Response,
     service: DeforestationService = Depends(get_deforestation_service)
 ):
     """
@@ -375,8 +508,11 @@ async def get_available_biomes(
     """
     try:
         logger.info("GET /deforestation/biomes")
+        not_modified = _conditional(request, response, service, ("get_available_biomes",))
+        if not_modified:
+            return not_modified
         result = await service.get_available_biomes()
-        return result
+        return _respond(result, response)
     except Exception as e:
         logger.error(f"Error in get_available_biomes: {e}")
         raise HTTPException(
@@ -391,11 +527,14 @@ async def get_available_biomes(
 
 @router.get(
     "/deforestation/biomes/compare/{year}",
+    response_model=BiomeComparisonResponse,
     summary="Comparar todos os biomas",
     description="Compara degradação entre todos os biomas brasileiros em um ano",
     tags=["Ações Principais"]
 )
 async def compare_biomes(
+    request: Request,
+    response: Response,
     year: int,
     service: DeforestationService = Depends(get_deforestation_service)
 ):
@@ -417,8 +556,11 @@ async def compare_biomes(
     """
     try:
         logger.info(f"GET /deforestation/biomes/compare/{year}")
+        not_modified = _conditional(request, response, service, biome_comparison_key(year))
+        if not_modified:
+            return not_modified
         result = await service.get_biome_comparison(year)
-        return result
+        return _respond(result, response)
     except ValueError as e:
         logger.warning(f"Validation error: {e}")
         raise HTTPException(
@@ -433,6 +575,261 @@ async def compare_biomes(
         )
 
 
+@router.get(
+    "/deforestation/overview",
+    response_model=OverviewResponse,
+    summary="Visão geral (dashboard)",
+    description="Série temporal, ranking e comparação de biomas em uma única resposta",
+    tags=["Ações Principais"]
+)
+async def get_overview(
+    request: Request,
+    response: Response,
+    year: Optional[int] = Query(None, description="Ano (padrão: último ano disponível)", json_schema_extra=YEARS.json_schema),
+    biome: Optional[str] = Query(None, description="Filtrar por bioma (opcional)"),
+    limit: int = Query(10, ge=1, le=MAX_RANKING_LIMIT),
+    service: DeforestationService = Depends(get_deforestation_service)
+):
+    """
+    **Visão Geral**
+    
+    Substitui as chamadas separadas de comparação, ranking e biomas usadas
+    pelas páginas de dashboard e analytics.
+    
+    **Exemplo:**
+```
+    GET /api/deforestation/overview?biome=Cerrado&year=2024
+```
+    
+    **Retorna:**
+    - `comparison`: série do Brasil (ou do bioma) do primeiro ano até `year`
+    - `ranking`: top `limit` estados no ano (filtrado pelo bioma)
+    - `biomes`: comparação de todos os biomas no ano
+    """
+    try:
+        logger.info(f"GET /deforestation/overview?year={year}&biome={biome}&limit={limit}")
+        YEARS.check(year)
+        not_modified = _conditional(request, response, service, overview_key(year, biome, limit))
+        if not_modified:
+            return not_modified
+        result = await service.get_overview(year, biome, limit)
+        return _respond(result, response)
+    except ValueError as e:
+        logger.warning(f"Validation error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Error in get_overview: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro ao montar visão geral"
+        )
+
+
+# ==========================================
+# Previsão de Tendência
+# ==========================================
+
+@router.get(
+    "/deforestation/forecast",
+    response_model=ForecastTableResponse,
+    summary="Previsão de todos os estados",
+    description="Tabela com a previsão de cada estado no último ano do horizonte",
+    tags=["Previsão"]
+)
+async def get_forecast_table(
+    request: Request,
+    response: Response,
+    horizon: int = Query(3, ge=1, le=MAX_HORIZON, description="Anos à frente do último ano disponível"),
+    method: str = Query("linear", regex="^(linear|log_linear|cagr)$"),
+    biome: Optional[str] = Query(None, description="Filtrar por bioma (opcional)"),
+    service: DeforestationService = Depends(get_deforestation_service)
+):
+    """
+    **Previsão de Todos os Estados**
+    
+    Os ajustes de todos os estados saem de uma única operação matricial,
+    calculada uma vez por versão dos dados.
+    
+    **Exemplos:**
+    - GET /api/deforestation/forecast?horizon=3
+    - GET /api/deforestation/forecast?method=cagr&biome=Cerrado
+    """
+    try:
+        logger.info(f"GET /deforestation/forecast?horizon={horizon}&method={method}&biome={biome}")
+        not_modified = _conditional(request, response, service, forecast_table_key(horizon, method, biome))
+        if not_modified:
+            return not_modified
+        result = await service.get_forecast_table(horizon, method, biome)
+        return _respond(result, response)
+    except ValueError as e:
+        logger.warning(f"Validation error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Error in get_forecast_table: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro ao calcular previsões"
+        )
+
+
+@router.get(
+    "/deforestation/forecast/{entity}",
+    response_model=ForecastResponse,
+    summary="Previsão de um estado, bioma ou Brasil",
+    description="Regressão linear, log-linear e CAGR com intervalos de previsão (95%)",
+    tags=["Previsão"]
+)
+async def get_forecast(
+    request: Request,
+    response: Response,
+    entity: str,
+    horizon: int = Query(3, ge=1, le=MAX_HORIZON, description="Anos à frente do último ano disponível"),
+    service: DeforestationService = Depends(get_deforestation_service)
+):
+    """
+    **Previsão de Tendência**
+    
+    **Exemplos:**
+    - GET /api/deforestation/forecast/PA?horizon=5
+    - GET /api/deforestation/forecast/Cerrado
+    - GET /api/deforestation/forecast/Brasil
+    
+    **Retorna:**
+    - `trend`: pela inclinação linear (estável se o intervalo de 95% contém zero)
+    - `models`: projeções de cada método com `lower_km2`/`upper_km2`
+    """
+    try:
+        logger.info(f"GET /deforestation/forecast/{entity}?horizon={horizon}")
+        not_modified = _conditional(request, response, service, forecast_key(entity, horizon))
+        if not_modified:
+            return not_modified
+        result = await service.get_forecast(entity, horizon)
+        return _respond(result, response)
+    except ValueError as e:
+        logger.warning(f"Validation error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Error in get_forecast: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro ao calcular previsão"
+        )
+
+
+# ==========================================
+# Anomalias
+# ==========================================
+
+@router.get(
+    "/deforestation/anomalies",
+    response_model=AnomaliesResponse,
+    summary="Anomalias de desmatamento",
+    description="Estados, biomas e anos fora do padrão (z-score robusto e saltos ano a ano)",
+    tags=["Previsão"]
+)
+async def get_anomalies(
+    request: Request,
+    response: Response,
+    year: Optional[int] = Query(None, description="Filtrar por ano (opcional)"),
+    biome: Optional[str] = Query(None, description="Filtrar por bioma (opcional)"),
+    threshold: float = Query(DEFAULT_THRESHOLD, gt=0, le=100, description="Score mínimo (|z| robusto)"),
+    limit: int = Query(50, ge=1, le=MAX_RANKING_LIMIT),
+    service: DeforestationService = Depends(get_deforestation_service)
+):
+    """
+    **Anomalias**
+    
+    Responde a partir de uma tabela ordenada por score, calculada uma vez
+    por versão dos dados.
+    
+    **Exemplos:**
+    - GET /api/deforestation/anomalies
+    - GET /api/deforestation/anomalies?year=2021&biome=Amazônia
+    - GET /api/deforestation/anomalies?threshold=2.5&limit=100
+    
+    **Retorna:**
+    - `z_score`: área em relação à mediana da própria série (MAD)
+    - `yoy_z_score`: variação anual em relação às demais entidades no mesmo ano
+    - `score`: o maior dos dois em módulo; `direction`: spike ou drop
+    """
+    try:
+        logger.info(
+            f"GET /deforestation/anomalies?year={year}&biome={biome}"
+            f"&threshold={threshold}&limit={limit}"
+        )
+        not_modified = _conditional(request, response, service, anomalies_key(year, biome, threshold, limit))
+        if not_modified:
+            return not_modified
+        result = await service.get_anomalies(year, biome, threshold, limit)
+        return _respond(result, response)
+    except ValueError as e:
+        logger.warning(f"Validation error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Error in get_anomalies: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro ao buscar anomalias"
+        )
+
+
+@router.post(
+    "/deforestation/batch",
+    response_model=BatchResponse,
+    summary="Consultas em lote",
+    description="Executa várias consultas (state, compare, ranking, biomes) em uma requisição",
+    tags=["Ações Principais"]
+)
+async def run_batch(
+    request: BatchRequest,
+    service: DeforestationService = Depends(get_deforestation_service)
+):
+    """
+    **Consultas em Lote**
+    
+    Cada item tem `type` e `params` (os mesmos parâmetros do endpoint
+    individual). Os resultados voltam na ordem enviada; um item inválido
+    retorna `status: "error"` sem derrubar o lote.
+    
+    **Exemplo:**
+```json
+    {
+        "queries": [
+            {"type": "state", "params": {"state": "PA", "year": 2024}},
+            {"type": "compare", "params": {"state_or_biome": "Cerrado", "year_start": 2020, "year_end": 2024}},
+            {"type": "ranking", "params": {"year": 2024, "limit": 5}},
+            {"type": "biomes", "params": {"year": 2024}}
+        ]
+    }
+```
+    """
+    try:
+        logger.info(f"POST /deforestation/batch: {len(request.queries)} consultas")
+        result = await service.run_batch(
+            [(query.type, query.params) for query in request.queries]
+        )
+        logger.info(f"Lote concluído: {result['succeeded']} ok, {result['failed']} com erro")
+        return _respond(result)
+    except Exception as e:
+        logger.error(f"Error in run_batch: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro ao processar consultas em lote"
+        )
+
+
 # ==========================================
 # Endpoint de Teste Rápido
 # ==========================================
@@ -451,7 +848,7 @@ async def deforestation_info():
         "coverage": {
             "states": 27,
             "biomes": 6,
-            "years": "2020-2024"
+            "years": YEARS.label
         },
         "actions": [
             {
@@ -488,6 +885,39 @@ async def deforestation_info():
                 ],
                 "description": "Compara todos os 6 biomas brasileiros",
                 "examples": ["2024", "2023"]
+            },
+            {
+                "name": "Visão Geral (dashboard)",
+                "endpoints": [
+                    "GET /api/deforestation/overview?biome={biome}&year={year}"
+                ],
+                "description": "Série temporal, ranking e biomas em uma única resposta",
+                "examples": ["?biome=Cerrado", "?year=2023"]
+            },
+            {
+                "name": "Previsão de Tendência",
+                "endpoints": [
+                    "GET /api/deforestation/forecast/{entity}?horizon={horizon}",
+                    "GET /api/deforestation/forecast?method={method}&biome={biome}"
+                ],
+                "description": "Regressão linear, log-linear e CAGR com intervalos de previsão",
+                "examples": ["PA", "Cerrado", "?method=cagr"]
+            },
+            {
+                "name": "Anomalias",
+                "endpoints": [
+                    "GET /api/deforestation/anomalies?year={year}&biome={biome}&threshold={threshold}"
+                ],
+                "description": "Estados, biomas e anos fora do padrão (z-score robusto e saltos ano a ano)",
+                "examples": ["?year=2021", "?biome=Amazônia&threshold=2.5"]
+            },
+            {
+                "name": "Consultas em Lote",
+                "endpoints": [
+                    "POST /api/deforestation/batch"
+                ],
+                "description": "Várias consultas (state, compare, ranking, biomes) em uma requisição",
+                "examples": ['{"queries": [{"type": "state", "params": {"state": "PA", "year": 2024}}]}']
             }
         ],
         "auxiliary": [
@@ -1,9 +1,17 @@
 """
 Router de health check e status
 """
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
 from datetime import datetime
+from typing import List
 from app.config import settings
+from app.services.deforestation_service import (
+    DeforestationService,
+    get_deforestation_service
+)
+from app.services.metrics import HTTP_METRICS, format_histogram, format_metric
+from app.services.rate_limit import LIMITERS
 
 router = APIRouter()
 
@@ -40,5 +48,173 @@ async def get_config():
         "mock_data": settings.MOCK_DATA,
         "cache_enabled": settings.ENABLE_CACHE,
         "cache_ttl": settings.CACHE_TTL,
-        "cors_origins": settings.cors_origins_list
-    }
\ No newline at end of file
+        "cache_max_size": settings.CACHE_MAX_SIZE,
+        "cors_origins": settings.cors_origins_list,
+        "rate_limit": {
+            "enabled": settings.RATE_LIMIT_ENABLED,
+            **{budget: limiter.stats() for budget, limiter in LIMITERS.items()}
+        }
+    }
+
+
+@router.get("/cache/stats")
+async def get_cache_stats(
+    service: DeforestationService = Depends(get_deforestation_service)
+):
+    """
+    Estatísticas do cache de respostas
+    
+    Returns:
+        Tamanho, versão dos dados e hits/misses/evictions por método
+    """
+    return service.cache_stats()
+
+
+@router.get("/agent/metrics")
+async def get_agent_metrics(
+    service: DeforestationService = Depends(get_deforestation_service)
+):
+    """
+    Métricas do Azure Agent (por worker, desde o início do processo)
+    
+    Returns:
+        Histogramas de tokens e latência por rodada, tempo e payload por
+        ferramenta e custo por forma de pergunta (mais caras primeiro)
+    """
+    metrics = getattr(service.engine, "metrics", None)
+    if metrics is None:
+        return {"enabled": False, "mode": "direct_logic"}
+    return {"enabled": True, **metrics.snapshot()}
+
+
+def _rate_limit_metrics() -> List[str]:
+    """Requisições permitidas/rejeitadas e clientes em memória por orçamento"""
+    if not settings.RATE_LIMIT_ENABLED:
+        return []
+    return [
+        *format_metric(
+            "observa_rate_limit_requests_total", "counter", "Requisições por orçamento e resultado",
+            [
+                ({"budget": budget, "result": result}, getattr(limiter, result))
+                for budget, limiter in LIMITERS.items()
+                for result in ("allowed", "rejected")
+            ]
+        ),
+        *format_metric(
+            "observa_rate_limit_clients", "gauge", "Clientes com balde em memória",
+            [({"budget": budget}, len(limiter)) for budget, limiter in LIMITERS.items()]
+        ),
+    ]
+
+
+def _cache_metrics(service: DeforestationService) -> List[str]:
+    """Cache de respostas do service e single-flight (por método)"""
+    flights = service.flight_stats()
+    lines = [
+        *format_metric(
+            "observa_singleflight_in_flight", "gauge", "Computações em andamento compartilhadas",
+            [({}, flights["in_flight"])]
+        ),
+        *format_metric(
+            "observa_singleflight_calls_total", "counter",
+            "Chamadas em cache miss por método (computation = calculou, coalesced = aguardou outra)",
+            [
+                ({"method": method, "result": result}, counters[key])
+                for method, counters in flights["methods"].items()
+                for result, key in (("computation", "computations"), ("coalesced", "coalesced"))
+            ]
+        ),
+    ]
+    if service.cache is None:
+        return lines
+    stats = service.cache.stats()
+    methods = stats["methods"]
+    return lines + [
+        *format_metric("observa_cache_entries", "gauge", "Entradas no cache de respostas", [({}, stats["size"])]),
+        *format_metric(
+            "observa_cache_lookups_total", "counter", "Consultas ao cache por método e resultado",
+            [
+                ({"method": method, "result": result}, counters[key])
+                for method, counters in methods.items()
+                for result, key in (("hit", "hits"), ("miss", "misses"))
+            ]
+        ),
+        *format_metric(
+            "observa_cache_evictions_total", "counter", "Entradas descartadas (LRU) por método",
+            [({"method": method}, counters["evictions"]) for method, counters in methods.items()]
+        ),
+        *format_metric(
+            "observa_cache_invalidations_total", "counter", "Invalidações do cache (nova versão dos dados)",
+            [({}, stats["invalidations"])]
+        ),
+    ]
+
+
+def _chat_metrics(service: DeforestationService) -> List[str]:
+    """Intent router, cache de respostas e métricas do Azure Agent"""
+    lines: List[str] = []
+    if service.intents is not None:
+        stats = service.intents.stats()
+        lines += format_metric(
+            "observa_chat_intents_total", "counter", "Perguntas do chat por destino (routed = sem o modelo)",
+            [({"outcome": outcome}, stats[outcome]) for outcome in ("routed", "fallback")]
+        )
+
+    answer_cache = getattr(service.engine, "answer_cache", None)
+    if answer_cache is not None:
+        counters = answer_cache.counters
+        lines += format_metric(
+            "observa_agent_answer_cache_total", "counter", "Cache de respostas do agente por resultado",
+            [({"result": result}, value) for result, value in counters.items()]
+        )
+
+    metrics = getattr(service.engine, "metrics", None)
+    if metrics is None:
+        return lines
+    lines += [
+        *format_metric("observa_agent_queries_total", "counter", "Perguntas processadas pelo agente", [({}, metrics.queries)]),
+        *format_metric("observa_agent_errors_total", "counter", "Perguntas com erro no agente", [({}, metrics.errors)]),
+        *format_metric(
+            "observa_agent_budget_stops_total", "counter", "Perguntas encerradas pelo orçamento",
+            [({"reason": reason}, value) for reason, value in metrics.stopped_by.items()]
+        ),
+        *format_histogram(
+            "observa_agent_round_tokens", "Tokens por rodada de completion",
+            [
+                ({"kind": "prompt"}, metrics.round_prompt_tokens),
+                ({"kind": "completion"}, metrics.round_completion_tokens)
+            ]
+        ),
+        *format_histogram(
+            "observa_agent_round_duration_milliseconds", "Latência de cada rodada de completion",
+            [({}, metrics.round_ms)]
+        ),
+        *format_histogram(
+            "observa_agent_query_duration_milliseconds", "Latência total por pergunta",
+            [({}, metrics.query_ms)]
+        ),
+        *format_histogram(
+            "observa_agent_tool_duration_milliseconds", "Tempo de execução por ferramenta",
+            [({"tool": name}, tool.ms) for name, tool in metrics.tools.items()]
+        ),
+        *format_histogram(
+            "observa_agent_tool_payload_bytes", "Bytes de payload enviados ao modelo por ferramenta",
+            [({"tool": name}, tool.payload_bytes) for name, tool in metrics.tools.items()]
+        ),
+    ]
+    return lines
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(
+    service: DeforestationService = Depends(get_deforestation_service)
+):
+    """
+    Métricas no formato texto do Prometheus
+    
+    Returns:
+        Latência por rota, respostas por status, requisições em andamento,
+        cache de respostas e contadores do chat/agente
+    """
+    lines = [*HTTP_METRICS.render(), *_rate_limit_metrics(), *_cache_metrics(service), *_chat_metrics(service)]
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
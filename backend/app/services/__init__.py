@@ -6,9 +6,11 @@ from app.services.deforestation_service import (
     get_deforestation_service
 )
 from app.services.direct_service import DirectService
+from app.services.degradation_store import DegradationStore
 
 __all__ = [
     "DeforestationService",
     "get_deforestation_service",
-    "DirectService"
+    "DirectService",
+    "DegradationStore"
 ]
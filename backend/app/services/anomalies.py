@@ -0,0 +1,124 @@
+"""
+Anomalias - z-scores robustos e saltos ano a ano para todas as entidades
+
+Para cada linha de store.entity_matrix() (estados, biomas e Brasil), em escala
+log (variações relativas, comparáveis entre entidades de tamanhos diferentes):
+
+- z: desvio da área em relação à mediana da própria série, em unidades de
+  MAD (z = 0,6745·(x - mediana) / MAD)
+- yoy_z: a variação em relação ao ano anterior comparada às variações de
+  todas as entidades no mesmo ano (mediana/MAD da coluna). Com poucos anos
+  por série o MAD temporal degenera; o corte transversal tem ~34 pontos por
+  ano e destaca saltos como Roraima 2020→2021 (+250% num ano em que o
+  Brasil subiu ~10%)
+
+Tudo é calculado em uma passada vetorizada e guardado como uma tabela
+(linha, ano) ordenada pelo score = max(|z|, |yoy_z|). Uma consulta corta a
+tabela no limite por busca binária e só filtra o prefixo; a tabela é
+reconstruída quando a versão do store muda.
+"""
+from typing import NamedTuple, Optional
+import warnings
+
+import numpy as np
+
+DEFAULT_THRESHOLD = 3.5
+
+# MAD -> desvio padrão (distribuição normal) e fallback quando MAD = 0
+_MAD_SCALE = 0.6745
+_MEAN_AD_SCALE = 1.253314
+
+
+def robust_z(values: np.ndarray, axis: int) -> np.ndarray:
+    """
+    z-score robusto (mediana/MAD) ao longo do eixo, ignorando NaN
+
+    Com MAD = 0 (mais da metade dos pontos iguais) usa o desvio absoluto
+    médio; se ele também for 0 a série é constante e z = 0.
+    """
+    with warnings.catch_warnings(), np.errstate(divide="ignore", invalid="ignore"):
+        # Séries sem nenhum dado: mediana NaN, sem aviso
+        warnings.simplefilter("ignore", RuntimeWarning)
+        median = np.nanmedian(values, axis=axis, keepdims=True)
+        deviation = np.abs(values - median)
+        mad = np.nanmedian(deviation, axis=axis, keepdims=True)
+        mean_ad = np.nanmean(deviation, axis=axis, keepdims=True)
+        z = np.where(
+            mad > 0,
+            _MAD_SCALE * (values - median) / mad,
+            (values - median) / (_MEAN_AD_SCALE * mean_ad)
+        )
+    constant = ~(mad > 0) & ~(mean_ad > 0)
+    return np.where(constant & ~np.isnan(values), 0.0, z)
+
+
+class AnomalyTable(NamedTuple):
+    """Células (linha, coluna) ordenadas por score decrescente"""
+    rows: np.ndarray
+    cols: np.ndarray
+    score: np.ndarray
+    z: np.ndarray
+    yoy_z: np.ndarray
+    area: np.ndarray
+    previous: np.ndarray
+
+
+def build_table(matrix: np.ndarray) -> AnomalyTable:
+    """Scores de todas as células com dado, em uma passada"""
+    previous = np.full(matrix.shape, np.nan)
+    previous[:, 1:] = matrix[:, :-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        logs = np.log(np.where(matrix > 0, matrix, np.nan))
+
+    z = robust_z(logs, axis=1)
+    yoy_z = np.full(matrix.shape, np.nan)
+    if matrix.shape[1] > 1:
+        yoy_z[:, 1:] = robust_z(logs[:, 1:] - logs[:, :-1], axis=0)
+    score = np.fmax(np.abs(z), np.abs(yoy_z))
+
+    rows, cols = np.nonzero(~np.isnan(matrix) & ~np.isnan(score))
+    order = np.lexsort((cols, rows, -score[rows, cols]))
+    rows, cols = rows[order], cols[order]
+    return AnomalyTable(
+        rows, cols, score[rows, cols], z[rows, cols], yoy_z[rows, cols],
+        matrix[rows, cols], previous[rows, cols]
+    )
+
+
+class AnomalyIndex:
+    """Tabela de anomalias do store (reconstruída quando a versão muda)"""
+
+    def __init__(self, store):
+        self.store = store
+        self._version: Optional[int] = None
+        self._table: Optional[AnomalyTable] = None
+
+    def table(self) -> AnomalyTable:
+        if self._version != self.store.version or self._table is None:
+            self._table = build_table(self.store.entity_matrix())
+            self._version = self.store.version
+        return self._table
+
+    def warm(self) -> None:
+        self.table()
+
+    def select(
+        self,
+        threshold: float = DEFAULT_THRESHOLD,
+        col: Optional[int] = None,
+        rows: Optional[np.ndarray] = None,
+        limit: Optional[int] = None
+    ) -> np.ndarray:
+        """Posições na tabela com score >= threshold, filtradas por ano e linhas"""
+        table = self.table()
+        # score decrescente: o corte pelo limite é um prefixo
+        end = np.searchsorted(-table.score, -threshold, side="right")
+        keep = np.ones(end, dtype=bool)
+        if col is not None:
+            keep &= table.cols[:end] == col
+        if rows is not None:
+            allowed = np.zeros(len(self.store.states) + len(self.store.biomes) + 1, dtype=bool)
+            allowed[rows] = True
+            keep &= allowed[table.rows[:end]]
+        selected = np.flatnonzero(keep)
+        return selected if limit is None else selected[:limit]
@@ -0,0 +1,96 @@
+"""
+Consultas em lote - várias consultas heterogêneas em uma única requisição
+
+Cada item é validado com o mesmo modelo do endpoint individual. As consultas
+por estado (nível estadual) são resolvidas juntas, com uma única leitura da
+matriz; as demais usam as funções de consulta sobre o mesmo store.
+"""
+from typing import Dict, List, NamedTuple, Union
+import logging
+
+from pydantic import BaseModel, ValidationError
+
+from app.models.requests import (
+    StateDeforestationRequest,
+    ComparisonRequest,
+    RankingRequest,
+    BiomeComparisonRequest
+)
+from app.models.years import YEARS
+from app.services import mock_data_brazil as mock_data
+from app.services.degradation_store import DegradationStore
+
+logger = logging.getLogger(__name__)
+
+BATCH_MODELS = {
+    "state": StateDeforestationRequest,
+    "compare": ComparisonRequest,
+    "ranking": RankingRequest,
+    "biomes": BiomeComparisonRequest,
+}
+
+
+class BatchQuery(NamedTuple):
+    """Item do lote já validado"""
+    type: str
+    params: BaseModel
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc']) or 'params'}: {e['msg']}"
+        for e in error.errors()
+    )
+
+
+def parse_query(query_type: str, params: Dict) -> BatchQuery:
+    """Valida um item do lote (ValueError com a mensagem de validação)"""
+    model = BATCH_MODELS.get(query_type)
+    if model is None:
+        raise ValueError(f"Tipo '{query_type}' inválido. Tipos: {', '.join(BATCH_MODELS)}")
+    try:
+        parsed = model(**params)
+    except ValidationError as e:
+        raise ValueError(_validation_message(e))
+
+    if query_type == "state" and parsed.year is None:
+        parsed.year = YEARS.last
+    return BatchQuery(query_type, parsed)
+
+
+def _run_single(query: BatchQuery, store: DegradationStore) -> Dict:
+    p = query.params
+    if query.type == "state":
+        return mock_data.get_state_data(p.state, p.year, p.level, store=store)
+    if query.type == "compare":
+        return mock_data.get_comparison_data(p.state_or_biome, p.year_start, p.year_end, store=store)
+    if query.type == "ranking":
+        return mock_data.get_ranking_data(p.year, p.order, p.limit, p.biome, p.level, store=store)
+    return mock_data.get_biome_comparison(p.year, store=store)
+
+
+def execute(queries: List[BatchQuery], store: DegradationStore) -> List[Union[Dict, Exception]]:
+    """Executa o lote; cada posição traz o resultado ou a exceção do item"""
+    results: List[Union[Dict, Exception]] = [None] * len(queries)
+
+    states = [
+        i for i, q in enumerate(queries)
+        if q.type == "state" and q.params.level == "state"
+    ]
+    grouped = mock_data.get_state_data_many(
+        [(queries[i].params.state, queries[i].params.year) for i in states],
+        store=store
+    )
+    for i, outcome in zip(states, grouped):
+        results[i] = outcome
+
+    for i, query in enumerate(queries):
+        if results[i] is not None:
+            continue
+        try:
+            results[i] = _run_single(query, store)
+        except Exception as e:
+            if not isinstance(e, ValueError):
+                logger.error(f"Erro no item {i} do lote ({query.type}): {e}")
+            results[i] = e
+    return results
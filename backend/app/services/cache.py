@@ -0,0 +1,77 @@
+"""
+Cache em memória com expiração (TTL) e descarte LRU
+"""
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+import time
+
+
+class TTLCache:
+    """
+    Cache LRU com TTL e contadores por namespace
+
+    As chaves são tuplas cujo primeiro elemento é o namespace (ex.: nome do
+    método); hits, misses e evictions são contados por namespace.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 3600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._stats: Dict[Hashable, Dict[str, int]] = {}
+        self.invalidations = 0
+
+    def _count(self, namespace: Hashable, counter: str) -> None:
+        stats = self._stats.get(namespace)
+        if stats is None:
+            stats = self._stats[namespace] = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+        stats[counter] += 1
+
+    def get(self, key: Tuple) -> Tuple[bool, Any]:
+        """Retorna (encontrado, valor)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self._count(key[0], "misses")
+            return False, None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self._count(key[0], "expired")
+            self._count(key[0], "misses")
+            return False, None
+
+        self._entries.move_to_end(key)
+        self._count(key[0], "hits")
+        return True, value
+
+    def set(self, key: Tuple, value: Any, ttl: Optional[float] = None) -> None:
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            evicted, _ = self._entries.popitem(last=False)
+            self._count(evicted[0], "evictions")
+
+    def clear(self) -> None:
+        """Invalida todas as entradas (mantém os contadores)"""
+        self._entries.clear()
+        self.invalidations += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        methods = {}
+        for namespace, counters in self._stats.items():
+            lookups = counters["hits"] + counters["misses"]
+            methods[str(namespace)] = {
+                **counters,
+                "hit_rate": round(counters["hits"] / lookups, 4) if lookups else 0.0
+            }
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "invalidations": self.invalidations,
+            "methods": methods
+        }
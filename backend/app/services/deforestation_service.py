@@ -2,15 +2,135 @@
 Deforestation Service - Orchestrator
 Decide qual engine usar (Azure Agent ou Direct)
 """
-from typing import Dict, Optional
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from datetime import datetime
+import asyncio
+import hashlib
 import logging
 
 from app.config import settings
+from app.models.responses import (
+    StateDeforestationResponse,
+    ComparisonResponse,
+    RankingResponse,
+    OverviewResponse,
+    BiomeComparisonResponse,
+    StatesListResponse,
+    BiomesListResponse,
+    BatchResponse,
+    ForecastResponse,
+    ForecastTableResponse,
+    AnomaliesResponse,
+    YearsListResponse
+)
+from app.models.years import YEARS
+from app.services import batch
+from app.services.anomalies import DEFAULT_THRESHOLD
+from app.services.cache import TTLCache
 from app.services.direct_service import DirectService
+from app.services.entity_resolver import fold
+from app.services.mock_data_brazil import RESOLVER
 
 logger = logging.getLogger(__name__)
 
 
+def _entity_key(text: str, level: str = "state") -> str:
+    """Chave normalizada: "PA", "pará" e "Pará" compartilham a mesma entrada"""
+    if level == "state":
+        entity = RESOLVER.find(text)
+        if entity is not None:
+            return f"{entity.kind}:{entity.name}"
+    return fold(text)
+
+
+def state_key(state: str, year: Optional[int] = None, level: str = "state") -> Tuple:
+    year = year if year is not None else YEARS.last
+    return ("get_state_deforestation", _entity_key(state, level), year, level)
+
+
+def compare_key(state_or_biome: str, year_start: int, year_end: int) -> Tuple:
+    return ("compare_deforestation", _entity_key(state_or_biome), year_start, year_end)
+
+
+def ranking_key(year: int, order: str = "desc", limit: int = 10, biome: Optional[str] = None, level: str = "state") -> Tuple:
+    return ("get_states_ranking", year, order.lower(), limit, _entity_key(biome) if biome else None, level)
+
+
+def biome_comparison_key(year: int) -> Tuple:
+    return ("get_biome_comparison", year)
+
+
+def overview_key(year: Optional[int] = None, biome: Optional[str] = None, limit: int = 10) -> Tuple:
+    return ("get_overview", year, _entity_key(biome) if biome else None, limit)
+
+
+def forecast_key(entity: str, horizon: int = 3) -> Tuple:
+    return ("get_forecast", _entity_key(entity), horizon)
+
+
+def forecast_table_key(horizon: int = 3, method: str = "linear", biome: Optional[str] = None) -> Tuple:
+    return ("get_forecast_table", horizon, method, _entity_key(biome) if biome else None)
+
+
+def anomalies_key(year: Optional[int] = None, biome: Optional[str] = None, threshold: float = DEFAULT_THRESHOLD, limit: int = 50) -> Tuple:
+    return ("get_anomalies", year, _entity_key(biome) if biome else None, float(threshold), limit)
+
+
+def states_list_key(biome: Optional[str] = None) -> Tuple:
+    return ("get_available_states", _entity_key(biome) if biome else None)
+
+
+def batch_query_key(query: batch.BatchQuery) -> Tuple:
+    """Mesma chave do endpoint individual: lote e chamadas avulsas dividem o cache"""
+    p = query.params
+    if query.type == "state":
+        return state_key(p.state, p.year, p.level)
+    if query.type == "compare":
+        return compare_key(p.state_or_biome, p.year_start, p.year_end)
+    if query.type == "ranking":
+        return ranking_key(p.year, p.order, p.limit, p.biome, p.level)
+    return biome_comparison_key(p.year)
+
+
+# Namespace do cache -> response_model da rota correspondente
+RESPONSE_MODELS = {
+    "get_state_deforestation": StateDeforestationResponse,
+    "compare_deforestation": ComparisonResponse,
+    "get_states_ranking": RankingResponse,
+    "get_biome_comparison": BiomeComparisonResponse,
+    "get_overview": OverviewResponse,
+    "get_forecast": ForecastResponse,
+    "get_forecast_table": ForecastTableResponse,
+    "get_anomalies": AnomaliesResponse,
+    "get_available_states": StatesListResponse,
+    "get_available_years": YearsListResponse,
+    "get_available_biomes": BiomesListResponse,
+    "run_batch": BatchResponse,
+}
+
+
+def finalize(key: Tuple, value: Dict) -> Dict:
+    """
+    Com FAST_SERIALIZATION, valida o resultado contra o response_model uma
+    única vez (antes de ir para o cache) e o converte em tipos JSON; a rota
+    então responde sem revalidar.
+    """
+    model = RESPONSE_MODELS.get(key[0])
+    if not settings.FAST_SERIALIZATION or model is None:
+        return value
+    return model.model_validate(value).model_dump(mode="json")
+
+
+def _batch_item(index: int, query_type: str, data: Optional[Dict] = None, error: Optional[str] = None) -> Dict:
+    return {
+        "index": index,
+        "type": query_type,
+        "status": "error" if error is not None else "ok",
+        "data": data,
+        "error": error
+    }
+
+
 class DeforestationService:
     """Orquestrador que decide qual engine usar"""
     
@@ -22,27 +142,257 @@ class DeforestationService:
         else:
             logger.info("🟢 Usando Direct Mode")
             self.engine = DirectService()
+        
+        self.store = self.engine.store
+        # Faixa de anos dos validadores, rotas e schemas vem do dataset carregado
+        YEARS.configure(self.store.years.tolist())
+        logger.info(f"Anos disponíveis: {YEARS.label}")
+        # Single-flight: chamadas idênticas simultâneas aguardam a mesma computação
+        self._inflight: Dict[Tuple, asyncio.Task] = {}
+        self._flight_stats: Dict[str, Dict[str, int]] = {}
+        self.cache: Optional[TTLCache] = None
+        if settings.ENABLE_CACHE:
+            self.cache = TTLCache(max_size=settings.CACHE_MAX_SIZE, ttl=settings.CACHE_TTL)
+            self._cache_version = self.dataset_version
+            logger.info(f"Cache habilitado (ttl={settings.CACHE_TTL}s, max={settings.CACHE_MAX_SIZE})")
+        
+        self.intents = None
+        if settings.INTENT_ROUTER_ENABLED:
+            from app.agent.intent_router import IntentRouter
+            self.intents = IntentRouter(self.store, settings.INTENT_MIN_CONFIDENCE)
+    
+    @property
+    def dataset_version(self) -> str:
+        """Identifica a versão dos dados servidos (hash do conteúdo do store)"""
+        return self.store.dataset_version
+    
+    @property
+    def last_modified(self) -> datetime:
+        return self.store.updated_at
+    
+    def etag(self, key: Tuple) -> str:
+        """ETag estável para (versão dos dados, requisição normalizada)"""
+        digest = hashlib.sha1(f"{self.dataset_version}|{key!r}".encode("utf-8")).hexdigest()
+        return f'"{digest[:20]}"'
+    
+    def invalidate_cache(self) -> None:
+        if self.cache is not None:
+            self.cache.clear()
+            self._cache_version = self.dataset_version
+    
+    def _cache_get(self, key: Tuple) -> Tuple[bool, Optional[Dict]]:
+        if self.cache is None:
+            return False, None
+        
+        if self._cache_version != self.dataset_version:
+            logger.info(f"Versão dos dados mudou ({self.dataset_version}), invalidando cache")
+            self.invalidate_cache()
+        return self.cache.get(key)
+    
+    def _cache_set(self, key: Tuple, value: Dict) -> None:
+        if self.cache is not None:
+            self.cache.set(key, value)
+    
+    def _count_flight(self, namespace: str, counter: str) -> None:
+        stats = self._flight_stats.get(namespace)
+        if stats is None:
+            stats = self._flight_stats[namespace] = {"computations": 0, "coalesced": 0}
+        stats[counter] += 1
+    
+    async def _compute(self, key: Tuple, compute: Callable[[], Awaitable[Dict]]) -> Dict:
+        try:
+            value = finalize(key, await compute())
+            self._cache_set(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+    
+    async def _cached(self, key: Tuple, compute: Callable[[], Awaitable[Dict]]) -> Dict:
+        """
+        Cache + single-flight: em um miss, a primeira chamada inicia a
+        computação em uma task e as chamadas idênticas que chegam enquanto ela
+        roda aguardam o mesmo resultado (ou a mesma exceção)
+        
+        A task é aguardada com shield: o cancelamento de uma requisição
+        (cliente desconectou) não cancela a computação das demais.
+        """
+        hit, value = self._cache_get(key)
+        if hit:
+            return value
+        
+        task = self._inflight.get(key)
+        if task is None:
+            self._count_flight(key[0], "computations")
+            task = self._inflight[key] = asyncio.ensure_future(self._compute(key, compute))
+            # Evita o aviso de exceção não lida quando todos os chamadores foram cancelados
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        else:
+            self._count_flight(key[0], "coalesced")
+        return await asyncio.shield(task)
     
-    async def get_state_deforestation(self, state: str, year: Optional[int] = None) -> Dict:
-        return await self.engine.get_state_deforestation(state, year)
+    async def get_state_deforestation(self, state: str, year: Optional[int] = None, level: str = "state") -> Dict:
+        key = state_key(state, year, level)
+        return await self._cached(
+            key,
+            lambda: self.engine.get_state_deforestation(state, key[2], level)
+        )
     
     async def compare_deforestation(self, state_or_biome: str, year_start: int, year_end: int) -> Dict:
-        return await self.engine.compare_deforestation(state_or_biome, year_start, year_end)
+        return await self._cached(
+            compare_key(state_or_biome, year_start, year_end),
+            lambda: self.engine.compare_deforestation(state_or_biome, year_start, year_end)
+        )
     
-    async def get_states_ranking(self, year: int, order: str = "desc", limit: int = 10, biome: Optional[str] = None) -> Dict:
-        return await self.engine.get_states_ranking(year, order, limit, biome)
+    async def get_states_ranking(self, year: int, order: str = "desc", limit: int = 10, biome: Optional[str] = None, level: str = "state") -> Dict:
+        return await self._cached(
+            ranking_key(year, order, limit, biome, level),
+            lambda: self.engine.get_states_ranking(year, order, limit, biome, level)
+        )
     
     async def get_biome_comparison(self, year: int) -> Dict:
-        return await self.engine.get_biome_comparison(year)
+        return await self._cached(
+            biome_comparison_key(year),
+            lambda: self.engine.get_biome_comparison(year)
+        )
+    
+    async def get_overview(self, year: Optional[int] = None, biome: Optional[str] = None, limit: int = 10) -> Dict:
+        return await self._cached(
+            overview_key(year, biome, limit),
+            lambda: self.engine.get_overview(year, biome, limit)
+        )
+    
+    async def get_forecast(self, entity: str, horizon: int = 3) -> Dict:
+        return await self._cached(
+            forecast_key(entity, horizon),
+            lambda: self.engine.get_forecast(entity, horizon)
+        )
+    
+    async def get_forecast_table(self, horizon: int = 3, method: str = "linear", biome: Optional[str] = None) -> Dict:
+        return await self._cached(
+            forecast_table_key(horizon, method, biome),
+            lambda: self.engine.get_forecast_table(horizon, method, biome)
+        )
+    
+    async def get_anomalies(
+        self,
+        year: Optional[int] = None,
+        biome: Optional[str] = None,
+        threshold: float = DEFAULT_THRESHOLD,
+        limit: int = 50
+    ) -> Dict:
+        return await self._cached(
+            anomalies_key(year, biome, threshold, limit),
+            lambda: self.engine.get_anomalies(year, biome, threshold, limit)
+        )
     
     async def get_available_states(self, biome: Optional[str] = None) -> Dict:
-        return await self.engine.get_available_states(biome)
+        return await self._cached(
+            states_list_key(biome),
+            lambda: self.engine.get_available_states(biome)
+        )
     
     async def get_available_years(self) -> Dict:
-        return await self.engine.get_available_years()
+        return await self._cached(
+            ("get_available_years",),
+            lambda: self.engine.get_available_years()
+        )
     
     async def get_available_biomes(self) -> Dict:
-        return await self.engine.get_available_biomes()
+        return await self._cached(
+            ("get_available_biomes",),
+            lambda: self.engine.get_available_biomes()
+        )
+    
+    async def answer_question(self, question: str) -> Optional[Dict]:
+        """
+        Responde perguntas estruturadas sem o modelo (intent router)
+        
+        Retorna None quando a pergunta deve seguir para o agente.
+        """
+        if self.intents is None:
+            return None
+        from app.agent.intent_router import INTENT_METHODS, render_answer
+        
+        intent = self.intents.route(question)
+        if intent is None:
+            return None
+        
+        try:
+            data = await getattr(self, INTENT_METHODS[intent.action])(**intent.params)
+        except ValueError as e:
+            logger.info(f"Intent router: {intent.action} sem resposta ({e}), seguindo para o agente")
+            self.intents.fallback(intent)
+            return None
+        return {
+            "answer": render_answer(intent.action, data),
+            "intent": intent.action,
+            "params": intent.params,
+            "confidence": round(intent.confidence, 2)
+        }
+    
+    async def run_batch(self, queries: List[Tuple[str, Dict]]) -> Dict:
+        """
+        Consultas em lote: [(tipo, parâmetros), ...]
+        
+        Itens já em cache são respondidos direto; os demais são executados
+        juntos sobre o store. Erros ficam no próprio item.
+        """
+        results: List[Optional[Dict]] = [None] * len(queries)
+        pending = []
+        
+        for index, (query_type, params) in enumerate(queries):
+            try:
+                query = batch.parse_query(query_type, params)
+            except ValueError as e:
+                results[index] = _batch_item(index, query_type, error=str(e))
+                continue
+            
+            key = batch_query_key(query)
+            hit, value = self._cache_get(key)
+            if hit:
+                results[index] = _batch_item(index, query_type, data=value)
+            else:
+                pending.append((index, key, query))
+        
+        outcomes = batch.execute([query for _, _, query in pending], self.store)
+        for (index, key, query), outcome in zip(pending, outcomes):
+            if isinstance(outcome, ValueError):
+                results[index] = _batch_item(index, query.type, error=str(outcome))
+            elif isinstance(outcome, Exception):
+                results[index] = _batch_item(index, query.type, error="Erro interno ao processar a consulta")
+            else:
+                outcome = finalize(key, outcome)
+                self._cache_set(key, outcome)
+                results[index] = _batch_item(index, query.type, data=outcome)
+        
+        failed = sum(1 for item in results if item["status"] == "error")
+        return finalize(("run_batch",), {
+            "results": results,
+            "total": len(results),
+            "succeeded": len(results) - failed,
+            "failed": failed,
+            "data_source": self.store.data_source,
+            "timestamp": self.store.timestamp
+        })
+    
+    def flight_stats(self) -> Dict:
+        """Computações e chamadas coalescidas por método"""
+        return {
+            "in_flight": len(self._inflight),
+            "methods": {namespace: dict(counters) for namespace, counters in self._flight_stats.items()}
+        }
+    
+    def cache_stats(self) -> Dict:
+        if self.cache is None:
+            stats = {"enabled": False}
+        else:
+            stats = {"enabled": True, "dataset_version": self.dataset_version, **self.cache.stats()}
+        stats["single_flight"] = self.flight_stats()
+        
+        answer_cache = getattr(self.engine, "answer_cache", None)
+        if answer_cache is not None:
+            stats["agent_answers"] = answer_cache.stats()
+        return stats
 
 
 _service_instance: Optional[DeforestationService] = None
@@ -53,3 +403,9 @@ def get_deforestation_service() -> DeforestationService:
     if _service_instance is None:
         _service_instance = DeforestationService()
     return _service_instance
+
+
+async def close_deforestation_service() -> None:
+    """Libera recursos do engine (pool HTTP do Azure Agent)"""
+    if _service_instance is not None and hasattr(_service_instance.engine, "aclose"):
+        await _service_instance.engine.aclose()
@@ -0,0 +1,233 @@
+"""
+Degradation Store - armazenamento colunar dos dados de degradação
+Matriz densa estado × ano (float64) com mapas de índice para estados, biomas e anos
+"""
+from typing import Dict, Iterable, List, Mapping, Optional
+from datetime import datetime
+import hashlib
+
+import numpy as np
+
+from app.services.anomalies import AnomalyIndex
+from app.services.forecast import ForecastIndex
+from app.services.ranking_index import RankingIndex
+
+
+class DegradationStore:
+    """
+    Dados de degradação (km²) em formato colunar
+
+    - values: matriz (n_estados × n_anos), NaN quando não há dado
+    - membership: matriz booleana (n_biomas × n_estados) indicando
+      quais estados pertencem a cada bioma
+    - primary_biome: índice do bioma predominante de cada estado
+    - biome_values: cubo opcional (n_estados × n_biomas × n_anos) com a área
+      de cada estado dentro de cada bioma; quando presente, os totais por
+      bioma são exatos em vez de somar o total dos estados membros
+    """
+
+    def __init__(
+        self,
+        states: List[str],
+        state_codes: List[str],
+        years: Iterable[int],
+        values: np.ndarray,
+        biomes: List[str],
+        membership: np.ndarray,
+        primary_biome: np.ndarray,
+        data_source: str,
+        biome_values: Optional[np.ndarray] = None,
+        updated_at: Optional[datetime] = None
+    ):
+        self.states = list(states)
+        self.state_codes = list(state_codes)
+        self.years = np.asarray(list(years), dtype=np.int64)
+        self.values = np.asarray(values, dtype=np.float64)
+        self.biomes = list(biomes)
+        self.membership = np.asarray(membership, dtype=bool)
+        self.primary_biome = np.asarray(primary_biome, dtype=np.int64)
+        self.data_source = data_source
+        self.biome_values = (
+            None if biome_values is None else np.asarray(biome_values, dtype=np.float64)
+        )
+
+        if self.values.shape != (len(self.states), len(self.years)):
+            raise ValueError(
+                f"Matriz com formato {self.values.shape}, esperado "
+                f"({len(self.states)}, {len(self.years)})"
+            )
+
+        self.state_index: Dict[str, int] = {s: i for i, s in enumerate(self.states)}
+        self.year_index: Dict[int, int] = {int(y): i for i, y in enumerate(self.years)}
+        self.biome_index: Dict[str, int] = {b: i for i, b in enumerate(self.biomes)}
+
+        # Incrementado a cada alteração dos dados (usado para invalidar derivados).
+        # Contador local do processo: para identificar os dados entre workers e
+        # reinícios use dataset_version
+        self.version = 0
+        # Data da fonte (snapshot/arquivo) quando informada, para que todos os
+        # workers anunciem o mesmo Last-Modified
+        self.updated_at = updated_at or datetime.utcnow()
+        self._fingerprint: Optional[str] = None
+        # Nível municipal opcional (HierarchicalAggregator), quando a fonte o fornece
+        self.hierarchy = None
+        # Permutações de ranking, reconstruídas quando a versão muda
+        self.ranking = RankingIndex(self)
+        # Coeficientes de tendência/previsão, idem
+        self.forecast = ForecastIndex(self)
+        # Tabela de anomalias (z-scores robustos), idem
+        self.anomalies = AnomalyIndex(self)
+
+        self.refresh_totals()
+
+    @classmethod
+    def from_mapping(
+        cls,
+        data: Mapping[str, Mapping[int, float]],
+        state_codes: Mapping[str, str],
+        biomes: List[str],
+        states_by_biome: Mapping[str, List[str]],
+        primary_biome: Mapping[str, str],
+        data_source: str,
+        updated_at: Optional[datetime] = None
+    ) -> "DegradationStore":
+        """Constrói o store a partir de um dicionário {estado: {ano: km²}}"""
+        states = list(data.keys())
+        years = sorted({year for series in data.values() for year in series})
+        year_pos = {year: i for i, year in enumerate(years)}
+
+        values = np.full((len(states), len(years)), np.nan, dtype=np.float64)
+        for row, state in enumerate(states):
+            for year, area in data[state].items():
+                values[row, year_pos[year]] = area
+
+        state_pos = {s: i for i, s in enumerate(states)}
+        membership = np.zeros((len(biomes), len(states)), dtype=bool)
+        for b, biome in enumerate(biomes):
+            rows = [state_pos[s] for s in states_by_biome.get(biome, []) if s in state_pos]
+            membership[b, rows] = True
+
+        biome_pos = {b: i for i, b in enumerate(biomes)}
+        primary = np.array([biome_pos[primary_biome[s]] for s in states], dtype=np.int64)
+
+        return cls(
+            states=states,
+            state_codes=[state_codes[s] for s in states],
+            years=years,
+            values=values,
+            biomes=biomes,
+            membership=membership,
+            primary_biome=primary,
+            data_source=data_source,
+            updated_at=updated_at
+        )
+
+    def refresh_totals(self) -> None:
+        """Recalcula os agregados (Brasil e biomas) com reduções vetorizadas"""
+        filled = np.nan_to_num(self.values, nan=0.0)
+        self.brazil_totals: np.ndarray = filled.sum(axis=0)
+        if self.biome_values is not None:
+            self.biome_totals: np.ndarray = self.biome_values.sum(axis=0)
+        else:
+            self.biome_totals = self.membership.astype(np.float64) @ filled
+        self.biome_state_counts: np.ndarray = self.membership.sum(axis=1)
+        self._fingerprint = None
+
+    def apply_delta(self, row: int, col: int, biome: int, delta: float) -> None:
+        """
+        Soma um delta à célula (estado, ano) e propaga para os agregados
+        sem recalcular as matrizes inteiras
+        """
+        self._ensure_writable()
+        current = self.values[row, col]
+        self.values[row, col] = delta if np.isnan(current) else current + delta
+        self.brazil_totals[col] += delta
+
+        if self.biome_values is not None:
+            self.biome_values[row, biome, col] += delta
+            self.biome_totals[biome, col] += delta
+            if not self.membership[biome, row]:
+                self.membership[biome, row] = True
+                self.biome_state_counts[biome] += 1
+        else:
+            self.biome_totals[self.membership[:, row], col] += delta
+
+        self.touch()
+
+    def _ensure_writable(self) -> None:
+        """Copia para memória gravável as matrizes abertas somente leitura (memmap)"""
+        for name in ("values", "membership", "biome_values"):
+            array = getattr(self, name)
+            if array is not None and not array.flags.writeable:
+                setattr(self, name, np.array(array))
+
+    def touch(self) -> None:
+        """Marca os dados como alterados (nova versão)"""
+        self.version += 1
+        self.updated_at = datetime.utcnow()
+        self._fingerprint = None
+
+    @property
+    def fingerprint(self) -> str:
+        """Hash do conteúdo (anos, entidades e matrizes), igual em todo processo com os mesmos dados"""
+        if self._fingerprint is None:
+            digest = hashlib.sha1()
+            digest.update("|".join(self.state_codes + self.biomes).encode("utf-8"))
+            arrays = [self.years, self.values, self.membership]
+            if self.biome_values is not None:
+                arrays.append(self.biome_values)
+            for array in arrays:
+                digest.update(np.ascontiguousarray(array).tobytes())
+            self._fingerprint = digest.hexdigest()[:16]
+        return self._fingerprint
+
+    @property
+    def dataset_version(self) -> str:
+        """Identifica os dados servidos (base de ETags e chaves de cache persistentes)"""
+        return f"{self.data_source}:{self.fingerprint}"
+
+    @property
+    def timestamp(self) -> str:
+        """Momento da última alteração dos dados (estável entre requisições)"""
+        return self.updated_at.isoformat()
+
+    # ==========================================
+    # LOOKUPS
+    # ==========================================
+
+    def state_row(self, state_name: str) -> Optional[int]:
+        return self.state_index.get(state_name)
+
+    def year_col(self, year: int) -> Optional[int]:
+        return self.year_index.get(year)
+
+    def value(self, row: int, year: int) -> float:
+        """Valor de um estado em um ano (NaN se ausente)"""
+        col = self.year_index.get(year)
+        if col is None:
+            return np.nan
+        return self.values[row, col]
+
+    def year_mask(self, year_start: int, year_end: int) -> np.ndarray:
+        """Máscara booleana dos anos dentro do intervalo fechado"""
+        return (self.years >= year_start) & (self.years <= year_end)
+
+    def states_in_biome(self, biome: str) -> np.ndarray:
+        """Índices dos estados pertencentes ao bioma"""
+        return np.flatnonzero(self.membership[self.biome_index[biome]])
+
+    def entity_matrix(self) -> np.ndarray:
+        """Estados, biomas e Brasil empilhados (linhas × anos), nessa ordem"""
+        return np.vstack([self.values, self.biome_totals, self.brazil_totals[None, :]])
+
+    def year_totals(self) -> Dict[int, float]:
+        """Totais do Brasil por ano (dicionário)"""
+        return dict(zip(self.years.tolist(), self.brazil_totals.tolist()))
+
+    def biome_year_totals(self) -> Dict[str, Dict[int, float]]:
+        """Totais por bioma e ano (dicionário)"""
+        years = self.years.tolist()
+        return {
+            biome: dict(zip(years, self.biome_totals[b].tolist()))
+            for b, biome in enumerate(self.biomes)
+        }
@@ -3,13 +3,43 @@ Direct Service - Lógica de desmatamento SEM usar Azure Agent
 """
 from typing import Dict, Optional
 import logging
-from datetime import datetime
 
 from app.config import settings
+from app.services.anomalies import DEFAULT_THRESHOLD
+from app.services.degradation_store import DegradationStore
 
 logger = logging.getLogger(__name__)
 
 
+def load_store() -> DegradationStore:
+    """
+    Store servido pelos engines (Direct e Azure Agent)
+    
+    Dados mock com MOCK_DATA=true; senão o snapshot (DATA_SNAPSHOT_PATH) ou
+    o CSV do PRODES (DATA_SOURCE_PATH). Os índices derivados já saem aquecidos.
+    """
+    from app.services import mock_data_brazil as mock_data
+    
+    if settings.MOCK_DATA:
+        store = mock_data.STORE
+    elif settings.DATA_SNAPSHOT_PATH:
+        from app.services.snapshot import open_snapshot
+        store = open_snapshot(settings.DATA_SNAPSHOT_PATH)
+    elif settings.DATA_SOURCE_PATH:
+        from app.services.prodes_source import load_csv_store
+        store = load_csv_store(settings.DATA_SOURCE_PATH, settings.DATA_CHUNK_SIZE)
+    else:
+        raise RuntimeError(
+            "Configure DATA_SNAPSHOT_PATH ou DATA_SOURCE_PATH (necessário com MOCK_DATA=false)"
+        )
+    
+    store.ranking.warm()
+    store.forecast.warm()
+    store.anomalies.warm()
+    logger.info(f"Fonte de dados: {store.data_source}")
+    return store
+
+
 class DirectService:
     """
     Serviço que implementa as ações diretamente
@@ -20,28 +50,26 @@ class DirectService:
         self.use_mock = settings.MOCK_DATA
         logger.info(f"DirectService inicializado (mock_data={self.use_mock})")
         
-        if self.use_mock:
-            from app.services import mock_data_brazil as mock_data
-            self.mock_data = mock_data
+        from app.services import mock_data_brazil as mock_data
+        self.mock_data = mock_data
+        self.store = load_store()
     
     async def get_state_deforestation(
         self,
         state: str,
-        year: Optional[int] = None
+        year: Optional[int] = None,
+        level: str = "state"
     ) -> Dict:
-        """Ação 1: Consultar desmatamento por estado"""
-        logger.info(f"DirectService.get_state_deforestation: state={state}, year={year}")
+        """Ação 1: Consultar desmatamento por estado (ou município)"""
+        logger.info(f"DirectService.get_state_deforestation: state={state}, year={year}, level={level}")
         
         if year is None:
-            year = datetime.now().year
+            year = int(self.store.years[-1])
         
         try:
-            if self.use_mock:
-                data = self.mock_data.get_state_data(state, year)
-                logger.info(f"Dados retornados (mock): {state} - {year}")
-                return data
-            else:
-                raise NotImplementedError("Integração com API real ainda não implementada")
+            data = self.mock_data.get_state_data(state, year, level, store=self.store)
+            logger.info(f"Dados retornados ({self.store.data_source}): {state} - {year}")
+            return data
         
         except ValueError as e:
             logger.error(f"Erro de validação: {e}")
@@ -63,12 +91,11 @@ class DirectService:
         )
         
         try:
-            if self.use_mock:
-                data = self.mock_data.get_comparison_data(state_or_biome, year_start, year_end)
-                logger.info(f"Comparação retornada (mock): {state_or_biome} {year_start}-{year_end}")
-                return data
-            else:
-                raise NotImplementedError("Integração com API real ainda não implementada")
+            data = self.mock_data.get_comparison_data(
+                state_or_biome, year_start, year_end, store=self.store
+            )
+            logger.info(f"Comparação retornada ({self.store.data_source}): {state_or_biome} {year_start}-{year_end}")
+            return data
         
         except ValueError as e:
             logger.error(f"Erro de validação: {e}")
@@ -82,21 +109,19 @@ class DirectService:
         year: int,
         order: str = "desc",
         limit: int = 10,
-        biome: Optional[str] = None
+        biome: Optional[str] = None,
+        level: str = "state"
     ) -> Dict:
-        """Ação 3: Ranking de estados por desmatamento (com filtro de bioma)"""
+        """Ação 3: Ranking de estados (ou municípios) por desmatamento (com filtro de bioma)"""
         logger.info(
             f"DirectService.get_states_ranking: "
-            f"year={year}, order={order}, limit={limit}, biome={biome}"
+            f"year={year}, order={order}, limit={limit}, biome={biome}, level={level}"
         )
         
         try:
-            if self.use_mock:
-                data = self.mock_data.get_ranking_data(year, order, limit, biome)
-                logger.info(f"Ranking retornado (mock): {year} top {limit}")
-                return data
-            else:
-                raise NotImplementedError("Integração com API real ainda não implementada")
+            data = self.mock_data.get_ranking_data(year, order, limit, biome, level, store=self.store)
+            logger.info(f"Ranking retornado ({self.store.data_source}): {year} top {limit}")
+            return data
         
         except ValueError as e:
             logger.error(f"Erro de validação: {e}")
@@ -110,12 +135,9 @@ class DirectService:
         logger.info(f"DirectService.get_biome_comparison: year={year}")
         
         try:
-            if self.use_mock:
-                data = self.mock_data.get_biome_comparison(year)
-                logger.info(f"Comparação de biomas retornada: {year}")
-                return data
-            else:
-                raise NotImplementedError("Integração com API real ainda não implementada")
+            data = self.mock_data.get_biome_comparison(year, store=self.store)
+            logger.info(f"Comparação de biomas retornada: {year}")
+            return data
         
         except ValueError as e:
             logger.error(f"Erro de validação: {e}")
@@ -124,12 +146,87 @@ class DirectService:
             logger.error(f"Erro ao comparar biomas: {e}")
             raise
     
+    async def get_overview(
+        self,
+        year: Optional[int] = None,
+        biome: Optional[str] = None,
+        limit: int = 10
+    ) -> Dict:
+        """Visão geral: série temporal, ranking e biomas em uma resposta"""
+        logger.info(f"DirectService.get_overview: year={year}, biome={biome}, limit={limit}")
+        
+        try:
+            data = self.mock_data.get_overview_data(year, biome, limit, store=self.store)
+            logger.info(f"Visão geral retornada ({self.store.data_source}): {data['year']}")
+            return data
+        
+        except ValueError as e:
+            logger.error(f"Erro de validação: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Erro ao montar visão geral: {e}")
+            raise
+    
+    async def get_forecast(self, entity: str, horizon: int = 3) -> Dict:
+        """Previsão de um estado, bioma ou do Brasil (linear, log-linear e CAGR)"""
+        logger.info(f"DirectService.get_forecast: entity={entity}, horizon={horizon}")
+        
+        try:
+            data = self.mock_data.get_forecast_data(entity, horizon, store=self.store)
+            logger.info(f"Previsão retornada ({self.store.data_source}): {data['state']} +{horizon}")
+            return data
+        
+        except ValueError as e:
+            logger.error(f"Erro de validação: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Erro ao calcular previsão: {e}")
+            raise
+    
+    async def get_forecast_table(self, horizon: int = 3, method: str = "linear", biome: Optional[str] = None) -> Dict:
+        """Previsão de todos os estados em uma tabela"""
+        logger.info(f"DirectService.get_forecast_table: horizon={horizon}, method={method}, biome={biome}")
+        
+        try:
+            data = self.mock_data.get_forecast_table(horizon, method, biome, store=self.store)
+            logger.info(f"Tabela de previsões retornada ({self.store.data_source}): {data['total']} estados")
+            return data
+        
+        except ValueError as e:
+            logger.error(f"Erro de validação: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Erro ao calcular previsões: {e}")
+            raise
+    
+    async def get_anomalies(
+        self,
+        year: Optional[int] = None,
+        biome: Optional[str] = None,
+        threshold: float = DEFAULT_THRESHOLD,
+        limit: int = 50
+    ) -> Dict:
+        """Anomalias pré-calculadas (z-score robusto e saltos ano a ano)"""
+        logger.info(f"DirectService.get_anomalies: year={year}, biome={biome}, threshold={threshold}")
+        
+        try:
+            data = self.mock_data.get_anomalies_data(year, biome, threshold, limit, store=self.store)
+            logger.info(f"Anomalias retornadas ({self.store.data_source}): {data['total']}")
+            return data
+        
+        except ValueError as e:
+            logger.error(f"Erro de validação: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Erro ao buscar anomalias: {e}")
+            raise
+    
     async def get_available_states(self, biome: Optional[str] = None) -> Dict:
         """Retorna lista de estados disponíveis (com filtro de bioma)"""
         logger.info(f"DirectService.get_available_states: biome={biome}")
         
         try:
-            states = self.mock_data.get_available_states(biome)
+            states = self.mock_data.get_available_states(biome, store=self.store)
             return states
         except Exception as e:
             logger.error(f"Erro ao buscar estados: {e}")
@@ -140,7 +237,7 @@ class DirectService:
         logger.info("DirectService.get_available_years")
         
         try:
-            years = self.mock_data.get_available_years()
+            years = self.mock_data.get_available_years(store=self.store)
             return years
         except Exception as e:
             logger.error(f"Erro ao buscar anos: {e}")
@@ -151,11 +248,11 @@ class DirectService:
         logger.info("DirectService.get_available_biomes")
         
         try:
-            biomes = self.mock_data.get_available_biomes()
+            biomes = self.mock_data.get_available_biomes(store=self.store)
             return {
                 "biomes": biomes,
                 "total": len(biomes),
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": self.store.timestamp
             }
         except Exception as e:
             logger.error(f"Erro ao buscar biomas: {e}")
@@ -0,0 +1,158 @@
+"""
+Entity Resolver - resolução de nomes de estados, biomas, Brasil e municípios
+
+Índice hash sobre nomes, siglas e apelidos com acentos e caixa removidos.
+Consultas exatas são O(1); grafias com erro de digitação caem em uma busca
+por distância de edição, com resultado guardado em um LRU limitado.
+"""
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional
+import unicodedata
+
+
+def fold(text: str) -> str:
+    """Remove acentos, caixa e espaços duplicados"""
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.casefold().split())
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Distância de Levenshtein com corte (retorna max_distance + 1 se exceder)"""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb)
+            ))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+class Entity(NamedTuple):
+    """Entidade resolvida"""
+    kind: str       # "state", "biome", "brasil" ou "municipality"
+    name: str
+    code: str
+    index: int
+    parent: str = ""
+
+    @property
+    def label(self) -> str:
+        return f"{self.name}/{self.parent}" if self.parent else self.name
+
+
+# Grafias alternativas encontradas em exportações e perguntas livres
+BIOME_ALIASES = {
+    "amazonia legal": "Amazônia",
+    "amazon": "Amazônia",
+    "atlantic forest": "Mata Atlântica",
+}
+
+BRAZIL_ALIASES = ["Brasil", "Brazil", "BR"]
+
+# Chaves curtas (siglas) não participam da busca aproximada
+MIN_FUZZY_LENGTH = 4
+
+
+class EntityResolver:
+    """Índice de entidades por chave normalizada"""
+
+    def __init__(self, fuzzy_cache_size: int = 1024):
+        self._index: Dict[str, List[Entity]] = {}
+        self._fuzzy = lru_cache(maxsize=fuzzy_cache_size)(self._fuzzy_lookup)
+
+    @classmethod
+    def for_brazil(cls, states: Dict[str, str], biomes: List[str]) -> "EntityResolver":
+        """Resolver com estados (nome e sigla), biomas e Brasil"""
+        resolver = cls()
+        for index, (code, name) in enumerate(states.items()):
+            entity = Entity("state", name, code, index)
+            resolver.add(name, entity)
+            resolver.add(code, entity)
+
+        for index, biome in enumerate(biomes):
+            resolver.add(biome, Entity("biome", biome, biome[:3].upper(), index))
+        for alias, biome in BIOME_ALIASES.items():
+            index = biomes.index(biome)
+            resolver.add(alias, Entity("biome", biome, biome[:3].upper(), index))
+
+        brazil = Entity("brasil", "Brasil", "BR", 0)
+        for alias in BRAZIL_ALIASES:
+            resolver.add(alias, brazil)
+        return resolver
+
+    def add(self, key: str, entity: Entity) -> None:
+        """Registra uma chave (nome, sigla ou apelido) para a entidade"""
+        bucket = self._index.setdefault(fold(key), [])
+        if entity not in bucket:
+            bucket.append(entity)
+        self._fuzzy.cache_clear()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _fuzzy_lookup(self, key: str) -> tuple:
+        """Entidades com a menor distância de edição (até o limite)"""
+        max_distance = 1 if len(key) <= 6 else 2
+        best, matches = max_distance + 1, []
+        for candidate, entities in self._index.items():
+            if len(candidate) < MIN_FUZZY_LENGTH:
+                continue
+            distance = edit_distance(key, candidate, max_distance)
+            if distance < best:
+                best, matches = distance, list(entities)
+            elif distance == best and distance <= max_distance:
+                matches.extend(e for e in entities if e not in matches)
+        return tuple(matches)
+
+    def lookup(
+        self,
+        text: str,
+        kinds: Optional[Iterable[str]] = None,
+        fuzzy: bool = True
+    ) -> List[Entity]:
+        """Todas as entidades compatíveis com o texto (exato; senão aproximado)"""
+        key = fold(text)
+        allowed = None if kinds is None else set(kinds)
+
+        matches = [e for e in self._index.get(key, []) if allowed is None or e.kind in allowed]
+        if not matches and fuzzy and len(key) >= MIN_FUZZY_LENGTH:
+            matches = [e for e in self._fuzzy(key) if allowed is None or e.kind in allowed]
+        return matches
+
+    def find(
+        self,
+        text: str,
+        kinds: Optional[Iterable[str]] = None,
+        fuzzy: bool = True
+    ) -> Optional[Entity]:
+        """Entidade única compatível com o texto, ou None"""
+        matches = self.lookup(text, kinds, fuzzy)
+        return matches[0] if len(matches) == 1 else None
+
+    def resolve(
+        self,
+        text: str,
+        kinds: Optional[Iterable[str]] = None,
+        fuzzy: bool = True
+    ) -> Entity:
+        """Resolve o texto para uma entidade (ValueError se ausente ou ambíguo)"""
+        matches = self.lookup(text, kinds, fuzzy)
+        if not matches:
+            raise ValueError(f"'{text}' não reconhecido")
+        if len(matches) > 1:
+            options = ", ".join(e.label for e in matches)
+            raise ValueError(f"'{text}' ambíguo. Opções: {options}")
+        return matches[0]
+
+    def cache_info(self):
+        return self._fuzzy.cache_info()
@@ -0,0 +1,199 @@
+"""
+Previsão de tendência - regressões vetorizadas sobre a matriz entidade × ano
+
+Estados, biomas e Brasil formam uma única matriz (linhas × anos); cada
+método é ajustado para todas as linhas de uma vez, com somas mascaradas
+(NaN = sem dado):
+
+- linear: área = a + b·t (mínimos quadrados)
+- log_linear: ln(área) = a + b·t (crescimento percentual constante)
+- cagr: taxa composta entre o primeiro e o último ano com dado
+
+Os intervalos de previsão (95%) vêm dos resíduos de cada ajuste. Os
+coeficientes ficam em cache até a versão do store mudar.
+"""
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+METHODS = ("linear", "log_linear", "cagr")
+CONFIDENCE = 0.95
+# Anos à frente aceitos pelos endpoints
+MAX_HORIZON = 10
+
+# t de Student bicaudal 95% (graus de liberdade 1..30); acima disso, normal
+_T_975 = np.array([
+    12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+    2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+    2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042
+])
+_Z_975 = 1.960
+
+
+def t_critical(df: np.ndarray) -> np.ndarray:
+    """Valor crítico (95%) por linha; NaN sem graus de liberdade"""
+    df = np.asarray(df)
+    critical = np.where(df > len(_T_975), _Z_975, _T_975[np.clip(df, 1, len(_T_975)) - 1])
+    return np.where(df >= 1, critical, np.nan)
+
+
+class Fit(NamedTuple):
+    """Coeficientes por linha (t = ano - primeiro ano do store)"""
+    n: np.ndarray
+    intercept: np.ndarray
+    slope: np.ndarray
+    t_mean: np.ndarray
+    sxx: np.ndarray
+    residual_std: np.ndarray
+    r2: np.ndarray
+
+
+def fit_linear(t: np.ndarray, values: np.ndarray) -> Fit:
+    """Regressão y = a + b·t em cada linha, ignorando NaN"""
+    mask = ~np.isnan(values)
+    n = mask.sum(axis=1)
+    y = np.where(mask, values, 0.0)
+    tt = np.where(mask, t, 0.0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_mean = tt.sum(axis=1) / n
+        y_mean = y.sum(axis=1) / n
+        dt = np.where(mask, t - t_mean[:, None], 0.0)
+        dy = np.where(mask, y - y_mean[:, None], 0.0)
+        sxx = (dt * dt).sum(axis=1)
+        slope = (dt * dy).sum(axis=1) / sxx
+        intercept = y_mean - slope * t_mean
+
+        residuals = np.where(mask, y - (intercept[:, None] + slope[:, None] * t), 0.0)
+        sse = (residuals * residuals).sum(axis=1)
+        sst = (dy * dy).sum(axis=1)
+        residual_std = np.where(n > 2, np.sqrt(sse / (n - 2)), np.nan)
+        r2 = np.where(sst > 0, 1 - sse / sst, np.nan)
+
+    return Fit(n, intercept, slope, t_mean, sxx, residual_std, r2)
+
+
+class Growth(NamedTuple):
+    """Taxa composta por linha, a partir do último ano com dado"""
+    n: np.ndarray
+    rate: np.ndarray
+    base: np.ndarray
+    base_t: np.ndarray
+    residual_std: np.ndarray
+
+
+def fit_cagr(t: np.ndarray, values: np.ndarray) -> Growth:
+    """CAGR entre o primeiro e o último ano com área positiva de cada linha"""
+    mask = ~np.isnan(values) & (values > 0)
+    n = mask.sum(axis=1)
+    rows = np.arange(len(values))
+    first = np.argmax(mask, axis=1)
+    last = mask.shape[1] - 1 - np.argmax(mask[:, ::-1], axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        logs = np.log(np.where(mask, values, 1.0))
+        span = t[last] - t[first]
+        log_rate = np.where(n >= 2, (logs[rows, last] - logs[rows, first]) / span, np.nan)
+        # Resíduos em log em torno da trajetória composta (primeiro e último são exatos)
+        path = logs[rows, first][:, None] + (t - t[first][:, None]) * log_rate[:, None]
+        residuals = np.where(mask, logs - path, 0.0)
+        residual_std = np.where(n > 2, np.sqrt((residuals * residuals).sum(axis=1) / (n - 2)), np.nan)
+
+    return Growth(n, np.expm1(log_rate), np.where(n >= 1, values[rows, last], np.nan), t[last], residual_std)
+
+
+class Projection(NamedTuple):
+    """Previsão (linhas × horizonte) com limites do intervalo"""
+    years: np.ndarray
+    area: np.ndarray
+    lower: np.ndarray
+    upper: np.ndarray
+
+
+def _interval(fit: Fit, rows: np.ndarray, t: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Ponto e meia-largura do intervalo de previsão em cada t futuro"""
+    intercept, slope = fit.intercept[rows, None], fit.slope[rows, None]
+    n, t_mean, sxx = fit.n[rows, None], fit.t_mean[rows, None], fit.sxx[rows, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        spread = np.sqrt(1 + 1 / n + (t - t_mean) ** 2 / sxx)
+    half = t_critical(fit.n[rows] - 2)[:, None] * fit.residual_std[rows, None] * spread
+    return intercept + slope * t, half
+
+
+class ForecastIndex:
+    """
+    Ajustes de tendência para todas as entidades do store
+
+    Linhas: as de store.entity_matrix() (estados, biomas e, por último, Brasil).
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._version: Optional[int] = None
+        self._fits: Dict[str, object] = {}
+
+    def state_row(self, row: int) -> int:
+        return row
+
+    def biome_row(self, biome: int) -> int:
+        return len(self.store.states) + biome
+
+    @property
+    def brazil_row(self) -> int:
+        return len(self.store.states) + len(self.store.biomes)
+
+    def fits(self) -> Dict[str, object]:
+        """Coeficientes dos três métodos (recalculados quando a versão muda)"""
+        if self._version != self.store.version or not self._fits:
+            matrix = self.store.entity_matrix()
+            t = (self.store.years - self.store.years[0]).astype(np.float64)
+            positive = np.where(matrix > 0, matrix, np.nan)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                logs = np.log(positive)
+            self._fits = {
+                "linear": fit_linear(t, matrix),
+                "log_linear": fit_linear(t, logs),
+                "cagr": fit_cagr(t, matrix)
+            }
+            self._version = self.store.version
+        return self._fits
+
+    def warm(self) -> None:
+        self.fits()
+
+    def project(self, rows: np.ndarray, horizon: int) -> Dict[str, Projection]:
+        """Previsões dos três métodos para os `horizon` anos após o último ano do store"""
+        fits = self.fits()
+        rows = np.asarray(rows, dtype=np.int64)
+        last_year = int(self.store.years[-1])
+        years = np.arange(last_year + 1, last_year + horizon + 1)
+        t = (years - self.store.years[0]).astype(np.float64)[None, :]
+
+        point, half = _interval(fits["linear"], rows, t)
+        # Área não fica negativa: a reta é truncada em zero
+        linear = Projection(years, np.maximum(point, 0.0), np.maximum(point - half, 0.0), np.maximum(point + half, 0.0))
+
+        point, half = _interval(fits["log_linear"], rows, t)
+        log_linear = Projection(years, np.exp(point), np.exp(point - half), np.exp(point + half))
+
+        growth: Growth = fits["cagr"]
+        steps = t - growth.base_t[rows, None]
+        area = growth.base[rows, None] * (1 + growth.rate[rows, None]) ** steps
+        # Incerteza cresce com a raiz do número de passos (passeio em log)
+        half = t_critical(growth.n[rows] - 2)[:, None] * growth.residual_std[rows, None] * np.sqrt(steps)
+        cagr = Projection(years, area, area * np.exp(-half), area * np.exp(half))
+
+        return {"linear": linear, "log_linear": log_linear, "cagr": cagr}
+
+    def trend(self, rows: np.ndarray) -> np.ndarray:
+        """
+        Tendência pela inclinação linear: "increasing"/"decreasing" quando o
+        intervalo de 95% da inclinação não contém zero, senão "stable"
+        """
+        fit: Fit = self.fits()["linear"]
+        rows = np.asarray(rows, dtype=np.int64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t_stat = fit.slope[rows] / (fit.residual_std[rows] / np.sqrt(fit.sxx[rows]))
+        critical = t_critical(fit.n[rows] - 2)
+        significant = np.abs(t_stat) > critical
+        return np.where(significant & (t_stat > 0), "increasing", np.where(significant & (t_stat < 0), "decreasing", "stable"))
@@ -0,0 +1,144 @@
+"""
+Agregação hierárquica município → estado → bioma → Brasil
+
+Os municípios (IBGE) são as folhas da hierarquia. Os níveis superiores são
+calculados de baixo para cima com somas agrupadas vetorizadas e mantidos em
+um DegradationStore, que continua servindo as consultas por estado.
+"""
+from typing import List, Optional
+
+import numpy as np
+
+from app.services.degradation_store import DegradationStore
+from app.services.entity_resolver import Entity, EntityResolver
+
+LEVELS = ("state", "municipality")
+
+
+class HierarchicalAggregator:
+    """
+    Matriz município × ano e seus roll-ups
+
+    - values: matriz (n_municípios × n_anos), NaN quando não há dado
+    - municipality_state: índice do estado (no store) de cada município
+    - municipality_biome: índice do bioma predominante de cada município
+
+    O store recebido tem suas matrizes sobrescritas pelos roll-ups (a não ser
+    que já os contenha, como um snapshot: rolled_up=True); a partir daí,
+    update() propaga alterações de um município apenas para as células
+    afetadas (estado, estado × bioma, bioma e Brasil).
+
+    As matrizes recebidas não são copiadas: views somente leitura (memmap)
+    só viram cópias graváveis no primeiro update().
+    """
+
+    def __init__(
+        self,
+        store: DegradationStore,
+        names: List[str],
+        codes: List[str],
+        municipality_state: np.ndarray,
+        municipality_biome: np.ndarray,
+        values: np.ndarray,
+        rolled_up: bool = False
+    ):
+        self.store = store
+        self.names = list(names)
+        self.codes = list(codes)
+        self.municipality_state = np.asarray(municipality_state, dtype=np.int64)
+        self.municipality_biome = np.asarray(municipality_biome, dtype=np.int64)
+        self.values = np.asarray(values, dtype=np.float64)
+
+        if self.values.shape != (len(self.names), len(store.years)):
+            raise ValueError(
+                f"Matriz municipal com formato {self.values.shape}, esperado "
+                f"({len(self.names)}, {len(store.years)})"
+            )
+
+        self._build_index()
+        if not rolled_up:
+            self._roll_up()
+        store.hierarchy = self
+
+    def _build_index(self) -> None:
+        """Resolver por código IBGE, nome e 'nome/UF' (nomes se repetem entre estados)"""
+        self.resolver = EntityResolver()
+        for leaf, (name, code) in enumerate(zip(self.names, self.codes)):
+            uf = self.uf(leaf)
+            entity = Entity("municipality", name, str(code), leaf, uf)
+            self.resolver.add(name, entity)
+            self.resolver.add(f"{name}/{uf}", entity)
+            if code:
+                self.resolver.add(str(code), entity)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def rebuild(self) -> None:
+        """Recalcula todos os níveis a partir das folhas (nova versão do store)"""
+        self._roll_up()
+        self.store.touch()
+
+    def _roll_up(self) -> None:
+        """Substitui as matrizes do store pelas somas agrupadas das folhas"""
+        store = self.store
+        n_states, n_biomes, n_years = len(store.states), len(store.biomes), len(store.years)
+        filled = np.nan_to_num(self.values, nan=0.0)
+        present = ~np.isnan(self.values)
+
+        state_values = np.zeros((n_states, n_years), dtype=np.float64)
+        np.add.at(state_values, self.municipality_state, filled)
+
+        state_present = np.zeros((n_states, n_years), dtype=bool)
+        np.logical_or.at(state_present, self.municipality_state, present)
+
+        biome_values = np.zeros((n_states, n_biomes, n_years), dtype=np.float64)
+        np.add.at(biome_values, (self.municipality_state, self.municipality_biome), filled)
+
+        membership = np.zeros((n_biomes, n_states), dtype=bool)
+        membership[self.municipality_biome, self.municipality_state] = True
+
+        state_values[~state_present] = np.nan
+        store.values = state_values
+        store.biome_values = biome_values
+        store.membership = membership
+        store.refresh_totals()
+
+    def update(self, municipality: str, year: int, area_km2: float) -> None:
+        """Altera o valor de um município e propaga o delta pela hierarquia"""
+        leaf = self.resolve(municipality)
+        col = self.store.year_col(year)
+        if col is None:
+            raise ValueError(f"Ano {year} não disponível")
+
+        if not self.values.flags.writeable:
+            self.values = np.array(self.values)
+        current = self.values[leaf, col]
+        delta = area_km2 - (0.0 if np.isnan(current) else current)
+        self.values[leaf, col] = area_km2
+        self.store.apply_delta(
+            self.municipality_state[leaf],
+            col,
+            self.municipality_biome[leaf],
+            delta
+        )
+
+    def resolve(self, municipality: str) -> int:
+        """Resolve código IBGE, nome ou 'nome/UF' para o índice do município"""
+        key = municipality.strip().replace(" - ", "/").replace(" / ", "/")
+        matches = self.resolver.lookup(key)
+        if not matches:
+            raise ValueError(f"Município '{municipality}' não encontrado")
+        if len(matches) > 1:
+            options = ", ".join(e.label for e in matches)
+            raise ValueError(f"Município '{municipality}' ambíguo. Opções: {options}")
+        return matches[0].index
+
+    def uf(self, leaf: int) -> str:
+        return self.store.state_codes[self.municipality_state[leaf]]
+
+    def in_biome(self, biome: Optional[str]) -> np.ndarray:
+        """Índices dos municípios (todos ou apenas do bioma)"""
+        if biome is None:
+            return np.arange(len(self.names))
+        return np.flatnonzero(self.municipality_biome == self.store.biome_index[biome])
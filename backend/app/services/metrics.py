@@ -0,0 +1,207 @@
+"""
+Métricas - histogramas de buckets fixos e exposição no formato Prometheus
+
+Cada observação custa uma busca binária nos limites e três somas; os
+percentis são estimados por interpolação dentro do bucket, como no
+Prometheus (histogram_quantile).
+
+As requisições HTTP são medidas por um middleware ASGI puro (sem
+BaseHTTPMiddleware), rotuladas pelo template da rota ("/api/deforestation/state/{state}")
+para manter a cardinalidade limitada.
+"""
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+import time
+
+# Limites padrão (o último bucket, +Inf, é implícito)
+LATENCY_MS_BUCKETS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+COUNT_BUCKETS = (0, 1, 2, 3, 4, 6, 8, 12)
+HTTP_SECONDS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# Requisições que não casaram com nenhuma rota (evita um rótulo por URL)
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class Histogram:
+    """Histograma cumulativo (contagem por limite superior, soma e máximo)"""
+
+    def __init__(self, buckets: Iterable[float] = LATENCY_MS_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts: List[int] = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Percentil estimado (interpolação linear no bucket)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for i, bucket_count in enumerate(self.counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - cumulative) / bucket_count, self.max)
+            cumulative += bucket_count
+        return self.max
+
+    def cumulative(self) -> List[int]:
+        """Contagens acumuladas por limite (o último item é o total, +Inf)"""
+        totals, running = [], 0
+        for bucket_count in self.counts:
+            running += bucket_count
+            totals.append(running)
+        return totals
+
+    def snapshot(self) -> Dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 3),
+            "avg": round(self.sum / self.count, 3) if self.count else 0.0,
+            "p50": round(self.quantile(0.5), 3),
+            "p95": round(self.quantile(0.95), 3),
+            "p99": round(self.quantile(0.99), 3),
+            "max": round(self.max, 3),
+            "buckets": {
+                **{str(bound): total for bound, total in zip(self.buckets, self.cumulative())},
+                "+Inf": self.count
+            }
+        }
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def format_metric(name: str, kind: str, help_text: str, samples: List[Tuple[Dict[str, str], float]]) -> List[str]:
+    """Linhas de um counter ou gauge no formato texto do Prometheus (0.0.4)"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples)
+    return lines
+
+
+def format_histogram(name: str, help_text: str, samples: List[Tuple[Dict[str, str], Histogram]]) -> List[str]:
+    """Linhas de um histograma (_bucket cumulativo, _sum e _count)"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for labels, histogram in samples:
+        for bound, total in zip(histogram.buckets, histogram.cumulative()):
+            lines.append(f"{name}_bucket{_format_labels({**labels, 'le': _format_value(bound)})} {total}")
+        lines.append(f"{name}_bucket{_format_labels({**labels, 'le': '+Inf'})} {histogram.count}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(histogram.sum)}")
+        lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+    return lines
+
+
+class HTTPMetrics:
+    """Latência por rota, requisições por status e requisições em andamento"""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.responses: Dict[Tuple[str, str, int], int] = {}
+
+    def record(self, method: str, route: str, status: int, seconds: float) -> None:
+        key = (method, route)
+        histogram = self.latency.get(key)
+        if histogram is None:
+            histogram = self.latency[key] = Histogram(HTTP_SECONDS_BUCKETS)
+        histogram.observe(seconds)
+
+        status_key = (method, route, status)
+        self.responses[status_key] = self.responses.get(status_key, 0) + 1
+
+    def render(self) -> List[str]:
+        return [
+            *format_metric(
+                "observa_http_requests_in_flight", "gauge",
+                "Requisições HTTP em andamento",
+                [({}, self.in_flight)]
+            ),
+            *format_metric(
+                "observa_http_responses_total", "counter",
+                "Respostas HTTP por rota e status",
+                [
+                    ({"method": method, "route": route, "status": str(status)}, total)
+                    for (method, route, status), total in sorted(self.responses.items())
+                ]
+            ),
+            *format_histogram(
+                "observa_http_request_duration_seconds",
+                "Latência das requisições HTTP por rota",
+                [
+                    ({"method": method, "route": route}, histogram)
+                    for (method, route), histogram in sorted(self.latency.items())
+                ]
+            ),
+        ]
+
+
+HTTP_METRICS = HTTPMetrics()
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que registra latência, status e requisições em andamento
+
+    O template da rota vem do endpoint que o roteador grava no scope; o mapa
+    endpoint -> template é montado uma vez a partir das rotas do app.
+    """
+
+    def __init__(self, app, metrics: HTTPMetrics = HTTP_METRICS):
+        self.app = app
+        self.metrics = metrics
+        self._routes: Optional[Dict] = None
+
+    def _route_template(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        if self._routes is None:
+            self._routes = {
+                getattr(route, "endpoint", None): route.path
+                for route in scope["app"].routes
+                if hasattr(route, "path")
+            }
+        return self._routes.get(endpoint, UNMATCHED_ROUTE)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics = self.metrics
+        metrics.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.in_flight -= 1
+            metrics.record(scope["method"], self._route_template(scope), status, time.perf_counter() - started)
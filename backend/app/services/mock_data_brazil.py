@@ -2,8 +2,17 @@
 Dados mockados completos - TODOS os biomas brasileiros
 Baseados em dados aproximados de desmatamento/degradação
 """
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple, Union
 from datetime import datetime
+import os
+
+import numpy as np
+
+from app.services.degradation_store import DegradationStore
+from app.services.entity_resolver import EntityResolver
+from app.services.anomalies import DEFAULT_THRESHOLD
+from app.services.forecast import CONFIDENCE, MAX_HORIZON, METHODS
+from app.services.hierarchy import LEVELS
 
 # ==========================================
 # DEFINIÇÕES DE BIOMAS E ESTADOS
@@ -139,46 +148,61 @@ DEGRADATION_DATA: Dict[str, Dict[int, float]] = {
 }
 
 
-BRAZIL_TOTAL: Dict[int, float] = {
-    2020: sum(data.get(2020, 0) for data in DEGRADATION_DATA.values()),
-    2021: sum(data.get(2021, 0) for data in DEGRADATION_DATA.values()),
-    2022: sum(data.get(2022, 0) for data in DEGRADATION_DATA.values()),
-    2023: sum(data.get(2023, 0) for data in DEGRADATION_DATA.values()),
-    2024: sum(data.get(2024, 0) for data in DEGRADATION_DATA.values()),
-}
+# ==========================================
+# STORE COLUNAR (estado × ano)
+# ==========================================
+
+STORE = DegradationStore.from_mapping(
+    DEGRADATION_DATA,
+    state_codes=STATE_CODES,
+    biomes=BIOMES,
+    states_by_biome=STATES_BY_BIOME,
+    primary_biome=STATE_PRIMARY_BIOME,
+    data_source="MOCK_DATA_BRAZIL",
+    # Os dados vêm deste arquivo: a data dele é o Last-Modified do mock
+    updated_at=datetime.utcfromtimestamp(os.path.getmtime(__file__))
+)
+
+BRAZIL_TOTAL: Dict[int, float] = STORE.year_totals()
+
+BIOME_TOTALS: Dict[str, Dict[int, float]] = STORE.biome_year_totals()
+
+# Resolução O(1) de estados, biomas e Brasil (com acentos/caixa normalizados)
+RESOLVER = EntityResolver.for_brazil(ALL_STATES, BIOMES)
 
 
-BIOME_TOTALS: Dict[str, Dict[int, float]] = {}
-for biome in BIOMES:
-    BIOME_TOTALS[biome] = {}
-    for year in [2020, 2021, 2022, 2023, 2024]:
-        total = 0
-        for state in STATES_BY_BIOME.get(biome, []):
-            total += DEGRADATION_DATA.get(state, {}).get(year, 0)
-        BIOME_TOTALS[biome][year] = total
+def resolve_biome(biome: str) -> Optional[str]:
+    """Nome canônico do bioma, ou None se não reconhecido"""
+    entity = RESOLVER.find(biome, kinds=("biome",))
+    return entity.name if entity else None
 
 
 # ==========================================
 # FUNÇÕES DE CONSULTA
 # ==========================================
 
-def get_state_data(state: str, year: int) -> Dict:
-    """Retorna dados de um estado específico"""
-    state_name = normalize_state_name(state)
-    
-    if state_name not in DEGRADATION_DATA:
-        raise ValueError(f"Estado '{state}' não encontrado")
-    
-    if year not in DEGRADATION_DATA[state_name]:
-        raise ValueError(f"Ano {year} não disponível. Anos: 2020-2024")
-    
-    area_km2 = DEGRADATION_DATA[state_name][year]
-    total_brazil = BRAZIL_TOTAL[year]
-    percentage = (area_km2 / total_brazil) * 100
-    
-    previous_year = year - 1
-    previous_area = DEGRADATION_DATA[state_name].get(previous_year, 0)
-    
+def _years_label(store: DegradationStore) -> str:
+    return f"{int(store.years[0])}-{int(store.years[-1])}"
+
+
+def _require_hierarchy(store: DegradationStore):
+    if store.hierarchy is None:
+        raise ValueError("Dados municipais não disponíveis na fonte de dados atual")
+    return store.hierarchy
+
+
+def _check_level(level: str) -> None:
+    if level not in LEVELS:
+        raise ValueError(f"Nível '{level}' inválido. Níveis: {', '.join(LEVELS)}")
+
+
+def _previous_year_comparison(series: np.ndarray, store: DegradationStore, year: int, area_km2: float) -> Dict:
+    col = store.year_col(year - 1)
+    previous_area = float(np.nan_to_num(series[col])) if col is not None else 0.0
+    return _change_from_previous(year - 1, previous_area, area_km2)
+
+
+def _change_from_previous(previous_year: int, previous_area: float, area_km2: float) -> Dict:
     if previous_area > 0:
         change_km2 = area_km2 - previous_area
         change_percentage = ((area_km2 - previous_area) / previous_area) * 100
@@ -187,73 +211,194 @@ def get_state_data(state: str, year: int) -> Dict:
         change_percentage = 0
     
     return {
-        "state": state_name,
-        "state_code": STATE_CODES[state_name],
+        "year": previous_year,
+        "area_km2": round(previous_area, 2) if previous_area > 0 else None,
+        "change_km2": round(change_km2, 2),
+        "change_percentage": round(change_percentage, 2)
+    }
+
+
+def _get_municipality_data(municipality: str, year: int, store: DegradationStore) -> Dict:
+    hierarchy = _require_hierarchy(store)
+    leaf = hierarchy.resolve(municipality)
+    
+    col = store.year_col(year)
+    area_km2 = np.nan if col is None else hierarchy.values[leaf, col]
+    if np.isnan(area_km2):
+        raise ValueError(f"Ano {year} não disponível. Anos: {_years_label(store)}")
+    
+    area_km2 = float(area_km2)
+    total_brazil = float(store.brazil_totals[col])
+    
+    return {
+        "state": hierarchy.names[leaf],
+        "state_code": hierarchy.codes[leaf],
+        "level": "municipality",
+        "uf": hierarchy.uf(leaf),
         "year": year,
         "area_km2": round(area_km2, 2),
-        "percentage_of_total": round(percentage, 2),
-        "biome": STATE_PRIMARY_BIOME[state_name],
-        "comparison_previous_year": {
-            "year": previous_year,
-            "area_km2": round(previous_area, 2) if previous_area > 0 else None,
-            "change_km2": round(change_km2, 2),
-            "change_percentage": round(change_percentage, 2)
-        },
-        "data_source": "MOCK_DATA_BRAZIL",
-        "timestamp": datetime.utcnow().isoformat()
+        "percentage_of_total": round((area_km2 / total_brazil) * 100, 2),
+        "biome": store.biomes[hierarchy.municipality_biome[leaf]],
+        "comparison_previous_year": _previous_year_comparison(
+            hierarchy.values[leaf], store, year, area_km2
+        ),
+        "data_source": store.data_source,
+        "timestamp": store.timestamp
+    }
+
+
+def _state_response(store: DegradationStore, row: int, col: int, area_km2: float, previous_area: float) -> Dict:
+    """Dicionário de resposta de um estado em um ano (coluna)"""
+    year = int(store.years[col])
+    total_brazil = float(store.brazil_totals[col])
+    return {
+        "state": store.states[row],
+        "state_code": store.state_codes[row],
+        "level": "state",
+        "year": year,
+        "area_km2": round(area_km2, 2),
+        "percentage_of_total": round((area_km2 / total_brazil) * 100, 2),
+        "biome": store.biomes[store.primary_biome[row]],
+        "comparison_previous_year": _change_from_previous(year - 1, previous_area, area_km2),
+        "data_source": store.data_source,
+        "timestamp": store.timestamp
     }
 
 
-def get_comparison_data(state_or_biome: str, year_start: int, year_end: int) -> Dict:
+def get_state_data(
+    state: str,
+    year: int,
+    level: str = "state",
+    store: Optional[DegradationStore] = None
+) -> Dict:
+    """Retorna dados de um estado (ou município, com level="municipality")"""
+    store = store or STORE
+    _check_level(level)
+    if level == "municipality":
+        return _get_municipality_data(state, year, store)
+    
+    state_name = normalize_state_name(state)
+    
+    row = store.state_row(state_name)
+    if row is None:
+        raise ValueError(f"Estado '{state}' não encontrado")
+    
+    area_km2 = store.value(row, year)
+    if np.isnan(area_km2):
+        raise ValueError(f"Ano {year} não disponível. Anos: {_years_label(store)}")
+    
+    col = store.year_index[year]
+    previous_col = store.year_col(year - 1)
+    previous_area = float(np.nan_to_num(store.values[row, previous_col])) if previous_col is not None else 0.0
+    return _state_response(store, row, col, float(area_km2), previous_area)
+
+
+def get_state_data_many(
+    queries: List[Tuple[str, int]],
+    store: Optional[DegradationStore] = None
+) -> List[Union[Dict, ValueError]]:
+    """
+    Várias consultas (estado, ano) no nível estadual
+
+    Resolve nomes e anos individualmente e lê todas as células (ano e ano
+    anterior) com uma única indexação da matriz. Cada posição do resultado
+    traz o dicionário de get_state_data ou o ValueError da consulta.
+    """
+    store = store or STORE
+    results: List[Union[Dict, ValueError]] = [None] * len(queries)
+    positions, rows, cols, previous_cols = [], [], [], []
+    
+    for position, (state, year) in enumerate(queries):
+        try:
+            row = store.state_row(normalize_state_name(state))
+            if row is None:
+                raise ValueError(f"Estado '{state}' não encontrado")
+            col = store.year_col(year)
+            if col is None:
+                raise ValueError(f"Ano {year} não disponível. Anos: {_years_label(store)}")
+        except ValueError as e:
+            results[position] = e
+            continue
+        previous_col = store.year_col(year - 1)
+        positions.append(position)
+        rows.append(row)
+        cols.append(col)
+        previous_cols.append(-1 if previous_col is None else previous_col)
+    
+    if not positions:
+        return results
+    
+    rows, cols, previous_cols = np.array(rows), np.array(cols), np.array(previous_cols)
+    current = store.values[rows, cols]
+    previous = np.where(previous_cols >= 0, np.nan_to_num(store.values[rows, previous_cols]), 0.0)
+    
+    for i, position in enumerate(positions):
+        year = int(store.years[cols[i]])
+        if np.isnan(current[i]):
+            results[position] = ValueError(f"Ano {year} não disponível. Anos: {_years_label(store)}")
+            continue
+        results[position] = _state_response(store, rows[i], cols[i], float(current[i]), float(previous[i]))
+    return results
+
+
+def get_comparison_data(
+    state_or_biome: str,
+    year_start: int,
+    year_end: int,
+    store: Optional[DegradationStore] = None
+) -> Dict:
     """Compara dados entre períodos (estado ou bioma)"""
+    store = store or STORE
     if year_start >= year_end:
         raise ValueError("Ano inicial deve ser menor que ano final")
     
-    if state_or_biome.upper() in ["BRASIL", "BRAZIL"]:
-        data_points = []
-        for year in range(year_start, year_end + 1):
-            if year in BRAZIL_TOTAL:
-                data_points.append({
-                    "year": year,
-                    "area_km2": round(BRAZIL_TOTAL[year], 2)
-                })
-        
+    try:
+        entity = RESOLVER.resolve(state_or_biome, kinds=("brasil", "biome", "state"))
+    except ValueError:
+        raise ValueError(f"Estado ou bioma '{state_or_biome}' não reconhecido")
+    
+    if entity.kind == "brasil":
+        series = store.brazil_totals
         entity_name = "Brasil"
         entity_code = "BR"
         biome = "Todos os biomas"
     
-    elif state_or_biome.title() in BIOMES or state_or_biome.upper() in [b.upper() for b in BIOMES]:
-        biome_name = next((b for b in BIOMES if b.upper() == state_or_biome.upper()), state_or_biome.title())
-        
-        data_points = []
-        for year in range(year_start, year_end + 1):
-            if year in BIOME_TOTALS.get(biome_name, {}):
-                data_points.append({
-                    "year": year,
-                    "area_km2": round(BIOME_TOTALS[biome_name][year], 2)
-                })
-        
+    elif entity.kind == "biome":
+        biome_name = entity.name
+        series = store.biome_totals[store.biome_index[biome_name]]
         entity_name = biome_name
-        entity_code = biome_name[:3].upper()
+        entity_code = entity.code
         biome = biome_name
     
     else:
-        state_name = normalize_state_name(state_or_biome)
+        state_name = entity.name
         
-        if state_name not in DEGRADATION_DATA:
+        row = store.state_row(state_name)
+        if row is None:
             raise ValueError(f"Estado ou bioma '{state_or_biome}' não encontrado")
         
-        data_points = []
-        for year in range(year_start, year_end + 1):
-            if year in DEGRADATION_DATA[state_name]:
-                data_points.append({
-                    "year": year,
-                    "area_km2": round(DEGRADATION_DATA[state_name][year], 2)
-                })
-        
+        series = store.values[row]
         entity_name = state_name
-        entity_code = STATE_CODES[state_name]
-        biome = STATE_PRIMARY_BIOME[state_name]
+        entity_code = store.state_codes[row]
+        biome = store.biomes[store.primary_biome[row]]
+    
+    return _series_comparison(store, series, entity_name, entity_code, biome, year_start, year_end)
+
+
+def _series_comparison(
+    store: DegradationStore,
+    series: np.ndarray,
+    entity_name: str,
+    entity_code: str,
+    biome: str,
+    year_start: int,
+    year_end: int
+) -> Dict:
+    mask = store.year_mask(year_start, year_end) & ~np.isnan(series)
+    data_points = [
+        {"year": year, "area_km2": round(area, 2)}
+        for year, area in zip(store.years[mask].tolist(), series[mask].tolist())
+    ]
     
     if not data_points:
         raise ValueError(f"Sem dados para o período {year_start}-{year_end}")
@@ -280,95 +425,461 @@ def get_comparison_data(state_or_biome: str, year_start: int, year_end: int) ->
         "total_change_km2": round(total_change_km2, 2),
         "percentage_change": round(percentage_change, 2),
         "trend": trend,
-        "data_source": "MOCK_DATA_BRAZIL",
-        "timestamp": datetime.utcnow().isoformat()
+        "data_source": store.data_source,
+        "timestamp": store.timestamp
     }
 
 
-def get_ranking_data(year: int, order: str = "desc", limit: int = 10, biome: Optional[str] = None) -> Dict:
-    """Retorna ranking de estados"""
-    if year not in BRAZIL_TOTAL:
-        raise ValueError(f"Ano {year} não disponível. Anos: 2020-2024")
+def get_ranking_data(
+    year: int,
+    order: str = "desc",
+    limit: int = 10,
+    biome: Optional[str] = None,
+    level: str = "state",
+    store: Optional[DegradationStore] = None
+) -> Dict:
+    """Retorna ranking de estados (ou municípios, com level="municipality")"""
+    store = store or STORE
+    _check_level(level)
+    col = store.year_col(year)
+    if col is None:
+        raise ValueError(f"Ano {year} não disponível. Anos: {_years_label(store)}")
     
-    states_data = []
-    states_to_include = DEGRADATION_DATA.keys()
+    biome_title = resolve_biome(biome) if biome else None
+    total_brazil = float(store.brazil_totals[col])
     
-    if biome:
-        biome_title = next((b for b in BIOMES if b.upper() == biome.upper()), None)
-        if biome_title:
-            states_to_include = [s for s in states_to_include if s in STATES_BY_BIOME.get(biome_title, [])]
-    
-    for state_name in states_to_include:
-        if year in DEGRADATION_DATA[state_name]:
-            area_km2 = DEGRADATION_DATA[state_name][year]
-            percentage = (area_km2 / BRAZIL_TOTAL[year]) * 100
-            
-            states_data.append({
-                "state": state_name,
-                "state_code": STATE_CODES[state_name],
+    return {
+        "year": year,
+        "total_brazil_km2": round(total_brazil, 2),
+        "order": order,
+        "biome_filter": biome_title or biome,
+        "level": level,
+        "ranking": _ranking_entries(store, col, order, limit, biome_title, level),
+        "data_source": store.data_source,
+        "timestamp": store.timestamp
+    }
+
+
+def _ranking_entries(
+    store: DegradationStore,
+    col: int,
+    order: str,
+    limit: int,
+    biome_title: Optional[str],
+    level: str
+) -> List[Dict]:
+    total_brazil = float(store.brazil_totals[col])
+    ranking = []
+    
+    if level == "municipality":
+        hierarchy = _require_hierarchy(store)
+        rows = store.ranking.top(col, order, limit, level, biome_title)
+        areas = hierarchy.values[rows, col]
+        for position, (leaf, area_km2) in enumerate(zip(rows.tolist(), areas.tolist()), 1):
+            ranking.append({
+                "position": position,
+                "state": hierarchy.names[leaf],
+                "state_code": hierarchy.codes[leaf],
+                "uf": hierarchy.uf(leaf),
                 "area_km2": round(area_km2, 2),
-                "percentage_of_total": round(percentage, 2),
-                "biome": STATE_PRIMARY_BIOME[state_name]
+                "percentage_of_total": round((area_km2 / total_brazil) * 100, 2),
+                "biome": store.biomes[hierarchy.municipality_biome[leaf]]
             })
+    else:
+        rows = store.ranking.top(col, order, limit, level, biome_title)
+        areas = store.values[rows, col]
+        for position, (row, area_km2) in enumerate(zip(rows.tolist(), areas.tolist()), 1):
+            ranking.append({
+                "position": position,
+                "state": store.states[row],
+                "state_code": store.state_codes[row],
+                "area_km2": round(area_km2, 2),
+                "percentage_of_total": round((area_km2 / total_brazil) * 100, 2),
+                "biome": store.biomes[store.primary_biome[row]]
+            })
+    return ranking
+
+
+def get_biome_comparison(year: int, store: Optional[DegradationStore] = None) -> Dict:
+    """Compara todos os biomas em um ano específico"""
+    store = store or STORE
+    col = store.year_col(year)
+    if col is None:
+        raise ValueError(f"Ano {year} não disponível")
     
-    reverse = (order.lower() == "desc")
-    states_data.sort(key=lambda x: x["area_km2"], reverse=reverse)
-    
-    ranking = []
-    for i, state_data in enumerate(states_data[:limit], 1):
-        ranking.append({
-            "position": i,
-            **state_data
-        })
+    total_brazil = float(store.brazil_totals[col])
     
     return {
         "year": year,
-        "total_brazil_km2": round(BRAZIL_TOTAL[year], 2),
-        "order": order,
-        "biome_filter": biome,
-        "ranking": ranking,
-        "data_source": "MOCK_DATA_BRAZIL",
-        "timestamp": datetime.utcnow().isoformat()
+        "total_brazil_km2": round(total_brazil, 2),
+        "biomes": _biome_entries(store, col),
+        "data_source": store.data_source,
+        "timestamp": store.timestamp
     }
 
 
-def get_biome_comparison(year: int) -> Dict:
-    """Compara todos os biomas em um ano específico"""
-    if year not in BRAZIL_TOTAL:
-        raise ValueError(f"Ano {year} não disponível")
+def _biome_entries(store: DegradationStore, col: int) -> List[Dict]:
+    totals = store.biome_totals[:, col]
+    percentages = totals / store.brazil_totals[col] * 100
+    
+    return [
+        {
+            "biome": store.biomes[b],
+            "area_km2": round(totals[b].item(), 2),
+            "percentage_of_total": round(percentages[b].item(), 2),
+            "num_states": int(store.biome_state_counts[b])
+        }
+        for b in np.argsort(-totals, kind="stable").tolist()
+    ]
+
+
+def get_overview_data(
+    year: Optional[int] = None,
+    biome: Optional[str] = None,
+    limit: int = 10,
+    store: Optional[DegradationStore] = None
+) -> Dict:
+    """
+    Visão geral para dashboard/analytics: série temporal, ranking e biomas
+    
+    A série do Brasil (ou do bioma filtrado), o ranking e a divisão por bioma
+    saem do mesmo ano resolvido e dos totais por ano já agregados no store.
+    Cada parte tem o mesmo formato do endpoint individual correspondente;
+    no primeiro ano da série a comparação é None.
+    """
+    store = store or STORE
+    year = int(store.years[-1]) if year is None else year
+    col = store.year_col(year)
+    if col is None:
+        raise ValueError(f"Ano {year} não disponível. Anos: {_years_label(store)}")
+    
+    # No primeiro ano não há período a comparar (year_end > year_start)
+    first_year = int(store.years[0])
+    if biome:
+        entity = RESOLVER.find(biome, kinds=("biome",))
+        if entity is None:
+            raise ValueError(f"Bioma '{biome}' não reconhecido")
+        biome_title = entity.name
+        series = store.biome_totals[store.biome_index[biome_title]]
+        comparison = None if year <= first_year else _series_comparison(
+            store, series, biome_title, entity.code, biome_title, first_year, year
+        )
+    else:
+        biome_title = None
+        comparison = None if year <= first_year else _series_comparison(
+            store, store.brazil_totals, "Brasil", "BR", "Todos os biomas", first_year, year
+        )
+    
+    total_brazil = round(float(store.brazil_totals[col]), 2)
+    header = {"year": year, "total_brazil_km2": total_brazil}
+    footer = {"data_source": store.data_source, "timestamp": store.timestamp}
+    
+    return {
+        **header,
+        "biome_filter": biome_title,
+        "comparison": comparison,
+        "ranking": {
+            **header,
+            "order": "desc",
+            "biome_filter": biome_title,
+            "level": "state",
+            "ranking": _ranking_entries(store, col, "desc", limit, biome_title, "state"),
+            **footer
+        },
+        "biomes": {
+            **header,
+            "biomes": _biome_entries(store, col),
+            **footer
+        },
+        **footer
+    }
+
+
+def _rounded(value: float, digits: int = 2) -> Optional[float]:
+    """Arredonda; NaN/inf (ajuste sem dados suficientes) vira None"""
+    return round(float(value), digits) if np.isfinite(value) else None
+
+
+def _rounded_list(values: np.ndarray, digits: int = 2) -> List[Optional[float]]:
+    """Versão vetorizada de _rounded"""
+    values = np.round(np.where(np.isfinite(values), values, np.nan), digits)
+    return [None if value != value else value for value in values.tolist()]
+
+
+def _check_forecast(horizon: int, method: Optional[str] = None) -> None:
+    if not 1 <= horizon <= MAX_HORIZON:
+        raise ValueError(f"Horizonte deve estar entre 1 e {MAX_HORIZON} anos")
+    if method is not None and method not in METHODS:
+        raise ValueError(f"Método '{method}' inválido. Métodos: {', '.join(METHODS)}")
+
+
+def get_forecast_data(
+    entity_name: str,
+    horizon: int = 3,
+    store: Optional[DegradationStore] = None
+) -> Dict:
+    """
+    Previsão de um estado, bioma ou do Brasil pelos três métodos
+    
+    Os coeficientes vêm do ForecastIndex do store (ajustados para todas as
+    entidades de uma vez); aqui só se escolhe a linha e se formata a saída.
+    """
+    store = store or STORE
+    _check_forecast(horizon)
     
-    biome_data = []
-    for biome in BIOMES:
-        total = BIOME_TOTALS[biome][year]
-        percentage = (total / BRAZIL_TOTAL[year]) * 100
+    try:
+        entity = RESOLVER.resolve(entity_name, kinds=("brasil", "biome", "state"))
+    except ValueError:
+        raise ValueError(f"Estado ou bioma '{entity_name}' não reconhecido")
+    
+    index = store.forecast
+    if entity.kind == "brasil":
+        row, name, code, biome = index.brazil_row, "Brasil", "BR", "Todos os biomas"
+        series = store.brazil_totals
+    elif entity.kind == "biome":
+        b = store.biome_index[entity.name]
+        row, name, code, biome = index.biome_row(b), entity.name, entity.code, entity.name
+        series = store.biome_totals[b]
+    else:
+        state_row = store.state_row(entity.name)
+        if state_row is None:
+            raise ValueError(f"Estado ou bioma '{entity_name}' não encontrado")
+        row, name, code = index.state_row(state_row), entity.name, store.state_codes[state_row]
+        biome = store.biomes[store.primary_biome[state_row]]
+        series = store.values[state_row]
+    
+    fits = index.fits()
+    linear, log_linear, growth = fits["linear"], fits["log_linear"], fits["cagr"]
+    if linear.n[row] < 2:
+        raise ValueError(f"Dados insuficientes para prever '{name}' (mínimo de 2 anos)")
+    
+    projections = index.project(np.array([row]), horizon)
+    
+    def points(method: str) -> List[Dict]:
+        projection = projections[method]
+        return [
+            {"year": year, "area_km2": area, "lower_km2": lower, "upper_km2": upper}
+            for year, area, lower, upper in zip(
+                projection.years.tolist(), _rounded_list(projection.area[0]),
+                _rounded_list(projection.lower[0]), _rounded_list(projection.upper[0])
+            )
+        ]
+    
+    present = ~np.isnan(series)
+    return {
+        "state": name,
+        "state_code": code,
+        "biome": biome,
+        "base_year": int(store.years[-1]),
+        "horizon": horizon,
+        "confidence": CONFIDENCE,
+        "observations": int(linear.n[row]),
+        "data": [
+            {"year": year, "area_km2": round(area, 2)}
+            for year, area in zip(store.years[present].tolist(), series[present].tolist())
+        ],
+        "trend": str(index.trend(np.array([row]))[0]),
+        "models": {
+            "linear": {
+                "slope_km2_per_year": _rounded(linear.slope[row]),
+                "r2": _rounded(linear.r2[row], 4),
+                "residual_std_km2": _rounded(linear.residual_std[row]),
+                "projections": points("linear")
+            },
+            "log_linear": {
+                "growth_rate_pct": _rounded(np.expm1(log_linear.slope[row]) * 100),
+                "r2": _rounded(log_linear.r2[row], 4),
+                "residual_std_log": _rounded(log_linear.residual_std[row], 4),
+                "projections": points("log_linear")
+            },
+            "cagr": {
+                "growth_rate_pct": _rounded(growth.rate[row] * 100),
+                "residual_std_log": _rounded(growth.residual_std[row], 4),
+                "projections": points("cagr")
+            }
+        },
+        "data_source": store.data_source,
+        "timestamp": store.timestamp
+    }
+
+
+def get_forecast_table(
+    horizon: int = 3,
+    method: str = "linear",
+    biome: Optional[str] = None,
+    store: Optional[DegradationStore] = None
+) -> Dict:
+    """
+    Previsão de todos os estados (ou dos estados de um bioma) no último ano do
+    horizonte, ordenada pela área prevista
+    """
+    store = store or STORE
+    _check_forecast(horizon, method)
+    
+    biome_title = None
+    if biome:
+        biome_title = resolve_biome(biome)
+        if not biome_title:
+            raise ValueError(f"Bioma '{biome}' não reconhecido")
+        rows = store.states_in_biome(biome_title)
+    else:
+        rows = np.arange(len(store.states))
+    
+    index = store.forecast
+    linear = index.fits()["linear"]
+    rows = rows[linear.n[rows] >= 2]
+    projection = index.project(rows, horizon)[method]
+    area, lower, upper = projection.area[:, -1], projection.lower[:, -1], projection.upper[:, -1]
+    
+    last_col = store.values.shape[1] - 1
+    last_area = store.values[rows, last_col]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change_pct = (area - last_area) / last_area * 100
+    trends = index.trend(rows)
+    
+    # Colunas arredondadas em bloco, já na ordem da área prevista
+    order = np.argsort(-np.nan_to_num(area, nan=-np.inf), kind="stable")
+    rows = rows[order]
+    columns = zip(
+        rows.tolist(),
+        _rounded_list(last_area[order]),
+        _rounded_list(area[order]),
+        _rounded_list(lower[order]),
+        _rounded_list(upper[order]),
+        _rounded_list(change_pct[order]),
+        _rounded_list(linear.slope[rows]),
+        _rounded_list(linear.r2[rows], 4),
+        trends[order].tolist()
+    )
+    forecasts = [
+        {
+            "state": store.states[row],
+            "state_code": store.state_codes[row],
+            "biome": store.biomes[store.primary_biome[row]],
+            "last_area_km2": last_area_km2,
+            "area_km2": area_km2,
+            "lower_km2": lower_km2,
+            "upper_km2": upper_km2,
+            "change_percentage": change_percentage,
+            "slope_km2_per_year": slope,
+            "r2": r2,
+            "trend": trend
+        }
+        for row, last_area_km2, area_km2, lower_km2, upper_km2, change_percentage, slope, r2, trend in columns
+    ]
+    
+    return {
+        "base_year": int(store.years[-1]),
+        "target_year": int(projection.years[-1]),
+        "horizon": horizon,
+        "method": method,
+        "confidence": CONFIDENCE,
+        "biome_filter": biome_title,
+        "forecasts": forecasts,
+        "total": len(forecasts),
+        "data_source": store.data_source,
+        "timestamp": store.timestamp
+    }
+
+
+def get_anomalies_data(
+    year: Optional[int] = None,
+    biome: Optional[str] = None,
+    threshold: float = DEFAULT_THRESHOLD,
+    limit: int = 50,
+    store: Optional[DegradationStore] = None
+) -> Dict:
+    """
+    Anomalias (estado/bioma/Brasil × ano) com score >= threshold, da maior para a menor
+    
+    Lê a tabela pré-calculada do store; com filtro de bioma entram os
+    estados do bioma e o próprio bioma.
+    """
+    store = store or STORE
+    if threshold <= 0:
+        raise ValueError("threshold deve ser maior que zero")
+    
+    col = None
+    if year is not None:
+        col = store.year_col(year)
+        if col is None:
+            raise ValueError(f"Ano {year} não disponível. Anos: {_years_label(store)}")
+    
+    biome_title, rows = None, None
+    if biome:
+        biome_title = resolve_biome(biome)
+        if not biome_title:
+            raise ValueError(f"Bioma '{biome}' não reconhecido")
+        b = store.biome_index[biome_title]
+        rows = np.append(store.states_in_biome(biome_title), len(store.states) + b)
+    
+    index = store.anomalies
+    table = index.table()
+    selected = index.select(threshold, col, rows, limit)
+    
+    n_states, n_biomes = len(store.states), len(store.biomes)
+    anomalies = []
+    columns = zip(
+        table.rows[selected].tolist(),
+        table.cols[selected].tolist(),
+        table.area[selected].tolist(),
+        table.previous[selected].tolist(),
+        _rounded_list(table.score[selected], 3),
+        _rounded_list(table.z[selected], 3),
+        _rounded_list(table.yoy_z[selected], 3)
+    )
+    for position, (row, c, area, previous, score, z, yoy_z) in enumerate(columns, start=1):
+        if row < n_states:
+            name, code, kind = store.states[row], store.state_codes[row], "state"
+            entity_biome = store.biomes[store.primary_biome[row]]
+        elif row < n_states + n_biomes:
+            name = entity_biome = store.biomes[row - n_states]
+            code, kind = RESOLVER.find(name, kinds=("biome",)).code, "biome"
+        else:
+            name, code, kind, entity_biome = "Brasil", "BR", "brasil", "Todos os biomas"
         
-        biome_data.append({
-            "biome": biome,
-            "area_km2": round(total, 2),
-            "percentage_of_total": round(percentage, 2),
-            "num_states": len(STATES_BY_BIOME[biome])
+        # Direção do componente que domina o score
+        dominant = yoy_z if abs(yoy_z or 0) >= abs(z or 0) else z
+        has_previous = not np.isnan(previous) and previous > 0
+        anomalies.append({
+            "position": position,
+            "state": name,
+            "state_code": code,
+            "entity_type": kind,
+            "biome": entity_biome,
+            "year": int(store.years[c]),
+            "area_km2": round(area, 2),
+            "previous_area_km2": round(previous, 2) if has_previous else None,
+            "change_km2": round(area - previous, 2) if has_previous else None,
+            "change_percentage": round((area - previous) / previous * 100, 2) if has_previous else None,
+            "z_score": z,
+            "yoy_z_score": yoy_z,
+            "score": score,
+            "direction": "spike" if (dominant or 0) > 0 else "drop"
         })
     
-    biome_data.sort(key=lambda x: x["area_km2"], reverse=True)
-    
     return {
         "year": year,
-        "total_brazil_km2": round(BRAZIL_TOTAL[year], 2),
-        "biomes": biome_data,
-        "data_source": "MOCK_DATA_BRAZIL",
-        "timestamp": datetime.utcnow().isoformat()
+        "biome_filter": biome_title,
+        "threshold": threshold,
+        "anomalies": anomalies,
+        "total": len(anomalies),
+        "data_source": store.data_source,
+        "timestamp": store.timestamp
     }
 
 
-def get_available_biomes() -> List[str]:
+def get_available_biomes(store: Optional[DegradationStore] = None) -> List[str]:
     """Retorna lista de biomas disponíveis"""
-    return BIOMES.copy()
+    return list((store or STORE).biomes)
 
 
-def get_available_states(biome: Optional[str] = None) -> Dict:
+def get_available_states(biome: Optional[str] = None, store: Optional[DegradationStore] = None) -> Dict:
     """Retorna lista de estados disponíveis"""
+    store = store or STORE
+    biome_title = None
     if biome:
-        biome_title = next((b for b in BIOMES if b.upper() == biome.upper()), None)
+        biome_title = resolve_biome(biome)
         if not biome_title:
             raise ValueError(f"Bioma '{biome}' não encontrado")
         
@@ -393,38 +904,25 @@ def get_available_states(biome: Optional[str] = None) -> Dict:
     return {
         "states": states,
         "total": len(states),
-        "biome_filter": biome,
-        "timestamp": datetime.utcnow().isoformat()
+        "biome_filter": biome_title,
+        "timestamp": store.timestamp
     }
 
 
-def get_available_years() -> Dict:
+def get_available_years(store: Optional[DegradationStore] = None) -> Dict:
     """Retorna lista de anos disponíveis"""
-    years = sorted(BRAZIL_TOTAL.keys())
+    store = store or STORE
+    years = store.years.tolist()
     return {
         "years": years,
         "total": len(years),
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": store.timestamp
     }
 
 
 def normalize_state_name(state: str) -> str:
     """Normaliza nome ou sigla do estado"""
-    state = state.strip()
-    
-    if len(state) == 2:
-        state = state.upper()
-        if state in ALL_STATES:
-            return ALL_STATES[state]
- 
-    for code, name in ALL_STATES.items():
-        if name.lower() == state.lower():
-            return name
-    
- 
-    state_lower = state.lower()
-    for name in ALL_STATES.values():
-        if state_lower in name.lower() or name.lower() in state_lower:
-            return name
-    
-    raise ValueError(f"Estado '{state}' não reconhecido")
\ No newline at end of file
+    entity = RESOLVER.find(state, kinds=("state",))
+    if entity is None:
+        raise ValueError(f"Estado '{state}' não reconhecido")
+    return entity.name
\ No newline at end of file
@@ -0,0 +1,304 @@
+"""
+Fonte de dados real - ingestão de exportações CSV do INPE PRODES / MapBiomas
+Lê o arquivo em blocos (chunks) com pandas e agrega para estado × bioma × ano
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+import logging
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.services.degradation_store import DegradationStore
+from app.services.entity_resolver import fold
+from app.services.hierarchy import HierarchicalAggregator
+from app.services.mock_data_brazil import (
+    ALL_STATES,
+    BIOMES,
+    RESOLVER,
+    STATE_CODES,
+    STATE_PRIMARY_BIOME
+)
+
+logger = logging.getLogger(__name__)
+
+
+# Nomes de colunas aceitos nas exportações (PRODES usa inglês, MapBiomas português)
+COLUMN_ALIASES = {
+    "state": ["state", "estado", "uf", "sigla_uf", "nome_uf"],
+    "biome": ["biome", "bioma"],
+    "year": ["year", "ano"],
+    "area_km2": ["area_km2", "areakm", "area_km", "area"],
+    "area_ha": ["area_ha", "areaha"],
+    "municipality": ["municipality", "municipio", "nome_municipio", "nm_mun"],
+    "municipality_code": ["geocode", "geocodigo", "cod_ibge", "cd_mun", "municipality_code"],
+}
+
+
+@dataclass
+class CsvAggregate:
+    """
+    Resultado da agregação: cubo estadual e, se houver, a matriz municipal
+
+    reported marca as células estado × bioma × ano com ao menos uma linha no
+    arquivo (uma área informada como zero continua sendo um dado).
+    """
+    years: List[int]
+    biome_values: np.ndarray
+    reported: np.ndarray
+    stats: "IngestionStats"
+    municipality_names: Optional[List[str]] = None
+    municipality_codes: Optional[List[str]] = None
+    municipality_state: Optional[np.ndarray] = None
+    municipality_biome: Optional[np.ndarray] = None
+    municipality_values: Optional[np.ndarray] = None
+
+
+@dataclass
+class IngestionStats:
+    """Estatísticas de uma ingestão"""
+    rows_read: int = 0
+    rows_dropped: int = 0
+    rows_state_only: int = 0
+    chunks: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        if self.elapsed_seconds <= 0:
+            return 0.0
+        return self.rows_read / self.elapsed_seconds
+
+
+STATES = list(ALL_STATES.values())
+
+
+def _resolve_columns(columns) -> Dict[str, str]:
+    """Mapeia colunas do arquivo para os nomes canônicos"""
+    folded = {fold(c).replace(" ", "_"): c for c in columns}
+    resolved = {}
+    for canonical, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in folded:
+                resolved[canonical] = folded[alias]
+                break
+
+    missing = [c for c in ("state", "biome", "year") if c not in resolved]
+    if "area_km2" not in resolved and "area_ha" not in resolved:
+        missing.append("area_km2")
+    if missing:
+        raise ValueError(f"Colunas obrigatórias ausentes no CSV: {', '.join(missing)}")
+    return resolved
+
+
+def _codes(values: pd.Series, kind: str, cache: Dict[str, int]) -> np.ndarray:
+    """
+    Converte nomes em índices (-1 quando não reconhecido), resolvendo só os
+    valores únicos. Na ingestão não há busca aproximada: grafia desconhecida
+    é descartada em vez de atribuída à entidade errada.
+    """
+    values = values.astype(str)
+    for raw in values.unique():
+        if raw not in cache:
+            entity = RESOLVER.find(raw, kinds=(kind,), fuzzy=False)
+            cache[raw] = entity.index if entity else -1
+    return values.map(cache).to_numpy(dtype=np.int64)
+
+
+def iter_chunks(path: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Itera sobre o CSV em blocos, lendo apenas as colunas necessárias"""
+    header = pd.read_csv(path, nrows=0)
+    columns = _resolve_columns(header.columns)
+    rename = {original: canonical for canonical, original in columns.items()}
+
+    reader = pd.read_csv(
+        path,
+        usecols=list(columns.values()),
+        chunksize=chunk_size,
+        dtype={columns[c]: str for c in ("state", "biome", "municipality", "municipality_code") if c in columns}
+    )
+    for chunk in reader:
+        yield chunk.rename(columns=rename)
+
+
+def aggregate_csv(path: str, chunk_size: int = 200_000) -> CsvAggregate:
+    """
+    Agrega uma exportação PRODES/MapBiomas para o cubo estado × bioma × ano
+
+    Se o arquivo tiver coluna de município, agrega também município × bioma × ano;
+    linhas sem município (ou sem geocódigo) entram só no cubo estadual.
+    A memória usada é limitada ao tamanho do bloco mais os agregados,
+    independente do tamanho do arquivo.
+    """
+    stats = IngestionStats()
+    state_cache: Dict[str, int] = {}
+    biome_cache: Dict[str, int] = {}
+    cubes: Dict[int, np.ndarray] = {}
+    counts: Dict[int, np.ndarray] = {}
+    shape = (len(STATES), len(BIOMES))
+
+    leaf_index: Dict[str, int] = {}
+    leaf_names: List[str] = []
+    leaf_codes: List[str] = []
+    leaf_states: List[int] = []
+    leaf_totals: Optional[pd.Series] = None
+
+    started = time.perf_counter()
+    for chunk in iter_chunks(path, chunk_size):
+        stats.chunks += 1
+        stats.rows_read += len(chunk)
+
+        state_idx = _codes(chunk["state"], "state", state_cache)
+        biome_idx = _codes(chunk["biome"], "biome", biome_cache)
+        years = pd.to_numeric(chunk["year"], errors="coerce").to_numpy(dtype=np.float64)
+        if "area_km2" in chunk:
+            area = pd.to_numeric(chunk["area_km2"], errors="coerce").to_numpy(dtype=np.float64)
+        else:
+            area = pd.to_numeric(chunk["area_ha"], errors="coerce").to_numpy(dtype=np.float64) / 100.0
+
+        valid = (state_idx >= 0) & (biome_idx >= 0) & ~np.isnan(years) & ~np.isnan(area)
+        stats.rows_dropped += int((~valid).sum())
+
+        state_idx, biome_idx = state_idx[valid], biome_idx[valid]
+        years, area = years[valid].astype(np.int64), area[valid]
+
+        for year in np.unique(years).tolist():
+            in_year = years == year
+            cube = cubes.setdefault(year, np.zeros(shape, dtype=np.float64))
+            np.add.at(cube, (state_idx[in_year], biome_idx[in_year]), area[in_year])
+            count = counts.setdefault(year, np.zeros(shape, dtype=np.int64))
+            np.add.at(count, (state_idx[in_year], biome_idx[in_year]), 1)
+
+        if "municipality" in chunk:
+            names = chunk["municipality"][valid].str.strip()
+            codes = chunk["municipality_code"][valid].str.strip() if "municipality_code" in chunk else None
+
+            # Sem município (ou geocódigo) a linha fica só no cubo estadual
+            local = names.notna() & (names != "")
+            if codes is not None:
+                local &= codes.notna() & (codes != "")
+            local = local.to_numpy()
+            stats.rows_state_only += int((~local).sum())
+            names = names[local]
+            codes = codes[local] if codes is not None else None
+            state_idx, biome_idx = state_idx[local], biome_idx[local]
+            years, area = years[local], area[local]
+
+            keys = codes if codes is not None else names.map(fold) + "/" + pd.Series(state_idx, index=names.index).astype(str)
+
+            for key, position in zip(*np.unique(keys.to_numpy(dtype=str), return_index=True)):
+                if key not in leaf_index:
+                    leaf_index[key] = len(leaf_names)
+                    leaf_names.append(names.iloc[position])
+                    leaf_codes.append(codes.iloc[position] if codes is not None else "")
+                    leaf_states.append(int(state_idx[position]))
+
+            part = pd.DataFrame({
+                "leaf": keys.map(leaf_index).to_numpy(),
+                "biome": biome_idx,
+                "year": years,
+                "area": area
+            }).groupby(["leaf", "biome", "year"])["area"].sum()
+            leaf_totals = part if leaf_totals is None else leaf_totals.add(part, fill_value=0.0)
+
+    stats.elapsed_seconds = time.perf_counter() - started
+
+    if not cubes:
+        raise ValueError(f"Nenhuma linha válida encontrada em {path}")
+
+    logger.info(
+        f"CSV agregado: {path} - {stats.rows_read} linhas em {stats.chunks} blocos, "
+        f"{stats.rows_dropped} descartadas, {stats.rows_state_only} sem município, {stats.elapsed_seconds:.2f}s "
+        f"({stats.rows_per_second:,.0f} linhas/s)"
+    )
+
+    years = sorted(cubes)
+    result = CsvAggregate(
+        years=years,
+        biome_values=np.stack([cubes[year] for year in years], axis=-1),
+        reported=np.stack([counts[year] for year in years], axis=-1) > 0,
+        stats=stats
+    )
+
+    if leaf_names:
+        year_pos = {year: i for i, year in enumerate(years)}
+        leaves = leaf_totals.index.get_level_values("leaf").to_numpy()
+        leaf_biomes = leaf_totals.index.get_level_values("biome").to_numpy()
+        cols = leaf_totals.index.get_level_values("year").map(year_pos).to_numpy()
+        areas = leaf_totals.to_numpy()
+
+        values = np.full((len(leaf_names), len(years)), np.nan)
+        values[leaves, cols] = 0.0
+        np.add.at(values, (leaves, cols), areas)
+
+        # Bioma predominante: o de maior área acumulada no município
+        by_biome = np.zeros((len(leaf_names), len(BIOMES)))
+        np.add.at(by_biome, (leaves, leaf_biomes), areas)
+
+        result.municipality_names = leaf_names
+        result.municipality_codes = leaf_codes
+        result.municipality_state = np.array(leaf_states, dtype=np.int64)
+        result.municipality_biome = by_biome.argmax(axis=1)
+        result.municipality_values = values
+
+    return result
+
+
+def store_from_cube(
+    years: List[int],
+    biome_values: np.ndarray,
+    data_source: str,
+    updated_at: Optional[datetime] = None,
+    reported: Optional[np.ndarray] = None
+) -> DegradationStore:
+    """
+    Constrói o store a partir do cubo estado × bioma × ano
+
+    Faltante (NaN) é a célula sem nenhuma linha informada (reported), não a
+    de área zero; sem a máscara, vale a área positiva (cubos sintéticos).
+    """
+    present = biome_values > 0 if reported is None else reported
+    values = biome_values.sum(axis=1)
+    values[~present.any(axis=1)] = np.nan
+
+    return DegradationStore(
+        states=STATES,
+        state_codes=[STATE_CODES[s] for s in STATES],
+        years=years,
+        values=values,
+        biomes=BIOMES,
+        membership=present.any(axis=2).T,
+        primary_biome=np.array([BIOMES.index(STATE_PRIMARY_BIOME[s]) for s in STATES]),
+        data_source=data_source,
+        biome_values=biome_values,
+        updated_at=updated_at
+    )
+
+
+def load_csv_store(
+    path: str,
+    chunk_size: int = 200_000,
+    data_source: str = "INPE_PRODES"
+) -> DegradationStore:
+    """Lê uma exportação PRODES/MapBiomas e constrói o store (com nível municipal, se houver)"""
+    aggregate = aggregate_csv(path, chunk_size)
+    modified = datetime.utcfromtimestamp(os.path.getmtime(path))
+    store = store_from_cube(aggregate.years, aggregate.biome_values, data_source, modified, aggregate.reported)
+
+    if aggregate.municipality_values is not None:
+        # O cubo estadual já inclui as linhas sem município: sem roll-up
+        HierarchicalAggregator(
+            store,
+            names=aggregate.municipality_names,
+            codes=aggregate.municipality_codes,
+            municipality_state=aggregate.municipality_state,
+            municipality_biome=aggregate.municipality_biome,
+            values=aggregate.municipality_values,
+            rolled_up=True
+        )
+        logger.info(f"Nível municipal carregado: {len(store.hierarchy)} municípios")
+
+    return store
@@ -0,0 +1,78 @@
+"""
+Índice de ranking - permutações pré-calculadas por (nível, bioma, ordem)
+
+Cada permutação guarda, para cada ano, as linhas já ordenadas por área;
+um top-k vira uma fatia de k elementos. O índice é descartado quando a
+versão do store muda e reconstruído sob demanda.
+"""
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+ORDERS = ("desc", "asc")
+
+
+class RankingIndex:
+    """Permutações por ano para cada combinação (nível, bioma, ordem)"""
+
+    def __init__(self, store):
+        self.store = store
+        self._version: Optional[int] = None
+        # (nível, bioma, ordem) -> (permutação ano × linhas, linhas com dado por ano)
+        self._permutations: Dict[Tuple[str, Optional[str], str], Tuple[np.ndarray, np.ndarray]] = {}
+
+    def _matrix(self, level: str) -> np.ndarray:
+        if level == "municipality":
+            return self.store.hierarchy.values
+        return self.store.values
+
+    def _candidates(self, level: str, biome: Optional[str]) -> np.ndarray:
+        if level == "municipality":
+            return self.store.hierarchy.in_biome(biome)
+        if biome is None:
+            return np.arange(len(self.store.states))
+        return self.store.states_in_biome(biome)
+
+    def _build(self, level: str, biome: Optional[str], order: str) -> Tuple[np.ndarray, np.ndarray]:
+        rows = self._candidates(level, biome)
+        sub = self._matrix(level)[rows]
+        missing = np.isnan(sub)
+
+        keys = -sub if order == "desc" else sub.copy()
+        keys[missing] = np.inf
+        permutation = np.argsort(keys, axis=0, kind="stable")
+
+        # Transposta: cada ano fica contíguo em memória
+        return np.ascontiguousarray(rows[permutation].T), (~missing).sum(axis=0)
+
+    def _permutation(self, level: str, biome: Optional[str], order: str) -> Tuple[np.ndarray, np.ndarray]:
+        if self._version != self.store.version:
+            self._permutations.clear()
+            self._version = self.store.version
+
+        key = (level, biome, order)
+        entry = self._permutations.get(key)
+        if entry is None:
+            entry = self._build(level, biome, order)
+            self._permutations[key] = entry
+        return entry
+
+    def warm(self) -> None:
+        """Pré-calcula todas as combinações (chamado na carga dos dados)"""
+        levels = ["state"] if self.store.hierarchy is None else ["state", "municipality"]
+        for level in levels:
+            for biome in [None] + self.store.biomes:
+                for order in ORDERS:
+                    self._permutation(level, biome, order)
+
+    def top(
+        self,
+        col: int,
+        order: str = "desc",
+        limit: int = 10,
+        level: str = "state",
+        biome: Optional[str] = None
+    ) -> np.ndarray:
+        """Linhas das `limit` primeiras posições no ano (coluna) informado"""
+        permutation, counts = self._permutation(level, biome, order.lower())
+        return permutation[col, :min(limit, counts[col])]
@@ -0,0 +1,173 @@
+"""
+Rate limiting - token bucket por cliente
+
+Cada cliente (IP) tem um balde por orçamento: rotas de dados
+(/api/deforestation/*) e rotas de chat (POST /api/chat/*, que podem gerar
+custo no Azure OpenAI). O balde enche a RATE_LIMIT_*_PER_MINUTE / 60 fichas por
+segundo até a capacidade (rajada); cada requisição consome uma ficha.
+
+O estado por cliente fica em um OrderedDict em ordem de último acesso: cada
+verificação é O(1) e descarta, pela frente, os clientes ociosos há tempo
+suficiente para o balde estar cheio (equivalente a um cliente novo) e os que
+excedem RATE_LIMIT_MAX_CLIENTS.
+"""
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+import json
+import logging
+import math
+import time
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Rotas fora dos orçamentos (health, métricas, docs) não são limitadas
+DATA_PREFIX = "/api/deforestation"
+CHAT_PREFIX = "/api/chat/"
+
+
+class TokenBucketLimiter:
+    """Baldes de fichas por chave, com memória limitada"""
+
+    def __init__(
+        self,
+        per_minute: float,
+        burst: Optional[int] = None,
+        max_clients: int = 10_000,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.rate = per_minute / 60.0
+        self.capacity = float(burst or per_minute)
+        self.max_clients = max_clients
+        self.clock = clock
+        # Tempo para um balde vazio encher: depois disso o cliente pode ser descartado
+        self.idle_after = self.capacity / self.rate
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self.allowed = 0
+        self.rejected = 0
+        self.evicted = 0
+
+    def check(self, key: str) -> float:
+        """Consome uma ficha; retorna 0 se permitido, senão os segundos até a próxima"""
+        now = self.clock()
+        entry = self._buckets.get(key)
+        if entry is None:
+            tokens = self.capacity
+        else:
+            tokens, updated = entry
+            tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+            self._buckets.move_to_end(key)
+
+        if tokens >= 1:
+            self._buckets[key] = (tokens - 1, now)
+            self.allowed += 1
+            retry_after = 0.0
+        else:
+            self._buckets[key] = (tokens, now)
+            self.rejected += 1
+            retry_after = (1 - tokens) / self.rate
+
+        self._evict(now)
+        return retry_after
+
+    def _evict(self, now: float) -> None:
+        buckets = self._buckets
+        while buckets:
+            _, updated = next(iter(buckets.values()))
+            if len(buckets) <= self.max_clients and now - updated < self.idle_after:
+                break
+            buckets.popitem(last=False)
+            self.evicted += 1
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def stats(self) -> Dict:
+        return {
+            "per_minute": round(self.rate * 60, 3),
+            "burst": int(self.capacity),
+            "clients": len(self._buckets),
+            "max_clients": self.max_clients,
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "evicted": self.evicted
+        }
+
+
+def route_budget(method: str, path: str) -> Optional[str]:
+    """Orçamento da rota: "chat", "data" ou None (não limitada)"""
+    if path.startswith(CHAT_PREFIX) and method == "POST":
+        return "chat"
+    if path.startswith(DATA_PREFIX):
+        return "data"
+    return None
+
+
+class RateLimitMiddleware:
+    """Middleware ASGI que responde 429 + Retry-After quando o balde do cliente esvazia"""
+
+    def __init__(self, app, limiters: Dict[str, TokenBucketLimiter], trust_proxy: bool = False):
+        self.app = app
+        self.limiters = limiters
+        self.trust_proxy = trust_proxy
+
+    def _client(self, scope) -> str:
+        if self.trust_proxy:
+            for name, value in scope.get("headers", []):
+                if name == b"x-forwarded-for":
+                    return value.decode("latin-1").split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        budget = route_budget(scope["method"], scope["path"])
+        limiter = self.limiters.get(budget) if budget else None
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        client = self._client(scope)
+        retry_after = limiter.check(client)
+        if not retry_after:
+            await self.app(scope, receive, send)
+            return
+
+        seconds = max(1, math.ceil(retry_after))
+        logger.warning(f"Rate limit ({budget}) excedido por {client}: tente em {seconds}s")
+        body = json.dumps({
+            "detail": f"Limite de requisições excedido. Tente novamente em {seconds}s.",
+            "budget": budget,
+            "retry_after": seconds
+        }, ensure_ascii=False).encode("utf-8")
+        headers: List[Tuple[bytes, bytes]] = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(seconds).encode()),
+            (b"x-ratelimit-limit", str(int(limiter.rate * 60)).encode()),
+        ]
+        await send({"type": "http.response.start", "status": 429, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+def build_limiters() -> Dict[str, TokenBucketLimiter]:
+    """Orçamentos de dados e de chat a partir das configurações"""
+    return {
+        "data": TokenBucketLimiter(
+            settings.RATE_LIMIT_PER_MINUTE,
+            settings.RATE_LIMIT_BURST or None,
+            settings.RATE_LIMIT_MAX_CLIENTS
+        ),
+        "chat": TokenBucketLimiter(
+            settings.RATE_LIMIT_CHAT_PER_MINUTE,
+            settings.RATE_LIMIT_CHAT_BURST or None,
+            settings.RATE_LIMIT_MAX_CLIENTS
+        ),
+    }
+
+
+LIMITERS = build_limiters()
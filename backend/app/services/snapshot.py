@@ -0,0 +1,201 @@
+"""
+Snapshot binário do dataset - abertura zero-copy via np.memmap
+
+Layout do arquivo:
+    [0:8]    magic b"OBFLSNAP"
+    [8:12]   versão do formato (uint32 little-endian)
+    [12:16]  tamanho do cabeçalho JSON (uint32 little-endian)
+    [16:...] cabeçalho JSON (tabelas de índice + posição de cada array)
+    arrays   alinhados em 64 bytes, little-endian, ordem C
+
+Vários workers do uvicorn abrindo o mesmo arquivo compartilham uma única
+cópia no page cache do sistema operacional.
+
+Uso (CLI):
+    python -m app.services.snapshot build --source data/prodes_sample.csv --output data/observa.snap
+    python -m app.services.snapshot build --mock --output data/observa.snap
+    python -m app.services.snapshot info data/observa.snap
+"""
+from typing import Dict, Optional
+from datetime import datetime
+import argparse
+import json
+import logging
+import struct
+import time
+
+import numpy as np
+
+from app.services.degradation_store import DegradationStore
+from app.services.hierarchy import HierarchicalAggregator
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"OBFLSNAP"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+_PREAMBLE = struct.Struct("<8sII")
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_snapshot(store: DegradationStore, path: str) -> int:
+    """Grava o store em formato de snapshot e retorna o tamanho em bytes"""
+    arrays: Dict[str, np.ndarray] = {
+        "values": np.ascontiguousarray(store.values, dtype="<f8"),
+        "membership": np.ascontiguousarray(store.membership, dtype=np.uint8),
+        "primary_biome": np.ascontiguousarray(store.primary_biome, dtype="<i8"),
+    }
+    if store.biome_values is not None:
+        arrays["biome_values"] = np.ascontiguousarray(store.biome_values, dtype="<f8")
+
+    hierarchy = store.hierarchy
+    if hierarchy is not None:
+        arrays["municipality_values"] = np.ascontiguousarray(hierarchy.values, dtype="<f8")
+        arrays["municipality_state"] = np.ascontiguousarray(hierarchy.municipality_state, dtype="<i8")
+        arrays["municipality_biome"] = np.ascontiguousarray(hierarchy.municipality_biome, dtype="<i8")
+
+    header = {
+        "states": store.states,
+        "state_codes": store.state_codes,
+        "years": store.years.tolist(),
+        "biomes": store.biomes,
+        "data_source": store.data_source,
+        "created_at": time.time(),
+        "arrays": {},
+    }
+    if hierarchy is not None:
+        header["municipality_names"] = hierarchy.names
+        header["municipality_codes"] = hierarchy.codes
+
+    # Os offsets dependem do tamanho do próprio cabeçalho:
+    # recalcula até que o tamanho codificado estabilize
+    header_len = 0
+    while True:
+        offset = _align(_PREAMBLE.size + header_len)
+        for name, array in arrays.items():
+            header["arrays"][name] = {
+                "offset": offset,
+                "shape": list(array.shape),
+                "dtype": array.dtype.str,
+            }
+            offset = _align(offset + array.nbytes)
+        header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        if len(header_bytes) == header_len:
+            break
+        header_len = len(header_bytes)
+
+    with open(path, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.seek(header["arrays"][name]["offset"])
+            f.write(array.tobytes())
+        size = f.tell()
+
+    logger.info(f"Snapshot gravado: {path} ({size} bytes)")
+    return size
+
+
+def read_header(path: str) -> Dict:
+    """Lê apenas o cabeçalho do snapshot"""
+    with open(path, "rb") as f:
+        magic, version, header_len = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+        if magic != MAGIC:
+            raise ValueError(f"Arquivo '{path}' não é um snapshot do Observa Floresta")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Versão de snapshot não suportada: {version}")
+        return json.loads(f.read(header_len).decode("utf-8"))
+
+
+def open_snapshot(path: str) -> DegradationStore:
+    """Abre o snapshot sem copiar os arrays (memória mapeada, somente leitura)"""
+    started = time.perf_counter()
+    header = read_header(path)
+    raw = np.memmap(path, dtype=np.uint8, mode="r")
+
+    def view(name: str) -> Optional[np.ndarray]:
+        spec = header["arrays"].get(name)
+        if spec is None:
+            return None
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"]))
+        start = spec["offset"]
+        return raw[start:start + count * dtype.itemsize].view(dtype).reshape(spec["shape"])
+
+    store = DegradationStore(
+        states=header["states"],
+        state_codes=header["state_codes"],
+        years=header["years"],
+        values=view("values"),
+        biomes=header["biomes"],
+        membership=view("membership").view(bool),
+        primary_biome=view("primary_biome"),
+        data_source=header["data_source"],
+        biome_values=view("biome_values"),
+        updated_at=datetime.utcfromtimestamp(header["created_at"])
+    )
+
+    # Os roll-ups (estado, estado × bioma) já estão no arquivo: o nível
+    # municipal fica como view do memmap e só é copiado no primeiro update()
+    if "municipality_values" in header["arrays"]:
+        HierarchicalAggregator(
+            store,
+            names=header["municipality_names"],
+            codes=header["municipality_codes"],
+            municipality_state=view("municipality_state"),
+            municipality_biome=view("municipality_biome"),
+            values=view("municipality_values"),
+            rolled_up=True
+        )
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    logger.info(f"Snapshot aberto: {path} ({elapsed_ms:.1f} ms)")
+    return store
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Snapshots do dataset do Observa Floresta")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="Compila um snapshot a partir dos dados de origem")
+    source = build.add_mutually_exclusive_group(required=True)
+    source.add_argument("--source", help="Exportação CSV do PRODES/MapBiomas")
+    source.add_argument("--mock", action="store_true", help="Usa os dados mock")
+    build.add_argument("--output", required=True, help="Arquivo de saída")
+    build.add_argument("--chunk-size", type=int, default=200_000)
+    build.add_argument("--data-source", default="INPE_PRODES", help="Rótulo data_source")
+
+    info = subparsers.add_parser("info", help="Mostra o cabeçalho de um snapshot")
+    info.add_argument("path")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args.command == "build":
+        if args.mock:
+            from app.services.mock_data_brazil import STORE
+            store = STORE
+        else:
+            from app.services.prodes_source import load_csv_store
+            store = load_csv_store(args.source, args.chunk_size, args.data_source)
+        size = write_snapshot(store, args.output)
+        print(
+            f"✅ {args.output}: {len(store.states)} estados × {len(store.years)} anos, "
+            f"{size} bytes"
+        )
+    else:
+        header = read_header(args.path)
+        arrays = header.pop("arrays")
+        for key in ("data_source", "years", "biomes"):
+            print(f"{key}: {header[key]}")
+        print(f"states: {len(header['states'])}")
+        print(f"municipalities: {len(header.get('municipality_names', []))}")
+        for name, spec in arrays.items():
+            print(f"  {name}: shape={spec['shape']} dtype={spec['dtype']} offset={spec['offset']}")
+
+
+if __name__ == "__main__":
+    main()
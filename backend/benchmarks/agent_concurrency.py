@@ -0,0 +1,251 @@
+"""
+Concorrência do Azure Agent contra um servidor OpenAI fake
+
+Sobe localmente um servidor compatível com a API de chat completions do
+Azure OpenAI (latência configurável, primeira rodada com tool call e a
+segunda com a resposta final). Em seguida mede a latência de
+/api/deforestation/* no mesmo event loop, primeiro sem carga e depois com
+N conversas simultâneas do agente.
+
+Com o cliente assíncrono, as conversas só aguardam I/O e as rotas REST não
+sentem a carga. Com --blocking, as completions usam o cliente síncrono antigo
+(AzureOpenAI) para comparação.
+
+Uso (a partir de backend/):
+    python -m benchmarks.agent_concurrency
+    python -m benchmarks.agent_concurrency --chats 50 --latency 0.5 --blocking
+"""
+from typing import Dict, List, Optional
+import argparse
+import asyncio
+import json
+import logging
+import socket
+import statistics
+import threading
+import time
+import uuid
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+from app.config import settings
+
+DATA_ROUTES = [
+    "/api/deforestation/state/PA?year=2024",
+    "/api/deforestation/ranking/2024?limit=10",
+    "/api/deforestation/compare/Brasil?year_start=2020&year_end=2024",
+]
+
+
+FAKE_ANSWER = "O Pará teve 3.245,8 km² de degradação em 2024, queda de 16% em relação a 2023."
+FAKE_USAGE = {"prompt_tokens": 420, "completion_tokens": 24, "total_tokens": 444}
+
+
+def _fake_stream(tool_calls: List[Dict], deployment: str, latency: float, include_usage: bool = False):
+    """Chunks no formato de streaming (SSE) da API de chat completions"""
+    base = {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": deployment,
+    }
+
+    def chunk(delta: Dict, finish_reason=None) -> str:
+        payload = {**base, "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+        return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+    async def events():
+        await asyncio.sleep(latency)
+        if tool_calls:
+            for index, tool_call in enumerate(tool_calls):
+                arguments = tool_call["function"]["arguments"]
+                half = len(arguments) // 2
+                yield chunk({"role": "assistant", "tool_calls": [{
+                    "index": index, "id": tool_call["id"], "type": "function",
+                    "function": {"name": tool_call["function"]["name"], "arguments": arguments[:half]}
+                }]})
+                yield chunk({"tool_calls": [{"index": index, "function": {"arguments": arguments[half:]}}]})
+            yield chunk({}, "tool_calls")
+        else:
+            for word in FAKE_ANSWER.split(" "):
+                yield chunk({"content": word + " "})
+                await asyncio.sleep(0.01)
+            yield chunk({}, "stop")
+        if include_usage:
+            payload = {**base, "choices": [], "usage": FAKE_USAGE}
+            yield f"data: {json.dumps(payload)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+FAKE_TOOL_STATES = ["PA", "AM", "MT", "RO", "MA"]
+
+
+def build_fake_openai(latency: float, tool_rounds: int = 1, parallel_calls: int = 1) -> FastAPI:
+    """
+    Servidor fake do endpoint de chat completions do Azure OpenAI (com e sem streaming)
+
+    Enquanto houver ferramentas no request e menos de `tool_rounds` rodadas
+    concluídas, responde com `parallel_calls` tool calls; depois, com texto.
+    """
+    fake = FastAPI()
+    fake.state.requests = 0
+
+    @fake.post("/openai/deployments/{deployment}/chat/completions")
+    async def chat_completions(deployment: str, request: Request):
+        body = await request.json()
+        fake.state.requests += 1
+
+        rounds_done = sum(1 for m in body["messages"] if m.get("role") == "assistant" and m.get("tool_calls"))
+        tool_calls = []
+        if body.get("tools") and rounds_done < tool_rounds:
+            tool_calls = [
+                {
+                    "id": f"call_{uuid.uuid4().hex[:8]}",
+                    "type": "function",
+                    "function": {
+                        "name": "get_state_deforestation",
+                        "arguments": json.dumps({"state": FAKE_TOOL_STATES[i % len(FAKE_TOOL_STATES)], "year": 2024})
+                    }
+                }
+                for i in range(parallel_calls)
+            ]
+        if body.get("stream"):
+            include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+            return _fake_stream(tool_calls, deployment, latency, include_usage)
+
+        await asyncio.sleep(latency)
+        if tool_calls:
+            message = {"role": "assistant", "content": None, "tool_calls": tool_calls}
+            finish_reason = "tool_calls"
+        else:
+            message = {"role": "assistant", "content": FAKE_ANSWER}
+            finish_reason = "stop"
+
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": deployment,
+            "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+            "usage": FAKE_USAGE
+        }
+
+    return fake
+
+
+def start_fake_openai(latency: float, tool_rounds: int = 1, parallel_calls: int = 1) -> str:
+    """Sobe o servidor fake em uma thread e retorna a URL base"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(
+        build_fake_openai(latency, tool_rounds, parallel_calls),
+        host="127.0.0.1", port=port, log_level="warning"
+    ))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}"
+
+
+async def probe_latencies(
+    client: httpx.AsyncClient,
+    seconds: Optional[float] = None,
+    until: Optional[asyncio.Future] = None
+) -> List[float]:
+    """
+    Chama as rotas de dados em sequência (latências em ms) durante `seconds`
+    ou até a tarefa `until` terminar
+    """
+    latencies = []
+    deadline = time.perf_counter() + seconds if seconds is not None else None
+    while (until is not None and not until.done()) or (deadline is not None and time.perf_counter() < deadline):
+        for url in DATA_ROUTES:
+            started = time.perf_counter()
+            response = await client.get(url)
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(0.005)
+    return latencies
+
+
+def summarize(label: str, latencies: List[float]) -> None:
+    ordered = sorted(latencies)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(
+        f"{label:<34} n={len(ordered):<5} p50={statistics.median(ordered):7.2f} ms  "
+        f"p95={p95:7.2f} ms  max={ordered[-1]:8.2f} ms"
+    )
+
+
+def use_blocking_client(agent) -> None:
+    """Troca as completions pelo cliente síncrono (comportamento anterior)"""
+    from openai import AzureOpenAI
+
+    sync_client = AzureOpenAI(
+        api_key=settings.AZURE_OPENAI_API_KEY,
+        api_version=settings.AZURE_OPENAI_API_VERSION,
+        azure_endpoint=settings.AZURE_OPENAI_ENDPOINT
+    )
+
+    async def blocking_complete(**kwargs):
+        return sync_client.chat.completions.create(model=agent.deployment, **kwargs)
+
+    agent._complete = blocking_complete
+
+
+async def run(chats: int, latency: float, blocking: bool) -> None:
+    from app.agent.azure_agent import AzureAgent
+    from app.main import app
+
+    agent = AzureAgent()
+    if blocking:
+        use_blocking_client(agent)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://observa") as client:
+        await probe_latencies(client, 0.3)
+        summarize("sem conversas", await probe_latencies(client, 2.0))
+
+        started = time.perf_counter()
+        conversations = asyncio.gather(*(
+            agent.process_query("Qual o desmatamento no Pará em 2024?") for _ in range(chats)
+        ))
+        summarize(f"com {chats} conversas simultâneas", await probe_latencies(client, until=conversations))
+        answers = await conversations
+        chat_seconds = time.perf_counter() - started
+
+    failed = sum(1 for answer in answers if answer.startswith("Desculpe"))
+    print(
+        f"\n{chats} conversas em {chat_seconds:.2f}s "
+        f"(2 completions de {latency:.2f}s cada, concorrência={settings.AZURE_OPENAI_MAX_CONCURRENCY}); "
+        f"falhas: {failed}"
+    )
+    await agent.aclose()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Concorrência do Azure Agent (servidor OpenAI fake)")
+    parser.add_argument("--chats", type=int, default=50, help="Conversas simultâneas")
+    parser.add_argument("--latency", type=float, default=0.5, help="Latência de cada completion (s)")
+    parser.add_argument("--blocking", action="store_true", help="Usa o cliente síncrono antigo")
+    args = parser.parse_args(argv)
+    logging.disable(logging.INFO)
+
+    settings.AZURE_OPENAI_ENDPOINT = start_fake_openai(args.latency)
+    settings.AZURE_OPENAI_API_KEY = "fake-key"
+    settings.AZURE_OPENAI_MAX_CONCURRENCY = max(settings.AZURE_OPENAI_MAX_CONCURRENCY, args.chats)
+
+    mode = "cliente síncrono (bloqueante)" if args.blocking else "cliente assíncrono"
+    print(f"🤖 Azure Agent: {mode}, servidor fake em {settings.AZURE_OPENAI_ENDPOINT}\n")
+    asyncio.run(run(args.chats, args.latency, args.blocking))
+
+
+if __name__ == "__main__":
+    main()
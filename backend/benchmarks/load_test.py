@@ -0,0 +1,315 @@
+"""
+Teste de carga da API (asyncio + httpx)
+
+N workers concorrentes sorteiam requisições de um mix ponderado durante um
+tempo fixo e medem a latência de cada uma. O relatório traz RPS, p50/p95/p99
+e erros por rota (template da rota, não a URL), e pode ser salvo em JSON para
+comparar versões.
+
+Mixes:
+- dashboard: overview, ranking, comparações e estados (tráfego das páginas)
+- chat: perguntas estruturadas em /api/chat/stream (intent router)
+- batch: POST /api/deforestation/batch com consultas variadas
+
+Alvo: uma URL (--url http://localhost:8000) ou o app em processo via
+ASGITransport (padrão, sem servidor).
+
+Uso (a partir de backend/):
+    python -m benchmarks.load_test --mix dashboard --concurrency 50 --duration 10
+    python -m benchmarks.load_test --url http://localhost:8000 --output results/v1.json
+    python -m benchmarks.load_test --output results/v2.json --compare results/v1.json
+"""
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+import argparse
+import asyncio
+import json
+import logging
+import random
+import subprocess
+import time
+
+import httpx
+
+from app.services import mock_data_brazil as mock_data
+
+STATES = list(mock_data.ALL_STATES)
+BIOMES = list(mock_data.BIOMES)
+YEARS = [int(year) for year in mock_data.STORE.years]
+
+CHAT_QUESTIONS = [
+    "Qual o desmatamento no {state_name} em {year}?",
+    "desmatamento em {state} {year}",
+    "Compare {state} entre {year_start} e {year_end}",
+    "Quais os 5 estados que mais desmataram em {year}?",
+    "ranking do {biome} {year}",
+    "Compare os biomas em {year}",
+]
+
+
+class RequestSpec(NamedTuple):
+    """Requisição sorteada: rota (template) para o relatório, método, URL e corpo"""
+    route: str
+    method: str
+    url: str
+    body: Optional[Dict] = None
+
+
+def _years(rng: random.Random) -> Tuple[int, int]:
+    year_start, year_end = sorted(rng.sample(YEARS, 2))
+    return year_start, year_end
+
+
+def _state(rng: random.Random) -> RequestSpec:
+    return RequestSpec(
+        "GET /api/deforestation/state/{state}", "GET",
+        f"/api/deforestation/state/{rng.choice(STATES)}?year={rng.choice(YEARS)}"
+    )
+
+
+def _compare(rng: random.Random) -> RequestSpec:
+    year_start, year_end = _years(rng)
+    entity = rng.choice(["Brasil", rng.choice(STATES), rng.choice(BIOMES)])
+    return RequestSpec(
+        "GET /api/deforestation/compare/{state_or_biome}", "GET",
+        f"/api/deforestation/compare/{entity}?year_start={year_start}&year_end={year_end}"
+    )
+
+
+def _ranking(rng: random.Random) -> RequestSpec:
+    biome = f"&biome={rng.choice(BIOMES)}" if rng.random() < 0.3 else ""
+    return RequestSpec(
+        "GET /api/deforestation/ranking/{year}", "GET",
+        f"/api/deforestation/ranking/{rng.choice(YEARS)}?limit={rng.choice([5, 10, 27])}"
+        f"&order={rng.choice(['desc', 'asc'])}{biome}"
+    )
+
+
+def _biomes(rng: random.Random) -> RequestSpec:
+    return RequestSpec(
+        "GET /api/deforestation/biomes/compare/{year}", "GET",
+        f"/api/deforestation/biomes/compare/{rng.choice(YEARS)}"
+    )
+
+
+def _overview(rng: random.Random) -> RequestSpec:
+    biome = f"&biome={rng.choice(BIOMES)}" if rng.random() < 0.5 else ""
+    return RequestSpec(
+        "GET /api/deforestation/overview", "GET",
+        f"/api/deforestation/overview?year={rng.choice(YEARS)}{biome}"
+    )
+
+
+def _chat(rng: random.Random) -> RequestSpec:
+    state = rng.choice(STATES)
+    year_start, year_end = _years(rng)
+    question = rng.choice(CHAT_QUESTIONS).format(
+        state=state,
+        state_name=mock_data.ALL_STATES[state],
+        biome=rng.choice(BIOMES),
+        year=rng.choice(YEARS),
+        year_start=year_start,
+        year_end=year_end
+    )
+    return RequestSpec("POST /api/chat/stream", "POST", "/api/chat/stream", {"message": question})
+
+
+def _batch(rng: random.Random) -> RequestSpec:
+    queries = []
+    for _ in range(rng.choice([5, 20, 50])):
+        kind = rng.choice(["state", "state", "compare", "ranking", "biomes"])
+        if kind == "state":
+            params = {"state": rng.choice(STATES), "year": rng.choice(YEARS)}
+        elif kind == "compare":
+            year_start, year_end = _years(rng)
+            params = {"state_or_biome": rng.choice(STATES), "year_start": year_start, "year_end": year_end}
+        elif kind == "ranking":
+            params = {"year": rng.choice(YEARS), "limit": 10}
+        else:
+            params = {"year": rng.choice(YEARS)}
+        queries.append({"type": kind, "params": params})
+    return RequestSpec("POST /api/deforestation/batch", "POST", "/api/deforestation/batch", {"queries": queries})
+
+
+MIXES: Dict[str, List[Tuple[int, Callable[[random.Random], RequestSpec]]]] = {
+    "dashboard": [(30, _overview), (25, _ranking), (20, _compare), (15, _state), (10, _biomes)],
+    "chat": [(1, _chat)],
+    "batch": [(1, _batch)],
+}
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _summary(latencies: List[float], statuses: Dict[int, int], seconds: float) -> Dict:
+    ordered = sorted(latencies)
+    requests = len(ordered)
+    return {
+        "requests": requests,
+        "rps": round(requests / seconds, 1) if seconds else 0.0,
+        "errors": sum(count for status, count in statuses.items() if status >= 400),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "p50_ms": round(_percentile(ordered, 0.50), 2),
+        "p95_ms": round(_percentile(ordered, 0.95), 2),
+        "p99_ms": round(_percentile(ordered, 0.99), 2),
+        "max_ms": round(ordered[-1], 2) if ordered else 0.0,
+    }
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    mix: str,
+    concurrency: int,
+    duration: float,
+    seed: int = 42,
+    warmup: float = 1.0
+) -> Dict:
+    """Executa o mix e retorna o relatório (total e por rota)"""
+    weights, builders = zip(*MIXES[mix])
+    latencies: Dict[str, List[float]] = {}
+    statuses: Dict[str, Dict[int, int]] = {}
+    failures: Dict[str, int] = {}
+
+    async def worker(index: int, until: float, record: bool) -> None:
+        rng = random.Random(seed * 1000 + index)
+        while time.perf_counter() < until:
+            spec = rng.choices(builders, weights)[0](rng)
+            started = time.perf_counter()
+            try:
+                response = await client.request(spec.method, spec.url, json=spec.body)
+                status = response.status_code
+            except httpx.HTTPError as e:
+                if record:
+                    failures[type(e).__name__] = failures.get(type(e).__name__, 0) + 1
+                continue
+            if record:
+                latencies.setdefault(spec.route, []).append((time.perf_counter() - started) * 1000)
+                route_statuses = statuses.setdefault(spec.route, {})
+                route_statuses[status] = route_statuses.get(status, 0) + 1
+
+    if warmup > 0:
+        until = time.perf_counter() + warmup
+        await asyncio.gather(*(worker(i, until, False) for i in range(concurrency)))
+
+    started = time.perf_counter()
+    until = started + duration
+    await asyncio.gather(*(worker(i, until, True) for i in range(concurrency)))
+    seconds = time.perf_counter() - started
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    all_statuses: Dict[int, int] = {}
+    for route_statuses in statuses.values():
+        for status, count in route_statuses.items():
+            all_statuses[status] = all_statuses.get(status, 0) + count
+
+    return {
+        "total": {**_summary(all_latencies, all_statuses, seconds), "transport_errors": failures},
+        "routes": {
+            route: _summary(latencies[route], statuses[route], seconds)
+            for route in sorted(latencies)
+        },
+        "seconds": round(seconds, 3)
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def print_report(result: Dict) -> None:
+    header = f"{'rota':<52} {'req':>7} {'rps':>8} {'erros':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}"
+    print(header)
+    print("-" * len(header))
+    rows = list(result["routes"].items()) + [("TOTAL", result["total"])]
+    for route, stats in rows:
+        print(
+            f"{route:<52} {stats['requests']:>7} {stats['rps']:>8.1f} {stats['errors']:>6} "
+            f"{stats['p50_ms']:>6.2f}ms {stats['p95_ms']:>6.2f}ms {stats['p99_ms']:>6.2f}ms {stats['max_ms']:>6.1f}ms"
+        )
+
+
+def print_comparison(result: Dict, baseline: Dict) -> None:
+    """Variação de RPS e p95 por rota em relação a um resultado anterior"""
+    print(f"\nComparação com {baseline['meta'].get('git_revision') or 'baseline'} ({baseline['meta']['started_at']}):")
+    rows = list(result["routes"].items()) + [("TOTAL", result["total"])]
+    for route, stats in rows:
+        before = baseline["total"] if route == "TOTAL" else baseline["routes"].get(route)
+        if not before or not before["requests"]:
+            print(f"{route:<52} (sem dados no baseline)")
+            continue
+        rps_change = (stats["rps"] - before["rps"]) / before["rps"] * 100 if before["rps"] else 0.0
+        p95_change = (stats["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100 if before["p95_ms"] else 0.0
+        print(f"{route:<52} rps {rps_change:+7.1f}%   p95 {p95_change:+7.1f}%")
+
+
+async def main_async(args) -> Dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout)
+        target = args.url
+    else:
+        from app.main import app
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://observa", limits=limits, timeout=args.timeout
+        )
+        target = "asgi (em processo)"
+
+    started_at = datetime.utcnow().isoformat()
+    async with client:
+        result = await run_load(client, args.mix, args.concurrency, args.duration, args.seed, args.warmup)
+
+    return {
+        "meta": {
+            "mix": args.mix,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "seed": args.seed,
+            "target": target,
+            "git_revision": _git_revision(),
+            "started_at": started_at
+        },
+        **result
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Teste de carga da API Observa Floresta")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="dashboard", help="Mix de requisições")
+    parser.add_argument("--concurrency", type=int, default=20, help="Workers simultâneos")
+    parser.add_argument("--duration", type=float, default=10.0, help="Duração da medição (s)")
+    parser.add_argument("--warmup", type=float, default=1.0, help="Aquecimento antes da medição (s)")
+    parser.add_argument("--url", default="", help="URL do servidor (vazio = app em processo via ASGI)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Timeout por requisição (s)")
+    parser.add_argument("--seed", type=int, default=42, help="Semente do sorteio das requisições")
+    parser.add_argument("--output", default="", help="Arquivo JSON para salvar o resultado")
+    parser.add_argument("--compare", default="", help="Resultado JSON anterior para comparação")
+    args = parser.parse_args(argv)
+    logging.disable(logging.WARNING)
+
+    print(
+        f"🚀 Carga: mix={args.mix}, concorrência={args.concurrency}, {args.duration:.0f}s, "
+        f"alvo={args.url or 'app em processo'}\n"
+    )
+    result = asyncio.run(main_async(args))
+    print_report(result)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            print_comparison(result, json.load(file))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(result, file, indent=2, ensure_ascii=False)
+        print(f"\n💾 Resultado salvo em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
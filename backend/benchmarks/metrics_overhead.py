@@ -0,0 +1,96 @@
+"""
+Custo do registro de métricas HTTP por requisição
+
+Mede (1) HTTPMetrics.record isolado e (2) o MetricsMiddleware em volta de
+um app ASGI mínimo, chamado diretamente (sem servidor nem TestClient), para
+que a diferença medida seja apenas a do middleware.
+
+Uso (a partir de backend/):
+    python -m benchmarks.metrics_overhead
+    python -m benchmarks.metrics_overhead --requests 200000
+"""
+from types import SimpleNamespace
+import argparse
+import asyncio
+import time
+
+from app.services.metrics import HTTPMetrics, MetricsMiddleware
+
+ROUNDS = 5
+
+
+async def _endpoint(request):
+    return None
+
+
+ROUTES = [SimpleNamespace(path="/api/deforestation/state/{state}", endpoint=_endpoint)]
+
+
+async def _bare_app(scope, receive, send):
+    """App mínimo: o "roteador" grava o endpoint no scope e responde 200"""
+    scope["endpoint"] = _endpoint
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def _receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def _send(message):
+    pass
+
+
+def _scope() -> dict:
+    return {
+        "type": "http",
+        "method": "GET",
+        "path": "/api/deforestation/state/PA",
+        "app": SimpleNamespace(routes=ROUTES)
+    }
+
+
+async def _per_request_us(app, requests: int) -> float:
+    """Melhor média (µs) entre as rodadas"""
+    best = float("inf")
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        for _ in range(requests):
+            await app(_scope(), _receive, _send)
+        best = min(best, (time.perf_counter() - started) / requests * 1e6)
+    return best
+
+
+def bench_record(requests: int) -> float:
+    metrics = HTTPMetrics()
+    best = float("inf")
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        for i in range(requests):
+            metrics.record("GET", "/api/deforestation/state/{state}", 200, 0.0012 + (i % 100) * 1e-5)
+        best = min(best, (time.perf_counter() - started) / requests * 1e6)
+    return best
+
+
+async def bench_middleware(requests: int):
+    bare = await _per_request_us(_bare_app, requests)
+    wrapped = await _per_request_us(MetricsMiddleware(_bare_app, HTTPMetrics()), requests)
+    return bare, wrapped
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Custo do registro de métricas HTTP")
+    parser.add_argument("--requests", type=int, default=100_000, help="Requisições por rodada")
+    args = parser.parse_args(argv)
+
+    record = bench_record(args.requests)
+    bare, wrapped = asyncio.run(bench_middleware(args.requests))
+    print(f"⏱️  Métricas HTTP ({args.requests} requisições por rodada, melhor de {ROUNDS})\n")
+    print(f"{'HTTPMetrics.record':<36} {record:8.2f} µs")
+    print(f"{'app ASGI sem middleware':<36} {bare:8.2f} µs")
+    print(f"{'app ASGI com MetricsMiddleware':<36} {wrapped:8.2f} µs")
+    print(f"{'custo do middleware por requisição':<36} {wrapped - bare:8.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
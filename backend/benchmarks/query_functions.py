@@ -0,0 +1,327 @@
+"""
+Micro-benchmarks das funções de consulta, com baseline e detecção de regressão
+
+Mede cada função de mock_data_brazil e cada método do DirectService em
+datasets sintéticos de tamanho crescente:
+
+- mock: 27 estados × 5 anos (dados do app)
+- states_40y: 27 estados × 40 anos (cubo estado × bioma × ano)
+- municipalities: 5.570 municípios × 40 anos (HierarchicalAggregator)
+
+Cada caso roda em lotes calibrados para ~20 ms e vale o melhor de N
+repetições (µs por chamada). Com --update-baseline o resultado vira o
+baseline; sem ele, o resultado é comparado ao baseline e o processo termina
+com código 1 se algum caso ficar mais lento que o limite (--threshold).
+
+Tempos absolutos só valem na máquina que os mediu: o baseline não é
+versionado (gere o seu com --update-baseline) e guarda a máquina. Antes de
+cada caso é medido um laço de calibração; a comparação escala o baseline
+pela razão entre as medianas das calibrações (compensa a frequência e a
+carga da CPU no momento) e só reprova contra um baseline da mesma máquina;
+de outra, os números são apenas informativos.
+
+Uso (a partir de backend/):
+    python -m benchmarks.query_functions --update-baseline
+    python -m benchmarks.query_functions
+    python -m benchmarks.query_functions --threshold 0.5 --filter ranking
+"""
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple, Tuple
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from app.services import mock_data_brazil as mock_data
+from app.services.degradation_store import DegradationStore
+from app.services.direct_service import DirectService
+from app.services.hierarchy import HierarchicalAggregator
+from app.services.prodes_source import STATES, store_from_cube
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "query_baseline.json")
+
+N_MUNICIPALITIES = 5570
+YEARS_40 = list(range(1985, 2025))
+TARGET_SECONDS = 0.02
+REPEATS = 5
+
+
+class Case(NamedTuple):
+    name: str
+    dataset: str
+    run: Callable[[], object]
+
+
+def states_40y(seed: int = 7) -> DegradationStore:
+    """27 estados × 40 anos, área distribuída entre os biomas de cada estado"""
+    rng = np.random.default_rng(seed)
+    cube = np.zeros((len(STATES), len(mock_data.BIOMES), len(YEARS_40)))
+    for row, state in enumerate(STATES):
+        for biome, members in mock_data.STATES_BY_BIOME.items():
+            if state in members:
+                column = mock_data.BIOMES.index(biome)
+                cube[row, column] = rng.gamma(2.0, 150.0, len(YEARS_40)).round(1)
+    return store_from_cube(YEARS_40, cube, "SYNTHETIC_40Y")
+
+
+def municipalities(seed: int = 11) -> DegradationStore:
+    """5.570 municípios × 40 anos agregados para estados, biomas e Brasil"""
+    rng = np.random.default_rng(seed)
+    store = states_40y(seed)
+    municipality_state = rng.integers(0, len(store.states), N_MUNICIPALITIES)
+    municipality_biome = store.primary_biome[municipality_state]
+    values = rng.gamma(1.5, 4.0, (N_MUNICIPALITIES, len(YEARS_40))).round(2)
+    values[rng.random(values.shape) < 0.05] = np.nan
+    HierarchicalAggregator(
+        store,
+        names=[f"Município {i:04d}" for i in range(N_MUNICIPALITIES)],
+        codes=[str(1100000 + i) for i in range(N_MUNICIPALITIES)],
+        municipality_state=municipality_state,
+        municipality_biome=municipality_biome,
+        values=values
+    )
+    return store
+
+
+def _run_async(service_call: Callable[[], object]) -> Callable[[], object]:
+    """Executa a corrotina em um event loop reaproveitado entre as chamadas"""
+    loop = asyncio.new_event_loop()
+    return lambda: loop.run_until_complete(service_call())
+
+
+def build_cases() -> List[Case]:
+    datasets = {"mock": mock_data.STORE, "states_40y": states_40y(), "municipalities": municipalities()}
+    cases = [
+        Case("normalize_state_name", "-", lambda: mock_data.normalize_state_name("Pará")),
+        Case("normalize_state_name (sigla)", "-", lambda: mock_data.normalize_state_name("mt")),
+    ]
+
+    for dataset, store in datasets.items():
+        last, first = int(store.years[-1]), int(store.years[0])
+        cases += [
+            Case("get_state_data", dataset, lambda s=store, y=last: mock_data.get_state_data("PA", y, store=s)),
+            Case(
+                "get_comparison_data (estado)", dataset,
+                lambda s=store, a=first, b=last: mock_data.get_comparison_data("MT", a, b, store=s)
+            ),
+            Case(
+                "get_comparison_data (Brasil)", dataset,
+                lambda s=store, a=first, b=last: mock_data.get_comparison_data("Brasil", a, b, store=s)
+            ),
+            Case("get_ranking_data", dataset, lambda s=store, y=last: mock_data.get_ranking_data(y, store=s)),
+            Case(
+                "get_ranking_data (bioma)", dataset,
+                lambda s=store, y=last: mock_data.get_ranking_data(y, "asc", 27, "Cerrado", store=s)
+            ),
+            Case("get_biome_comparison", dataset, lambda s=store, y=last: mock_data.get_biome_comparison(y, store=s)),
+            Case("get_forecast_data", dataset, lambda s=store: mock_data.get_forecast_data("PA", 3, store=s)),
+            Case("get_forecast_table", dataset, lambda s=store: mock_data.get_forecast_table(3, store=s)),
+            Case("get_anomalies_data", dataset, lambda s=store: mock_data.get_anomalies_data(store=s)),
+            Case(
+                "get_anomalies_data (ano, bioma)", dataset,
+                lambda s=store, y=last: mock_data.get_anomalies_data(y, "Amazônia", 2.0, store=s)
+            ),
+        ]
+
+        service = DirectService()
+        service.store = store
+        store.ranking.warm()
+        cases += [
+            Case(
+                "DirectService.get_state_deforestation", dataset,
+                _run_async(lambda svc=service, y=last: svc.get_state_deforestation("PA", y))
+            ),
+            Case(
+                "DirectService.compare_deforestation", dataset,
+                _run_async(lambda svc=service, a=first, b=last: svc.compare_deforestation("Amazônia", a, b))
+            ),
+            Case(
+                "DirectService.get_states_ranking", dataset,
+                _run_async(lambda svc=service, y=last: svc.get_states_ranking(y))
+            ),
+            Case(
+                "DirectService.get_biome_comparison", dataset,
+                _run_async(lambda svc=service, y=last: svc.get_biome_comparison(y))
+            ),
+            Case(
+                "DirectService.get_overview", dataset,
+                _run_async(lambda svc=service, y=last: svc.get_overview(y))
+            ),
+        ]
+
+    store = datasets["municipalities"]
+    last = int(store.years[-1])
+    cases += [
+        Case(
+            "get_state_data (município)", "municipalities",
+            lambda: mock_data.get_state_data("Município 2785", last, "municipality", store=store)
+        ),
+        Case(
+            "get_ranking_data (município, top 100)", "municipalities",
+            lambda: mock_data.get_ranking_data(last, "desc", 100, None, "municipality", store=store)
+        ),
+    ]
+    return cases
+
+
+def time_case(case: Case, repeats: int = REPEATS) -> float:
+    """µs por chamada (melhor de `repeats` lotes calibrados)"""
+    case.run()
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            case.run()
+        elapsed = time.perf_counter() - started
+        if elapsed >= TARGET_SECONDS or number >= 1_000_000:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(10, int(TARGET_SECONDS / elapsed) + 1))
+
+    best = elapsed / number
+    for _ in range(repeats - 1):
+        started = time.perf_counter()
+        for _ in range(number):
+            case.run()
+        best = min(best, (time.perf_counter() - started) / number)
+    return best * 1e6
+
+
+def _calibration_run() -> Callable[[], object]:
+    """Laço de referência com o mesmo perfil das consultas (dict + numpy pequeno)"""
+    matrix = np.random.default_rng(3).gamma(2.0, 150.0, (27, 40))
+    index = {f"estado {i}": i for i in range(27)}
+
+    def run() -> float:
+        total = 0.0
+        for name, row in index.items():
+            series = matrix[row]
+            total += float(series[-1] - series[0]) + float(np.nansum(series[-5:]))
+        return total
+
+    return run
+
+
+CALIBRATION = Case("calibração", "-", _calibration_run())
+
+
+def measure(case: Case, repeats: int = REPEATS) -> Tuple[float, float]:
+    """µs por chamada do caso e do laço de calibração medido logo antes"""
+    calibration_us = time_case(CALIBRATION, repeats)
+    return time_case(case, repeats), calibration_us
+
+
+def host_id() -> str:
+    """Identifica a máquina/ambiente do baseline"""
+    return f"{platform.node()}|{platform.machine()}|{platform.processor()}|py{sys.version.split()[0]}|numpy{np.__version__}"
+
+
+def _key(case: Case) -> str:
+    return f"{case.dataset}::{case.name}"
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], threshold: float, min_delta_us: float) -> List[str]:
+    """Casos mais lentos que o baseline além do limite relativo (e de um mínimo absoluto)"""
+    regressions = []
+    for key, current in results.items():
+        before = baseline.get(key)
+        if before is None:
+            continue
+        if current > before * (1 + threshold) and current - before > min_delta_us:
+            regressions.append(key)
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks das funções de consulta")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Arquivo de baseline (JSON)")
+    parser.add_argument("--update-baseline", action="store_true", help="Grava o resultado como novo baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Regressão: mais lento que baseline × (1 + limite)")
+    parser.add_argument("--min-delta-us", type=float, default=1.0, help="Diferença mínima (µs) para contar como regressão")
+    parser.add_argument("--filter", default="", help="Roda apenas os casos cujo nome contém o texto")
+    parser.add_argument("--repeats", type=int, default=REPEATS, help="Repetições por caso (vale a melhor)")
+    args = parser.parse_args(argv)
+    logging.disable(logging.INFO)
+
+    stored: Dict = {}
+    if os.path.exists(args.baseline) and not args.update_baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            stored = json.load(file)
+    meta = stored.get("meta", {})
+    same_host = meta.get("host") == host_id()
+    if stored and not same_host:
+        print(f"⚠️  Baseline de outra máquina ({meta.get('host', '?')}): comparação apenas informativa")
+
+    print("⏱️  Montando datasets sintéticos (27 estados × 40 anos, 5.570 municípios × 40 anos)...")
+    cases = [case for case in build_cases() if args.filter.lower() in case.name.lower()]
+
+    results: Dict[str, float] = {}
+    calibration: Dict[str, float] = {}
+    for case in cases:
+        key = _key(case)
+        case_us, calibration_us = measure(case, args.repeats)
+        results[key], calibration[key] = round(case_us, 3), round(calibration_us, 3)
+
+    # Baseline na velocidade atual da máquina: escala pela mediana das
+    # calibrações (robusta a picos isolados de uma medição)
+    scale = 1.0
+    shared = [key for key in calibration if key in stored.get("calibration", {})]
+    if shared:
+        scale = (
+            statistics.median(calibration[key] for key in shared)
+            / statistics.median(stored["calibration"][key] for key in shared)
+        )
+    baseline = {key: value * scale for key, value in stored.get("results", {}).items()}
+
+    print(f"\n{'caso':<44} {'dataset':<15} {'µs/chamada':>12} {'baseline':>10} {'variação':>9}")
+    for case in cases:
+        key = _key(case)
+        before = baseline.get(key)
+        if before:
+            reference, change = f"{before:>10.2f}", f"{(results[key] - before) / before * 100:+8.1f}%"
+        else:
+            reference, change = f"{'-':>10}", f"{'-':>9}"
+        print(f"{case.name:<44} {case.dataset:<15} {results[key]:>12.2f} {reference} {change}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump({
+                "meta": {
+                    "created_at": datetime.utcnow().isoformat(),
+                    "host": host_id(),
+                    "repeats": args.repeats
+                },
+                "results": results,
+                "calibration": calibration
+            }, file, indent=2, ensure_ascii=False)
+        print(f"\n💾 Baseline gravado em {args.baseline}")
+        return 0
+
+    if not baseline:
+        print("\nSem baseline: rode com --update-baseline para gravar um.")
+        return 0
+    print(f"\n📏 Calibração: baseline escalado × {scale:.2f}")
+
+    # Confirma cada regressão medindo de novo (ruído de agendamento derruba casos isolados)
+    regressions = compare(results, baseline, args.threshold, args.min_delta_us)
+    by_key = {_key(case): case for case in cases}
+    for key in regressions:
+        results[key] = min(results[key], round(time_case(by_key[key], args.repeats * 2), 3))
+    regressions = compare(results, baseline, args.threshold, args.min_delta_us)
+    if regressions:
+        print(f"\n{'❌' if same_host else '⚠️ '} {len(regressions)} regressão(ões) acima de {args.threshold:.0%}:")
+        for key in regressions:
+            print(f"   {key}: {baseline[key]:.2f} µs -> {results[key]:.2f} µs")
+        return 1 if same_host else 0
+    print(f"\n✅ Nenhuma regressão acima de {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+Benchmark da serialização das rotas de desmatamento
+
+Compara, por rota, o caminho padrão (FastAPI revalida o dict contra o
+response_model e codifica com json) com FAST_SERIALIZATION (resultado já
+validado no service, codificado com orjson). As chamadas usam o app em
+processo (TestClient), com o cache do service aquecido, para que a diferença
+medida seja a de validação + serialização.
+
+Uso (a partir de backend/):
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --requests 2000
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+from app.routers.deforestation import FastJSONResponse
+from app.services.deforestation_service import finalize, get_deforestation_service
+from app.services import mock_data_brazil as mock_data
+
+ROUTES = [
+    "/api/deforestation/state/PA?year=2024",
+    "/api/deforestation/compare/Brasil?year_start=2020&year_end=2024",
+    "/api/deforestation/ranking/2024?limit=27",
+    "/api/deforestation/overview?biome=Amazônia",
+]
+
+ROUNDS = 5
+
+
+def _row(name: str, standard: float, fast: float) -> str:
+    return (
+        f"{name:<66} {standard:>8.1f}µs {fast:>8.1f}µs "
+        f"{standard - fast:>8.1f}µs {(standard - fast) / standard * 100:>6.1f}%"
+    )
+
+
+def _header(title: str) -> None:
+    print(f"\n{title:<66} {'padrão':>10} {'rápido':>10} {'economia':>10} {'%':>7}")
+
+
+def bench_routes(requests: int) -> None:
+    """
+    Requisição completa (roteamento + handler + serialização)
+
+    Os modos são alternados em rodadas e vale o melhor tempo de cada um,
+    para reduzir o ruído do TestClient.
+    """
+    client = TestClient(app)
+    service = get_deforestation_service()
+    per_round = max(requests // ROUNDS, 1)
+    _header("rota")
+
+    for url in ROUTES:
+        best = {False: float("inf"), True: float("inf")}
+        for _ in range(ROUNDS):
+            for fast in (False, True):
+                settings.FAST_SERIALIZATION = fast
+                service.invalidate_cache()
+                client.get(url)
+                started = time.perf_counter()
+                for _ in range(per_round):
+                    client.get(url)
+                elapsed = (time.perf_counter() - started) / per_round * 1e6
+                best[fast] = min(best[fast], elapsed)
+        print(_row(url, best[False], best[True]))
+
+
+async def bench_encoding(repeat: int) -> None:
+    """Apenas validação + codificação, pelo mesmo caminho que o FastAPI usa"""
+    fields = {route.path: route.response_field for route in app.routes if hasattr(route, "response_field")}
+    payloads = [
+        ("ranking (27 estados)", "/api/deforestation/ranking/{year}", ("get_states_ranking",),
+         mock_data.get_ranking_data(2024, limit=27)),
+        ("overview", "/api/deforestation/overview", ("get_overview",),
+         mock_data.get_overview_data(2024)),
+    ]
+    _header("payload")
+
+    settings.FAST_SERIALIZATION = True
+    for name, path, key, raw in payloads:
+        field = fields[path]
+        started = time.perf_counter()
+        for _ in range(repeat):
+            content = await serialize_response(field=field, response_content=raw, is_coroutine=True)
+            JSONResponse(content).body
+        standard = (time.perf_counter() - started) / repeat * 1e6
+
+        ready = finalize(key, raw)
+        started = time.perf_counter()
+        for _ in range(repeat):
+            FastJSONResponse(ready).body
+        fast = (time.perf_counter() - started) / repeat * 1e6
+        print(_row(name, standard, fast))
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de serialização")
+    parser.add_argument("--requests", type=int, default=500, help="Requisições por rota e modo")
+    args = parser.parse_args(argv)
+    logging.disable(logging.INFO)
+
+    original = settings.FAST_SERIALIZATION
+    try:
+        print(f"⏱️  Serialização: {args.requests} requisições por rota (cache aquecido)")
+        bench_routes(args.requests)
+        asyncio.run(bench_encoding(args.requests * 10))
+    finally:
+        settings.FAST_SERIALIZATION = original
+
+
+if __name__ == "__main__":
+    main()
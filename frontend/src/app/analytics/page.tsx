@@ -22,17 +22,11 @@ export default function AnalyticsPage() {
     async function fetchData() {
       setLoading(true);
       try {
-        const entity = selectedBiome || 'Brasil';
+        const overview = await deforestationApi.getOverview(selectedBiome || undefined, 2024);
         
-        const [comparison, ranking, biomes] = await Promise.all([
-          deforestationApi.compareData(entity, 2020, 2024),
-          deforestationApi.getRanking(2024, 'desc', 10, selectedBiome || undefined),
-          deforestationApi.compareBiomes(2024)
-        ]);
-        
-        setComparisonData(comparison);
-        setRankingData(ranking);
-        setBiomeData(biomes);
+        setComparisonData(overview.comparison);
+        setRankingData(overview.ranking);
+        setBiomeData(overview.biomes);
       } catch (error) {
         console.error('Error fetching analytics data:', error);
       } finally {
@@ -110,67 +104,69 @@ export default function AnalyticsPage() {
             </Card>
 
             {/* Resumo com Tendência */}
-            <Card className="mb-8">
-              <CardHeader>
-                <CardTitle>
-                  {selectedBiome || 'Brasil'} - Resumo (2020-2024)
-                </CardTitle>
-                <CardDescription>
-                  Evolução temporal da degradação ambiental
-                </CardDescription>
-              </CardHeader>
-              <CardContent>
-                <div className="grid grid-cols-1 md:grid-cols-4 gap-6 mb-6">
-                  <div className="text-center">
-                    <p className="text-sm text-gray-600 mb-2">Mudança Total</p>
-                    <p className={`text-3xl font-bold ${
-                      comparisonData.total_change_km2 < 0 ? 'text-green-600' : 'text-red-600'
-                    }`}>
-                      {comparisonData.total_change_km2 > 0 ? '+' : ''}
-                      {comparisonData.total_change_km2.toLocaleString('pt-BR')} km²
-                    </p>
-                  </div>
-                  
-                  <div className="text-center">
-                    <p className="text-sm text-gray-600 mb-2">Variação (%)</p>
-                    <p className={`text-3xl font-bold ${
-                      comparisonData.percentage_change < 0 ? 'text-green-600' : 'text-red-600'
-                    }`}>
-                      {comparisonData.percentage_change > 0 ? '+' : ''}
-                      {comparisonData.percentage_change.toFixed(1)}%
-                    </p>
-                  </div>
-                  
-                  <div className="text-center">
-                    <p className="text-sm text-gray-600 mb-2">Tendência</p>
-                    <p className="text-3xl font-bold">
-                      {comparisonData.trend === 'decreasing' && '📉'}
-                      {comparisonData.trend === 'increasing' && '📈'}
-                      {comparisonData.trend === 'stable' && '➡️'}
-                    </p>
-                    <p className="text-sm text-gray-600 mt-1">
-                      {comparisonData.trend === 'decreasing' && 'Redução'}
-                      {comparisonData.trend === 'increasing' && 'Aumento'}
-                      {comparisonData.trend === 'stable' && 'Estável'}
-                    </p>
-                  </div>
-                  
-                  <div className="text-center">
-                    <p className="text-sm text-gray-600 mb-2">Bioma</p>
-                    <p className="text-xl font-bold text-gray-800">
-                      {comparisonData.biome}
-                    </p>
+            {comparisonData && (
+              <Card className="mb-8">
+                <CardHeader>
+                  <CardTitle>
+                    {selectedBiome || 'Brasil'} - Resumo (2020-2024)
+                  </CardTitle>
+                  <CardDescription>
+                    Evolução temporal da degradação ambiental
+                  </CardDescription>
+                </CardHeader>
+                <CardContent>
+                  <div className="grid grid-cols-1 md:grid-cols-4 gap-6 mb-6">
+                    <div className="text-center">
+                      <p className="text-sm text-gray-600 mb-2">Mudança Total</p>
+                      <p className={`text-3xl font-bold ${
+                        comparisonData.total_change_km2 < 0 ? 'text-green-600' : 'text-red-600'
+                      }`}>
+                        {comparisonData.total_change_km2 > 0 ? '+' : ''}
+                        {comparisonData.total_change_km2.toLocaleString('pt-BR')} km²
+                      </p>
+                    </div>
+                    
+                    <div className="text-center">
+                      <p className="text-sm text-gray-600 mb-2">Variação (%)</p>
+                      <p className={`text-3xl font-bold ${
+                        comparisonData.percentage_change < 0 ? 'text-green-600' : 'text-red-600'
+                      }`}>
+                        {comparisonData.percentage_change > 0 ? '+' : ''}
+                        {comparisonData.percentage_change.toFixed(1)}%
+                      </p>
+                    </div>
+                    
+                    <div className="text-center">
+                      <p className="text-sm text-gray-600 mb-2">Tendência</p>
+                      <p className="text-3xl font-bold">
+                        {comparisonData.trend === 'decreasing' && '📉'}
+                        {comparisonData.trend === 'increasing' && '📈'}
+                        {comparisonData.trend === 'stable' && '➡️'}
+                      </p>
+                      <p className="text-sm text-gray-600 mt-1">
+                        {comparisonData.trend === 'decreasing' && 'Redução'}
+                        {comparisonData.trend === 'increasing' && 'Aumento'}
+                        {comparisonData.trend === 'stable' && 'Estável'}
+                      </p>
+                    </div>
+                    
+                    <div className="text-center">
+                      <p className="text-sm text-gray-600 mb-2">Bioma</p>
+                      <p className="text-xl font-bold text-gray-800">
+                        {comparisonData.biome}
+                      </p>
+                    </div>
                   </div>
-                </div>
 
-                <TrendChart
-                  data={comparisonData.data}
-                  title={`Evolução Temporal - ${selectedBiome || 'Brasil'}`}
-                  color={getTrendColor(comparisonData.trend)}
-                  showArea={true}
-                />
-              </CardContent>
-            </Card>
+                  <TrendChart
+                    data={comparisonData.data}
+                    title={`Evolução Temporal - ${selectedBiome || 'Brasil'}`}
+                    color={getTrendColor(comparisonData.trend)}
+                    showArea={true}
+                  />
+                </CardContent>
+              </Card>
+            )}
 
             {/* Grid com 2 gráficos */}
             <div className="grid grid-cols-1 lg:grid-cols-2 gap-8 mb-8">
@@ -5,7 +5,7 @@ import { MessageBubble } from '@/components/chat/MessageBubble';
 import { ChatInput } from '@/components/chat/ChatInput';
 import { QuickActions } from '@/components/chat/QuickActions';
 import { Card } from '@/components/ui/card';
-import { deforestationApi } from '@/lib/api';
+import { chatApi, ChatStreamError } from '@/lib/api';
 import { Link, Loader2 } from 'lucide-react';
 
 interface Message {
@@ -45,163 +45,48 @@ export default function ChatPage() {
 
   const addMessage = (content: string, isUser: boolean) => {
     const newMessage: Message = {
-      id: Date.now().toString(),
+      id: `${Date.now()}-${isUser ? 'user' : 'bot'}`,
       content,
       isUser,
       timestamp: new Date().toISOString(),
     };
     setMessages((prev) => [...prev, newMessage]);
+    return newMessage.id;
+  };
+
+  const updateMessage = (id: string, content: string) => {
+    setMessages((prev) => prev.map((message) => (message.id === id ? { ...message, content } : message)));
   };
 
   const processQuery = async (query: string) => {
     addMessage(query, true);
     setIsLoading(true);
 
+    // O backend responde perguntas estruturadas direto (intent router) e
+    // encaminha as demais ao agente; a resposta aparece conforme os tokens chegam
+    let answer = '';
+    let failure = '';
+    let answerId: string | null = null;
     try {
-      const lowerQuery = query.toLowerCase();
-
-      if (lowerQuery.includes('desmatamento') && (lowerQuery.includes('em') || lowerQuery.includes('no'))) {
-        const stateMatch = query.match(/(?:em|no|na)\s+(\w+)/i);
-        const yearMatch = query.match(/(\d{4})/);
-
-        if (stateMatch) {
-          const state = stateMatch[1].trim();
-          const year = yearMatch ? parseInt(yearMatch[1]) : undefined;
-
-          const data = await deforestationApi.getStateData(state, year);
-
-          const response = `📊 Desmatamento em ${data.state} (${data.year})
-
-🌳 Área desmatada: ${data.area_km2.toLocaleString('pt-BR')} km²
-📈 Percentual do total: ${data.percentage_of_total.toFixed(1)}%
-🏞️ Bioma: ${data.biome}
-
-Comparação com ${data.comparison_previous_year.year}:
-${data.comparison_previous_year.change_km2 < 0 ? '📉' : '📈'} ${data.comparison_previous_year.change_percentage > 0 ? '+' : ''}${data.comparison_previous_year.change_percentage.toFixed(1)}% (${data.comparison_previous_year.change_km2 > 0 ? '+' : ''}${data.comparison_previous_year.change_km2.toFixed(1)} km²)`;
-
-          addMessage(response, false);
-        }
-      }
-
-
-      else if (lowerQuery.includes('bioma') ||
-        lowerQuery.match(/amazônia|cerrado|mata atlântica|caatinga|pampa|pantanal/i)) {
-
-        if (lowerQuery.includes('compar') || lowerQuery.includes('todos')) {
-          const yearMatch = query.match(/(\d{4})/);
-          const year = yearMatch ? parseInt(yearMatch[1]) : 2024;
-
-          const data = await deforestationApi.compareBiomes(year);
-
-          const response = `🌍 Comparação de Biomas (${data.year})
-
-📊 Total Brasil: ${data.total_brazil_km2.toLocaleString('pt-BR')} km²
-
-Ranking por bioma:
-
-${data.biomes.map((b, idx) =>
-            `${idx + 1}º ${b.biome}
-   └─ ${b.area_km2.toLocaleString('pt-BR')} km² (${b.percentage_of_total.toFixed(1)}% do total)
-   └─ ${b.num_states} estado${b.num_states > 1 ? 's' : ''} afetado${b.num_states > 1 ? 's' : ''}`
-          ).join('\n\n')}`;
-
-          addMessage(response, false);
-        }
-        else if (lowerQuery.includes('ranking') || lowerQuery.includes('estados')) {
-          const biomeMatch = query.match(/(amazônia|cerrado|mata atlântica|caatinga|pampa|pantanal)/i);
-          const yearMatch = query.match(/(\d{4})/);
-
-          if (biomeMatch) {
-            const biome = biomeMatch[1];
-            const year = yearMatch ? parseInt(yearMatch[1]) : 2024;
-
-            const data = await deforestationApi.getRanking(year, 'desc', 10, biome);
-
-            const response = `🏆 Ranking - ${biome} (${year})
-
-${data.ranking.map(item =>
-              `${item.position}º ${item.state} (${item.state_code})
-   └─ ${item.area_km2.toLocaleString('pt-BR')} km²`
-            ).join('\n\n')}`;
-
-            addMessage(response, false);
+      await chatApi.stream(query, ({ event, data }) => {
+        if (event === 'token') {
+          answer += data.content;
+          if (answerId === null) {
+            answerId = addMessage(answer, false);
+            setIsLoading(false);
+          } else {
+            updateMessage(answerId, answer);
           }
         }
-      }
+        if (event === 'error') failure = data.detail;
+      });
 
-      else if (lowerQuery.includes('compare') || lowerQuery.includes('compar') || lowerQuery.includes('entre')) {
-        const stateMatch =
-          query.match(/(?:compare|compar)[a-z]*\s+([a-zà-ú\s]+)/i) ||
-          query.match(/([a-zà-ú\s]+?)\s+entre/i);
-
-        const yearsMatch = query.match(/(\d{4})\s+(?:e|a|até)\s+(\d{4})/);
-
-        if (stateMatch && yearsMatch) {
-          const state = stateMatch[1];
-          const yearStart = parseInt(yearsMatch[1]);
-          const yearEnd = parseInt(yearsMatch[2]);
-
-          const data = await deforestationApi.compareData(state, yearStart, yearEnd);
-
-          const trendEmoji =
-            data.trend === 'decreasing'
-              ? '📉'
-              : data.trend === 'increasing'
-                ? '📈'
-                : '➡️';
-
-          const trendText =
-            data.trend === 'decreasing'
-              ? 'REDUÇÃO'
-              : data.trend === 'increasing'
-                ? 'AUMENTO'
-                : 'ESTÁVEL';
-
-          const response = `📊 Comparação: ${data.state} (${data.year_start}-${data.year_end})
-
-${trendEmoji} Tendência: ${trendText}
-
-📉 Mudança total: ${data.total_change_km2 > 0 ? '+' : ''}${data.total_change_km2.toFixed(1)} km²
-📊 Variação percentual: ${data.percentage_change > 0 ? '+' : ''}${data.percentage_change.toFixed(1)}%
-
-Dados por ano:
-${data.data.map((d) => `${d.year}: ${d.area_km2.toFixed(1)} km²`).join('\n')}
-
-🏞️ Bioma: ${data.biome}`;
-
-          addMessage(response, false);
-        }
-      }
-
-      else if (lowerQuery.includes('ranking') || lowerQuery.includes('top') || lowerQuery.includes('quais')) {
-        const yearMatch = query.match(/(\d{4})/);
-        const limitMatch = query.match(/(\d+)\s+estados?/i);
-
-        const year = yearMatch ? parseInt(yearMatch[1]) : 2024;
-        const limit = limitMatch ? parseInt(limitMatch[1]) : 5;
-        const order =
-          lowerQuery.includes('menos') || lowerQuery.includes('menor') ? 'asc' : 'desc';
-
-        const data = await deforestationApi.getRanking(year, order, limit);
-
-        const response = `🏆 Ranking de Desmatamento (${data.year})
-
-📊 Total Brasil: ${data.total_brazil_km2.toLocaleString('pt-BR')} km²
-
-${order === 'desc' ? 'Estados que MAIS desmataram:' : 'Estados que MENOS desmataram:'}
-
-${data.ranking
-            .map(
-              (item, idx) =>
-                `${idx + 1}º ${item.state} (${item.state_code})
-   └─ ${item.area_km2.toLocaleString('pt-BR')} km² (${item.percentage_of_total.toFixed(1)}% do total)`
-            )
-            .join('\n\n')}`;
-
-        addMessage(response, false);
+      if (!answer) {
+        addMessage(failure || '❌ Não foi possível obter uma resposta. Tente reformular a pergunta.', false);
       }
-
-      else {
+    } catch (error) {
+      console.error('Error processing query:', error);
+      if (error instanceof ChatStreamError && error.status === 503) {
         addMessage(
           '❓ Desculpe, não entendi sua pergunta. Tente perguntar sobre:\n\n' +
           '• "Qual o desmatamento no [Estado] em [Ano]?"\n' +
@@ -209,13 +94,13 @@ ${data.ranking
           '• "Quais os 5 estados que mais desmataram em [Ano]?"',
           false
         );
+      } else if (error instanceof ChatStreamError && error.status === 429) {
+        addMessage('⏳ Muitas perguntas em pouco tempo. Aguarde alguns segundos e tente novamente.', false);
+      } else if (answerId !== null) {
+        updateMessage(answerId, `${answer}\n\n❌ A conexão foi interrompida antes do fim da resposta.`);
+      } else {
+        addMessage('❌ Erro ao consultar o servidor. Tente novamente em instantes.', false);
       }
-    } catch (error) {
-      console.error('Error processing query:', error);
-      addMessage(
-        '❌ Ocorreu um erro ao processar sua consulta. Por favor, tente novamente ou reformule a pergunta.',
-        false
-      );
     } finally {
       setIsLoading(false);
     }
@@ -18,12 +18,9 @@ export default function DashboardPage() {
     async function fetchData() {
       setLoading(true);
       try {
-        const [ranking, biomes] = await Promise.all([
-          deforestationApi.getRanking(2024, 'desc', 10, selectedBiome || undefined),
-          deforestationApi.compareBiomes(2024)
-        ]);
-        setRankingData(ranking);
-        setBiomeComparison(biomes);
+        const overview = await deforestationApi.getOverview(selectedBiome || undefined, 2024);
+        setRankingData(overview.ranking);
+        setBiomeComparison(overview.biomes);
       } catch (error) {
         console.error('Error fetching data:', error);
       } finally {
@@ -80,6 +80,17 @@ export interface BiomeComparisonData {
   timestamp: string;
 }
 
+export interface OverviewData {
+  year: number;
+  total_brazil_km2: number;
+  biome_filter: string | null;
+  comparison: ComparisonData | null;
+  ranking: RankingData;
+  biomes: BiomeComparisonData;
+  data_source: string;
+  timestamp: string;
+}
+
 // Funções de API
 export const deforestationApi = {
   // Ação 1: Consultar por estado
@@ -121,6 +132,20 @@ export const deforestationApi = {
     return response.data;
   },
 
+  // Visão geral: comparação, ranking e biomas em uma única requisição
+  getOverview: async (
+    biome?: string,
+    year?: number,
+    limit: number = 10
+  ): Promise<OverviewData> => {
+    const params: any = { limit };
+    if (biome) params.biome = biome;
+    if (year) params.year = year;
+
+    const response = await api.get('/api/deforestation/overview', { params });
+    return response.data;
+  },
+
   // Auxiliares
   getStates: async (biome?: string) => {
     const params = biome ? { biome } : {};
@@ -139,4 +164,56 @@ export const deforestationApi = {
   },
 };
 
+export interface ChatStreamEvent {
+  event: 'start' | 'intent' | 'tool_call' | 'tool_result' | 'token' | 'done' | 'error';
+  data: any;
+}
+
+// Falha HTTP do chat antes do stream começar (ex.: 503 pergunta não reconhecida, 429)
+export class ChatStreamError extends Error {
+  constructor(public status: number, public detail?: string) {
+    super(detail || `Chat indisponível (${status})`);
+  }
+}
+
+// Chat com o agente em streaming (Server-Sent Events via fetch)
+export const chatApi = {
+  stream: async (
+    message: string,
+    onEvent: (event: ChatStreamEvent) => void,
+    signal?: AbortSignal
+  ): Promise<void> => {
+    const response = await fetch(`${API_URL}/api/chat/stream`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ message }),
+      signal,
+    });
+    if (!response.ok || !response.body) {
+      const body = await response.json().catch(() => null);
+      throw new ChatStreamError(response.status, body?.detail);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      const frames = buffer.split('\n\n');
+      buffer = frames.pop() || '';
+      for (const frame of frames) {
+        const event = frame.match(/^event: (.*)$/m)?.[1];
+        const data = frame.match(/^data: (.*)$/m)?.[1];
+        if (event && data) {
+          onEvent({ event: event as ChatStreamEvent['event'], data: JSON.parse(data) });
+        }
+      }
+    }
+  },
+};
+
 export default api;